@@ -1,8 +1,583 @@
 import hashlib
 import json
 import os
+import random
+import shutil
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
+from fshtbkvs.FSHTBKVSBackend import FSHTBKVSDirectoryBackend
+from fshtbkvs.FSHTBKVSBackend import FSHTBKVSPackedBackend
+from fshtbkvs.FSHTBKVSSnapshot import _write_snapshot
+
+try:
+	import fcntl
+except ImportError:
+	# no cross-process locking on platforms without fcntl (e.g. Windows)
+	fcntl = None
+
+# marks a deleted key in the write-ahead log overlay
+_DELETED = object()
+# marks a missing entry or field
+_MISSING = object()
+
+# key index: magic, length of the json encoded stamp of the json file
+_KEY_INDEX_HEADER = struct.Struct('<8sI')
+# key index: (processed) key, offset and length of '"<key>": <value>'
+_KEY_INDEX_RECORD = struct.Struct('<64sII')
+_KEY_INDEX_MAGIC  = b'FSHTBIDX'
+
+def _analyze_buckets(files, max_depth, backend=None):
+	"""
+	Collects the number of entries and bytes of the json files 'files' stored
+	by 'backend' (the directory tree by default) and of the buckets, their
+	entries would end up in for every depth. Runs inside of a worker process.
+	"""
+
+	backend = backend if backend else FSHTBKVSDirectoryBackend()
+
+	result = {
+		'buckets':      [],
+		'depths':       {depth: {} for depth in range(1, 7)},
+		'hashed':       0,
+		'pass_through': 0,
+		'load_time':    0.0,
+		'parse_time':   0.0,
+		'parse_bytes':  0
+	}
+	for f in files:
+		time_started = time.perf_counter()
+		try:
+			data_raw = backend.load(f)
+		except:
+			continue
+		time_loaded = time.perf_counter()
+		try:
+			data = json.loads(data_raw.decode('UTF-8'))
+		except:
+			continue
+		result['load_time']   += time_loaded - time_started
+		result['parse_time']  += time.perf_counter() - time_loaded
+		result['parse_bytes'] += len(data_raw)
+		result['buckets'].append((f, len(data), len(data_raw)))
+
+		for key, value in data.items():
+			# hashed keys are sha256sums, shorter ones are passed through
+			if len(key) == 64:
+				result['hashed'] += 1
+			else:
+				result['pass_through'] += 1
+
+			size = len(
+				(
+					json.dumps(key, ensure_ascii=False)
+					+ ': '
+					+ json.dumps(value, ensure_ascii=False)
+					+ ', '
+				).encode('UTF-8')
+			)
+			for depth, buckets in result['depths'].items():
+				# passed through keys shorter than the depth would get hashed
+				if len(key) < depth:
+					bucket = hashlib.sha256(bytes(key, 'utf-8')).hexdigest()
+					bucket = bucket[:depth]
+				else:
+					bucket = key[:depth]
+				if not bucket in buckets:
+					buckets[bucket] = [0, 0]
+				buckets[bucket][0] += 1
+				buckets[bucket][1] += size
+
+	return result
+
+def _collect_index(files, fields, backend=None):
+	"""
+	Collects the index entries ({field: {encoded value: [keys]}}) of the
+	fields 'fields' from the json files 'files' stored by 'backend' (the
+	directory tree by default). Runs inside of a worker process.
+	"""
+
+	backend = backend if backend else FSHTBKVSDirectoryBackend()
+
+	index = {field: {} for field in fields}
+	for f in files:
+		try:
+			data = json.loads(backend.load(f).decode('UTF-8'))
+		except:
+			continue
+		for key, value in data.items():
+			for field in fields:
+				value_field = _get_field(value, field)
+				if value_field is _MISSING:
+					continue
+				value_encoded = _encode_index_value(value_field)
+				if not value_encoded in index[field]:
+					index[field][value_encoded] = []
+				index[field][value_encoded].append(key)
+
+	return index
+
+def _compile_schema(schema, validate_any, path='value'):
+	"""
+	Compiles the value schema 'schema' into a function, which raises a
+	ValueError naming the offending part of a value. A schema is either one
+	of 'str', 'int', 'float' (int or float), 'bool' and 'any' (everything the
+	kvs accepts, validated by 'validate_any') or a dict:
+	{'type': 'list', 'items': schema} or
+	{'type': 'dict', 'fields': {name: schema}, 'required': [names],
+	'extra': bool} (all fields are required and no extra fields are allowed
+	by default) or
+	{'type': 'dict', 'values': schema}
+	"""
+
+	def type_error(type_name):
+		return ValueError(
+			path + " must be of type <class '" + type_name + "'>"
+		)
+
+	if schema == 'any':
+		return validate_any
+
+	if schema == 'str':
+		def validate(value):
+			if type(value) is not str:
+				raise type_error('str')
+		return validate
+
+	if schema == 'int':
+		def validate(value):
+			if type(value) is not int:
+				raise type_error('int')
+		return validate
+
+	if schema == 'float':
+		def validate(value):
+			if type(value) is not float and type(value) is not int:
+				raise type_error('float')
+		return validate
+
+	if schema == 'bool':
+		def validate(value):
+			if type(value) is not bool:
+				raise type_error('bool')
+		return validate
+
+	if not isinstance(schema, dict):
+		raise ValueError("invalid schema for " + path)
+
+	if schema.get('type') == 'list' and 'items' in schema:
+		validate_item = _compile_schema(
+			schema['items'],
+			validate_any,
+			path + '[]'
+		)
+
+		def validate(value):
+			if type(value) is not list:
+				raise type_error('list')
+			for v in value:
+				validate_item(v)
+		return validate
+
+	if schema.get('type') == 'dict' and 'values' in schema:
+		validate_value = _compile_schema(
+			schema['values'],
+			validate_any,
+			path + '[]'
+		)
+
+		def validate(value):
+			if type(value) is not dict:
+				raise type_error('dict')
+			for k, v in value.items():
+				if type(k) is not str or k == '' or len(k) > 64:
+					raise ValueError(
+						path + " has the invalid field '" + str(k) + "'"
+					)
+				validate_value(v)
+		return validate
+
+	if schema.get('type') == 'dict' and isinstance(schema.get('fields'), dict):
+		fields = {}
+		for name, field_schema in schema['fields'].items():
+			if name == '' or len(name) > 64:
+				raise ValueError("invalid schema for " + path + "." + name)
+			fields[name] = _compile_schema(
+				field_schema,
+				validate_any,
+				path + '.' + name
+			)
+		required = schema.get('required', list(fields))
+		extra    = schema.get('extra', False)
+		if not isinstance(required, list) or not isinstance(extra, bool):
+			raise ValueError("invalid schema for " + path)
+
+		def validate(value):
+			if type(value) is not dict:
+				raise type_error('dict')
+			for name in required:
+				if not name in value:
+					raise ValueError(
+						path + " is missing the field '" + name + "'"
+					)
+			for k, v in value.items():
+				validate_field = fields.get(k)
+				if validate_field is not None:
+					validate_field(v)
+				elif extra:
+					validate_any({k: v})
+				else:
+					raise ValueError(
+						path + " has the unknown field '" + str(k) + "'"
+					)
+		return validate
+
+	raise ValueError("invalid schema for " + path)
+
+def _encode_bucket(data_as_dict, key_index=False):
+	"""
+	Encodes the dict 'data_as_dict' as json and, if 'key_index' is True,
+	returns the sorted key index records of the encoded json as well (or
+	None)
+	"""
+
+	if not key_index:
+		data = json.dumps(data_as_dict, ensure_ascii=False).encode('UTF-8')
+		return data, None
+
+	# encode entry by entry (just like json.dumps) to know their offsets
+	parts   = []
+	records = []
+	offset  = 1
+	for key, value in data_as_dict.items():
+		part = (
+			json.dumps(key, ensure_ascii=False)
+			+ ': '
+			+ json.dumps(value, ensure_ascii=False)
+		).encode('UTF-8')
+		if parts != []:
+			offset += 2
+		records.append((key.encode('UTF-8'), offset, len(part)))
+		parts.append(part)
+		offset += len(part)
+
+	data = b'{' + b', '.join(parts) + b'}'
+
+	return data, b''.join([
+		_KEY_INDEX_RECORD.pack(*record) for record in sorted(records)
+	])
+
+def _encode_index_value(value):
+	"""
+	Returns the canonical encoding of an indexed field value
+	"""
+
+	return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+def _get_field(value, field):
+	"""
+	Returns the field with the path 'field' (e.g. 'user.id') of the dict
+	'value' or _MISSING
+	"""
+
+	for part in field.split('.'):
+		if not isinstance(value, dict) or not part in value:
+			return _MISSING
+		value = value[part]
+
+	return value
+
+def _get_key_index_start(key_index, stamp_file):
+	"""
+	Returns the offset of the records of the key index 'key_index' or None,
+	if it is broken or does not belong to the version 'stamp_file' of its
+	json file
+	"""
+
+	try:
+		magic, stamp_length = _KEY_INDEX_HEADER.unpack_from(key_index, 0)
+		start = _KEY_INDEX_HEADER.size + stamp_length
+		stamp = json.loads(
+			key_index[_KEY_INDEX_HEADER.size:start].decode('UTF-8')
+		)
+	except:
+		return None
+
+	if magic != _KEY_INDEX_MAGIC or stamp_file is None:
+		return None
+	if stamp != list(stamp_file):
+		return None
+	if (len(key_index) - start) % _KEY_INDEX_RECORD.size != 0:
+		return None
+
+	return start
+
+def _is_key_index_current(backend, path_to_file):
+	"""
+	Returns True, if the key index of the json file 'path_to_file' stored by
+	'backend' belongs to its current version
+	"""
+
+	try:
+		key_index = backend.load(path_to_file[:-5] + '.idx')
+	except:
+		return False
+
+	return _get_key_index_start(
+		key_index,
+		backend.stamp(path_to_file)
+	) is not None
+
+def _maintain_buckets(files, key_index=False, backend=None):
+	"""
+	Removes invalid entries from the json files 'files' stored by 'backend'
+	(the directory tree by default) and rebuilds broken or lost ones. Returns
+	the number of entries after and before cleaning up or None, if a file
+	could not be written. Runs inside of a worker process, so nothing but
+	the json files and their sidecars gets touched.
+	"""
+
+	backend = backend if backend else FSHTBKVSDirectoryBackend()
+
+	entries_new = 0
+	entries_old = 0
+
+	for f in files:
+		try:
+			data   = json.loads(backend.load(f).decode('UTF-8'))
+			parsed = isinstance(data, dict)
+		except:
+			parsed = False
+		if not parsed:
+			data = {}
+		if data == {}:
+			# the file might be broken, use the last known number of entries
+			try:
+				entries_old += json.loads(
+					backend.load(f[:-5] + '.sum').decode('UTF-8')
+				).get('entries', 0)
+			except:
+				pass
+		else:
+			entries_old += len(data)
+
+		data_clean = {}
+		for key, value in data.items():
+			try:
+				_validate_key(key)
+				_validate_value(value)
+				data_clean[key] = value
+			except:
+				continue
+
+		entries_new += len(data_clean)
+
+		# intact json files (and their sidecars) are left untouched, a key
+		# index written for an older version of the json file is not intact
+		if (
+			parsed
+			and data_clean == data
+			and backend.exists(f[:-5] + '.sum')
+			and (not key_index or _is_key_index_current(backend, f))
+		):
+			continue
+
+		if isinstance(backend, FSHTBKVSDirectoryBackend):
+			os.makedirs(os.path.dirname(f), exist_ok=True)
+		if not _save_bucket_files(backend, f, data_clean, key_index):
+			return None
+
+	return entries_new, entries_old
+
+def _scan_buckets(
+	files,
+	predicate,
+	map_function,
+	reduce_function,
+	prefix,
+	backend=None,
+	overlays=None
+):
+	"""
+	Filters the entries of the json files 'files' stored by 'backend' (the
+	directory tree by default) by 'prefix' and 'predicate', maps them and
+	either returns the list of results or (True, partial aggregate) when
+	'reduce_function' is set ((False, None) without any result). 'overlays'
+	maps json files to pending writes (_DELETED for deletes). Runs inside of
+	a worker process.
+	"""
+
+	backend = backend if backend else FSHTBKVSDirectoryBackend()
+	overlays = overlays if overlays else {}
+
+	results   = []
+	found     = False
+	aggregate = None
+	for f in files:
+		try:
+			data = json.loads(backend.load(f).decode('UTF-8'))
+		except:
+			continue
+		for key, value in overlays.get(f, {}).items():
+			if value is _DELETED:
+				data.pop(key, None)
+			else:
+				data[key] = value
+
+		for key, value in data.items():
+			if prefix and not key.startswith(prefix):
+				continue
+			if predicate is not None and not predicate(key, value):
+				continue
+			result = (
+				(key, value) if map_function is None
+				else map_function(key, value)
+			)
+			if reduce_function is None:
+				results.append(result)
+			elif found:
+				aggregate = reduce_function(aggregate, result)
+			else:
+				found, aggregate = True, result
+
+	if reduce_function is None:
+		return results
+
+	return found, aggregate
+
+def _save_bucket_files(
+	backend,
+	path_to_file,
+	data_as_dict,
+	key_index=False,
+	durable=False,
+	sync=False
+):
+	"""
+	Writes the dict 'data_as_dict' to the json file 'path_to_file' of
+	'backend' and updates its checksum file and, if 'key_index' is True, its
+	key index file
+	"""
+
+	data, key_index_records = _encode_bucket(data_as_dict, key_index)
+
+	try:
+		backend.save(path_to_file, data, durable=durable, sync=sync)
+	except:
+		return False
+
+	checksum = {
+		'crc32':   zlib.crc32(data),
+		'size':    len(data),
+		'entries': len(data_as_dict)
+	}
+	try:
+		backend.save(
+			path_to_file[:-5] + '.sum',
+			json.dumps(checksum, ensure_ascii=False).encode('UTF-8')
+		)
+	except:
+		return False
+
+	if key_index_records is None:
+		return True
+
+	# the key index is only valid for this version of the json file
+	stamp = json.dumps(backend.stamp(path_to_file)).encode('UTF-8')
+	try:
+		backend.save(
+			path_to_file[:-5] + '.idx',
+			_KEY_INDEX_HEADER.pack(_KEY_INDEX_MAGIC, len(stamp))
+			+ stamp
+			+ key_index_records
+		)
+	except:
+		return False
+
+	return True
+
+def _validate_key(key):
+	"""
+	Validates, if the key 'key' can be used for the kvs
+	"""
+
+	if not isinstance(key, str):
+		raise ValueError("key must be of type <class 'str'>")
+	if key == '':
+		raise ValueError("key must not be empty")
+	if len(key) > 64:
+		raise ValueError("key max length is 64 characters")
+
+def _validate_value(value):
+	"""
+	Validates, if the value 'value' can be used for the kvs
+	"""
+
+	if isinstance(value, list):
+		for v in value:
+			_validate_value(v)
+		return
+
+	if isinstance(value, dict):
+		for k, v in value.items():
+			_validate_key(k)
+			_validate_value(v)
+		return
+
+	if not isinstance(value, (str, int, float, bool)):
+		raise ValueError(
+			"value must be of type"
+			+ " <class 'str'>, <class 'int'>, <class 'float'>"
+			+ " or <class 'bool'>"
+		)
+
+def _verify_buckets(files, backend=None):
+	"""
+	Verifies the json files 'files' stored by 'backend' (the directory tree
+	by default) against their checksum files and returns a list of (file,
+	state) tuples. Runs inside of a worker process.
+	"""
+
+	backend = backend if backend else FSHTBKVSDirectoryBackend()
+
+	results = []
+	for f in files:
+		if not backend.exists(f):
+			results.append((f, 'missing'))
+			continue
+		try:
+			data = backend.load(f)
+		except:
+			results.append((f, 'corrupt'))
+			continue
+		try:
+			checksum = json.loads(
+				backend.load(f[:-5] + '.sum').decode('UTF-8')
+			)
+		except:
+			# no (readable) checksum, at least check if the json is parsable
+			try:
+				json.loads(data.decode('UTF-8'))
+				results.append((f, 'unverified'))
+			except:
+				results.append((f, 'corrupt'))
+			continue
+		if (
+			checksum.get('size') != len(data)
+			or checksum.get('crc32') != zlib.crc32(data)
+		):
+			results.append((f, 'corrupt'))
+			continue
+		results.append((f, 'ok'))
+
+	return results
+
 class FSHTBKVS:
 	"""
 	Filesystem Hash Table Based Key Value Store (FSHTBKVS)
@@ -20,23 +595,128 @@ class FSHTBKVS:
 	6: 16^6 = 16.777.216
 	7: 16^7 = 268.435.456
 	"""
-	def __init__(self, root_dir, kvs_name, max_depth=4):
+	def __init__(
+		self,
+		root_dir,
+		kvs_name,
+		max_depth=4,
+		wal=False,
+		durability='batched',
+		wal_batch_size=64,
+		wal_checkpoint_ops=1024,
+		cache_entries=0,
+		cache_bytes=64 * 1000 * 1000,
+		cache_negative=True,
+		roots=None,
+		change_feed=False,
+		change_segment_size=10000,
+		change_retention=None,
+		read_only=False,
+		backend='directory',
+		key_index=False,
+		schema=None,
+		ttl_window=60
+	):
 		self.__root_dir  = os.path.normpath(root_dir)
 		if not os.path.exists(root_dir):
 			raise ValueError("root_dir '" + root_dir + "' does not exist")
+		if read_only and wal:
+			raise ValueError("wal can not be used with read_only")
+		if backend not in ('directory', 'packed'):
+			raise ValueError("backend must be 'directory' or 'packed'")
+		if backend == 'packed' and roots:
+			raise ValueError("roots can not be used with the packed backend")
 
 		self.__kvs_name   = kvs_name
 		self.__root_dir   = os.path.join(self.__root_dir, self.__kvs_name)
 		self.__meta_file  = os.path.join(self.__root_dir, 'meta.json')
+		self.__verify_file = os.path.join(self.__root_dir, 'verify.json')
+		self.__journal_file = os.path.join(self.__root_dir, 'dirty.journal')
+		# buckets recorded in the current dirty journal (inode, size, ids)
+		self.__journal_state = (None, 0, set())
+		self.__checkpoint_file = os.path.join(
+			self.__root_dir,
+			'maintenance.json'
+		)
 		self.__max_depth  = max_depth if max_depth in range(1, 7) else 4
+		self.__read_only  = read_only
+		self.__key_index  = key_index
+		self.__schema     = None
+		self.__schema_validator = None
+		self.__roots      = self.__build_roots(roots)
+		self.__roots_requested = self.__roots
+		self.__meta_stamp = None
+		self.__backend    = None
 		self.__entries    = 0
 		self.__all_file_paths   = []
 		self.__all_folder_paths = []
+		self.__lock             = threading.RLock()
+		self.__foreground_ops   = 0
+		self.__mutations        = 0
+		self.__scheduler        = None
+		self.__scheduler_stop   = threading.Event()
+		self.__scheduler_status = {'running': False}
+		self.__wal_file         = os.path.join(self.__root_dir, 'wal.log')
+		self.__batch_file       = os.path.join(self.__root_dir, 'batch.json')
+		self.__lock_file        = os.path.join(self.__root_dir, 'kvs.lock')
+		self.__index_dir        = os.path.join(self.__root_dir, 'indexes')
+		self.__index_file       = os.path.join(self.__index_dir, 'indexes.json')
+		self.__lock_fd          = None
+		self.__lock_depth       = 0
+		self.__wal              = None
+		self.__wal_locked       = None
+		self.__wal_pending      = {}
+		self.__wal_pending_ops  = 0
+		self.__wal_seq          = 0
+		self.__wal_synced       = 0
+		self.__wal_syncing      = False
+		self.__wal_sync_cond    = threading.Condition()
+
+		if durability not in ('none', 'batched', 'per-op'):
+			raise ValueError(
+				"durability must be 'none', 'batched' or 'per-op'"
+			)
+		self.__durability         = durability
+		self.__wal_batch_size     = max(1, wal_batch_size)
+		self.__wal_checkpoint_ops = max(1, wal_checkpoint_ops)
+
+		# read-through cache: key -> (file stamp, encoded value or None)
+		self.__cache          = OrderedDict() if cache_entries > 0 else None
+		self.__cache_files    = {}
+		self.__cache_entries  = cache_entries
+		self.__cache_bytes    = cache_bytes
+		self.__cache_negative = cache_negative
+		self.__cache_size     = 0
+		self.__cache_hits     = 0
+		self.__cache_misses   = 0
+
+		# change feed: segment files named by their first sequence number
+		self.__changes_dir          = os.path.join(self.__root_dir, 'changes')
+		self.__changes_seq          = 0
+		self.__changes_segment      = None
+		self.__changes_segment_size = 0
+		self.__changes_size         = 0
+		self.__changes_cond         = threading.Condition()
+		self.__change_segment_size  = max(1, change_segment_size)
+		self.__change_retention     = change_retention
+
+		# expiry index: one log of (key, expiry) lines per time window
+		self.__expiry_dir  = os.path.join(self.__root_dir, 'expiry')
+		self.__ttl_window  = max(1, int(ttl_window))
 
 		if not os.path.exists(self.__root_dir):
+			if read_only:
+				raise ValueError(
+					"kvs '" + self.__root_dir + "' does not exist"
+				)
 			os.makedirs(self.__root_dir)
+			self.__open_backend(backend)
 			self.__create_meta_file()
 			self.__build_all_paths()
+		else:
+			# the meta file knows the roots of an existing kvs
+			self.__roots = self.__build_roots(None)
+			self.__open_backend(None)
 
 		if self.__load_meta_file() is False:
 			raise OSError(
@@ -44,316 +724,2679 @@ class FSHTBKVS:
 				+ str(self.__meta_file)
 			)
 
-	def delete(self, key):
+		# once enabled, the key index is maintained by every instance
+		if key_index and not read_only:
+			self.__create_meta_file()
+
+		if schema is not None:
+			self.__set_schema(schema)
+			if not read_only:
+				self.__create_meta_file()
+
+		# index definitions get reloaded, when another instance changed them
+		self.__indexes       = {}
+		self.__indexes_stamp = None
+		self.__load_index_definitions()
+
+		# once enabled, the change feed is recorded by every instance
+		if change_feed and not read_only:
+			os.makedirs(self.__changes_dir, exist_ok=True)
+		self.__change_feed = os.path.exists(self.__changes_dir)
+		if self.__change_feed:
+			self.__load_changes_state()
+
+		# expiries are tracked, once the first ttl got set
+		self.__ttl = os.path.exists(self.__expiry_dir)
+
+		# restore a crashed batch
+		if os.path.exists(self.__batch_file):
+			self.__replay_batch()
+
+		# the write-ahead log stays locked while its instance is alive, so
+		# only the log of a crashed instance gets replayed
+		if wal:
+			# no other instance may write, while the log is in use
+			with self.__mutation_lock():
+				self.__wal = self.__open_locked_wal('ab')
+			if self.__wal is None:
+				raise OSError(
+					"write-ahead log is used by another instance: "
+					+ str(self.__wal_file)
+				)
+			if os.path.getsize(self.__wal_file) > 0:
+				self.__replay_wal()
+		elif read_only:
+			if os.path.exists(self.__wal_file):
+				self.__replay_wal()
+		else:
+			self.__wal_locked = self.__open_locked_wal('rb')
+			if self.__wal_locked is not None:
+				try:
+					self.__replay_wal()
+				finally:
+					self.__wal_locked.close()
+					self.__wal_locked = None
+
+	def batch(self):
 		"""
-		Deletes an entry with the key 'key' from the kvs
+		Returns a context manager, which stages writes and deletes and applies
+		them all-or-nothing, grouped by .json file, when the with block is left
+		without an exception
 		"""
 
-		self.__validate_key(key)
+		self.__check_writable()
 
-		key  = self.__process_key(key)
-		file = self.__get_file_by_key(key)
+		return FSHTBKVSBatch(self.__stage_batch_op, self.__commit_batch)
 
-		data = self.__load_dict_from_json_file(file)
+	def analyze_kvs(
+		self,
+		sample=None,
+		workers=None,
+		top=16,
+		target_bucket_bytes=64 * 1000
+	):
+		"""
+		Analyzes the occupancy of the json files and projects it to every
+		depth. If 'sample' is set, only that many randomly chosen json files
+		get analyzed and the numbers get extrapolated. Returns a report with
+		histograms of the entries and bytes per json file (keyed by the lower
+		bound of power of two bins), the 'top' hot json files (more than four
+		times the mean number of entries or bytes), the ratio of hashed and
+		passed through keys, the expected file sizes, counts and read latency
+		per depth and the lowest depth, whose json files read by an average
+		lookup stay below 'target_bucket_bytes'.
+		"""
 
-		if not key in data:
-			return 1
+		with self.__lock:
+			self.__load_roots()
+			self.__checkpoint_wal()
 
-		del data[key]
-		data_written 	= self.__save_dict_to_json_file(file, data)
-		if not data_written:
-			return -1
+		if self.__all_file_paths == []:
+			self.__build_all_file_paths()
 
-		self.__entries -= 1
-		self.__create_meta_file()
+		files = self.__all_file_paths
+		if sample is not None and sample < len(files):
+			files = sorted(random.sample(files, max(1, sample)))
+
+		# split the files into chunks and analyze them in parallel (the packed
+		# backend is read by this process only)
+		workers = workers if workers else 1
+		chunk_size = max(1, -(-len(files) // (workers * 4)))
+		chunks = [
+			files[i:i + chunk_size] for i in range(0, len(files), chunk_size)
+		]
+		if workers > 1 and len(chunks) > 1 and isinstance(
+			self.__backend,
+			FSHTBKVSDirectoryBackend
+		):
+			with ProcessPoolExecutor(max_workers=workers) as executor:
+				results = list(executor.map(
+					_analyze_buckets,
+					chunks,
+					[self.__max_depth] * len(chunks)
+				))
+		else:
+			results = [
+				_analyze_buckets(chunk, self.__max_depth, self.__backend)
+				for chunk in chunks
+			]
+
+		buckets      = []
+		depths       = {depth: {} for depth in range(1, 7)}
+		hashed       = 0
+		pass_through = 0
+		load_time    = 0.0
+		parse_time   = 0.0
+		parse_bytes  = 0
+		for result in results:
+			buckets.extend(result['buckets'])
+			for depth, depth_buckets in result['depths'].items():
+				for bucket, counts in depth_buckets.items():
+					if not bucket in depths[depth]:
+						depths[depth][bucket] = [0, 0]
+					depths[depth][bucket][0] += counts[0]
+					depths[depth][bucket][1] += counts[1]
+			hashed       += result['hashed']
+			pass_through += result['pass_through']
+			load_time    += result['load_time']
+			parse_time   += result['parse_time']
+			parse_bytes  += result['parse_bytes']
+
+		def histogram(values):
+			bins = {}
+			for value in values:
+				lower = 0 if value == 0 else 2 ** (value.bit_length() - 1)
+				bins[lower] = bins.get(lower, 0) + 1
+			return dict(sorted(bins.items()))
+
+		scale         = len(self.__all_file_paths) / max(1, len(files))
+		entries       = sum([b[1] for b in buckets])
+		size          = sum([b[2] for b in buckets])
+		entries_mean  = entries / max(1, len(buckets))
+		size_mean     = size / max(1, len(buckets))
+
+		hot_buckets = [
+			{
+				'bucket':  self.__get_bucket_id(f),
+				'entries': bucket_entries,
+				'bytes':   bucket_size
+			}
+			for f, bucket_entries, bucket_size in buckets
+			if bucket_entries > 4 * entries_mean or bucket_size > 4 * size_mean
+		]
+		hot_buckets = sorted(
+			hot_buckets,
+			key=lambda b: (-b['bytes'], b['bucket'])
+		)[:top]
+
+		# latency model: fixed costs per json file plus parsing per byte
+		time_per_file = load_time / max(1, len(buckets))
+		time_per_byte = parse_time / max(1, parse_bytes)
+
+		projections = {}
+		recommended = None
+		for depth, depth_buckets in depths.items():
+			counts = list(depth_buckets.values())
+			# buckets above the current depth were sampled partially
+			scale_max = scale if depth < self.__max_depth else 1
+			entries_depth = sum([c[0] for c in counts])
+			# the size of the json file an average lookup has to read
+			bytes_read = sum([c[0] * c[1] for c in counts]) / max(
+				1,
+				entries_depth
+			)
+			projections[depth] = {
+				'files':        16 ** depth,
+				'entries_mean': round(entries_depth * scale / 16 ** depth, 3),
+				'entries_max':  round(
+					max([c[0] for c in counts] or [0]) * scale_max
+				),
+				'bytes_mean':   round(
+					sum([c[1] for c in counts]) * scale / 16 ** depth
+				),
+				'bytes_max':    round(
+					max([c[1] for c in counts] or [0]) * scale_max
+				),
+				'bytes_read':   round(bytes_read * scale_max),
+				'latency_ms':   round(
+					(time_per_file + bytes_read * scale_max * time_per_byte)
+					* 1000,
+					6
+				)
+			}
+			if recommended is None and (
+				bytes_read * scale_max <= target_bucket_bytes
+			):
+				recommended = depth
+
+		return {
+			'buckets':               len(self.__all_file_paths),
+			'analyzed':              len(buckets),
+			'entries':               round(entries * scale),
+			'bytes':                 round(size * scale),
+			'entries_histogram':     histogram([b[1] for b in buckets]),
+			'bytes_histogram':       histogram([b[2] for b in buckets]),
+			'hot_buckets':           hot_buckets,
+			'keys': {
+				'hashed':             hashed,
+				'pass_through':       pass_through,
+				'pass_through_ratio': round(
+					pass_through / max(1, hashed + pass_through),
+					6
+				)
+			},
+			'depths':                projections,
+			'recommended_max_depth': recommended if recommended else 6
+		}
+
+	def append(self, key, items):
+		"""
+		Appends the list 'items' to the list stored under the key 'key' (a
+		missing entry counts as empty list) and returns the new list
+		"""
+
+		if not isinstance(items, list):
+			raise ValueError("items must be of type <class 'list'>")
+
+		def mutation(key_existed, value):
+			if key_existed and not isinstance(value, list):
+				raise ValueError("value of key is not of type <class 'list'>")
+			return True, (value if key_existed else []) + items, None
+
+		return self.__mutate(key, mutation)
+
+	def changes(self, since=0, wait=False, timeout=None):
+		"""
+		Yields all recorded changes ({'seq': ..., 'op': 'put'|'delete'|'wipe',
+		'key': ...}) with a sequence number greater than 'since'. If 'wait' is True,
+		it blocks for new changes until 'timeout' seconds passed without any
+		(forever, if 'timeout' is None).
+		"""
+
+		if not os.path.exists(self.__changes_dir):
+			raise ValueError("the change feed is not enabled")
+
+		segment  = None
+		offset   = 0
+		last_seq = since
+		idle_since = time.time()
+
+		while True:
+			segments = self.__get_change_segments()
+
+			# continue in the current segment or start at the first relevant
+			if segment is None or not segment in segments:
+				segment, offset = None, 0
+				for i, start in enumerate(segments):
+					if i + 1 == len(segments) or segments[i + 1] > last_seq + 1:
+						segment = start
+						break
+
+			found = False
+			while segment is not None:
+				try:
+					with open(self.__get_change_segment_file(segment), 'rb') as f:
+						f.seek(offset)
+						for line in f:
+							# stop at a torn, not yet completely written line
+							if not line.endswith(b'\n'):
+								break
+							offset += len(line)
+							change = json.loads(line.decode('UTF-8'))
+							if change['seq'] > last_seq:
+								last_seq = change['seq']
+								found    = True
+								yield change
+						f.close()
+				except FileNotFoundError:
+					# truncated while reading
+					pass
+
+				next_segments = [s for s in segments if s > segment]
+				if next_segments == []:
+					break
+				segment, offset = next_segments[0], 0
+
+			if not wait:
+				return
+
+			if found:
+				idle_since = time.time()
+			elif timeout is not None and time.time() - idle_since >= timeout:
+				return
+
+			# local writers notify, other processes are polled
+			with self.__changes_cond:
+				if self.__changes_seq <= last_seq:
+					self.__changes_cond.wait(0.1)
+
+	def checkpoint(self):
+		"""
+		Applies all pending write-ahead log records to the .json files and
+		truncates the write-ahead log
+		"""
+
+		self.__check_writable()
+
+		with self.__lock:
+			return self.__checkpoint_wal()
+
+	def clear_cache(self):
+		"""
+		Drops all entries of the read-through cache
+		"""
+
+		with self.__lock:
+			if self.__cache is not None:
+				self.__cache.clear()
+			self.__cache_files = {}
+			self.__cache_size  = 0
 
 		return 1
 
-	def export_kvs(self, file=''):
+	def close(self):
 		"""
-		Exports whole kvs data as importable .fshtbkvs file
+		Stops the scheduler, checkpoints and closes the write-ahead log
 		"""
 
-		if file == '':
-			file = os.path.join(
-				os.path.dirname(self.__root_dir),
-				self.__kvs_name + '.fshtbkvs'
-			)
+		self.stop_scheduler()
 
-		# build all file paths
-		if self.__all_file_paths == []:
-			self.__build_all_file_paths()
+		with self.__lock:
+			if self.__wal is not None:
+				if self.__checkpoint_wal() != 1:
+					return -1
+				# remove the log before its lock gets released
+				if os.path.exists(self.__wal_file):
+					os.remove(self.__wal_file)
+				self.__wal.close()
+				self.__wal = None
 
-		# write all key value pairs to export file
-		try:
-			with open(file, 'w') as f_export:
-				for f in self.__all_file_paths:
-					data = self.__load_dict_from_json_file(f)
-					for key, value in data.items():
-						f_export.write(
-							json.dumps(
-								{key: value},
-								ensure_ascii=False
-							)
-							+ '\n'
-						)
-				f_export.close()
-		except:
-			raise OSError(
-				"Not able to write kvs export to file: "
-				+ str(file)
-			)
+			self.__backend.close()
 
 		return 1
 
-	def get_entries(self):
-		return self.__entries
+	def compare_and_swap(self, key, expected, new):
+		"""
+		Replaces the value of the key 'key' with 'new', if its current value
+		equals 'expected' ('None' for a missing entry). Returns True, if the
+		value got replaced.
+		"""
 
-	def get_kvs_name(self):
-		return self.__kvs_name
+		def mutation(key_existed, value):
+			if (value if key_existed else None) != expected:
+				return False, None, False
+			return True, new, True
 
-	def get_max_depth(self):
-		return self.__max_depth
+		return self.__mutate(key, mutation)
 
-	def get_size_of_kvs(self):
+	def create_index(self, field, workers=None):
 		"""
-		Returns the size of all json files used for storing data in megabytes
+		Creates a secondary index on the field 'field' (e.g. 'user.id') of dict
+		values and builds it from all existing entries
 		"""
 
-		kvs_size_in_megabytes = 0.0
+		self.__check_writable()
 
-		if self.__all_file_paths == []:
-			self.__build_all_file_paths()
+		if not isinstance(field, str) or field == '':
+			raise ValueError("field must be a non-empty <class 'str'>")
 
-		for f in self.__all_file_paths:
-			if not os.path.exists(f):
-				self.maintain_kvs()
-			kvs_size_in_megabytes += (
-				os.path.getsize(f) / 1000 / 1000
-			)
+		with self.__mutation_lock():
+			self.__load_index_definitions()
+			if not field in self.__indexes:
+				self.__indexes[field] = self.__str_to_sha256sum(field)[:16]
+				if not self.__save_index_definitions():
+					del self.__indexes[field]
+					raise OSError(
+						"Not able to write index file: "
+						+ str(self.__index_file)
+					)
 
-		return round(kvs_size_in_megabytes, 6)
+		return self.rebuild_index(field, workers)
 
-	def import_kvs(self, file=''):
+	def delete(self, key):
 		"""
-		Imports .fshtbkvs file into the kvs
+		Deletes an entry with the key 'key' from the kvs
 		"""
 
-		if file == '':
-			raise ValueError("file must not be empty")
-		if not os.path.exists(file):
-			raise ValueError("file does not exist")
+		self.__check_writable()
 
-		# get all key value pairs line by line and add it to the kvs
-		with open(file, 'r') as f:
-			while True:
-				line = f.readline()
-				if not line:
-					break
-				if line.strip() == '':
-					continue
-				try:
-					for key, value in json.loads(line.strip()).items():
-						self.write(key, value)
-				except:
-					continue
+		with self.__mutation_lock():
+			self.__foreground_ops += 1
+
+			_validate_key(key)
+
+			key  = self.__process_key(key)
+			file = self.__get_file_by_key(key)
+
+			if self.__wal is not None:
+				value_old = self.__lookup(file, key)
+				if value_old is _MISSING:
+					return 1
+				self.__entries   -= 1
+				self.__mutations += 1
+				seq = self.__append_to_wal([['delete', key]])
+				self.__record_mutations([(key, value_old, _MISSING)])
+				self.__set_expiries({key: None})
+			else:
+				data = self.__load_dict_from_json_file(file)
+
+				if not key in data:
+					return 1
+
+				value_old = data.pop(key)
+				data_written 	= self.__save_bucket(file, data)
+				if not data_written:
+					return -1
+
+				self.__entries   -= 1
+				self.__mutations += 1
+				self.__create_meta_file()
+				self.__record_mutations([(key, value_old, _MISSING)])
+				self.__set_expiries({key: None})
+
+				return 1
+
+		self.__sync_wal(seq)
 
 		return 1
 
-	def maintain_kvs(self):
+	def drop_index(self, field):
 		"""
-		Rebuilds broken .json files and, creates missing files and folders
-		and creates an updated meta file
+		Drops the secondary index on the field 'field'
 		"""
 
-		# build all paths
-		self.__build_all_paths()
+		self.__check_writable()
 
-		# cleanup all json files
-		self.__entries = 0
-		for f in self.__all_file_paths:
-			data 		= self.__load_dict_from_json_file(f)
-			data_clean 	= {}
+		with self.__mutation_lock():
+			self.__load_index_definitions()
+			if not field in self.__indexes:
+				return 1
+			index_dir = os.path.join(self.__index_dir, self.__indexes[field])
+			del self.__indexes[field]
+			if not self.__save_index_definitions():
+				return -1
+			shutil.rmtree(index_dir, ignore_errors=True)
+
+		return 1
+
+	def expire_kvs(self, now=None):
+		"""
+		Deletes every entry, whose ttl ran out until 'now' (default: the
+		current time), and returns the number of deleted entries. Only the due
+		windows of the expiry index get read.
+		"""
+
+		self.__check_writable()
 
-			for key, value in data.items():
+		if now is None:
+			now = time.time()
+
+		with self.__mutation_lock():
+			if not self.__has_expiries():
+				return 0
+
+			try:
+				names = os.listdir(self.__expiry_dir)
+			except FileNotFoundError:
+				return 0
+
+			windows = []
+			for name in names:
+				if name.endswith('.log') and name[:-4].isdigit():
+					windows.append(int(name[:-4]))
+
+			candidates = {}
+			remaining  = {}
+			for window in sorted(windows):
+				if window > now:
+					break
+
+				path_to_file = os.path.join(
+					self.__expiry_dir,
+					str(window) + '.log'
+				)
+				remaining[path_to_file] = []
 				try:
-					self.__validate_key(key)
-					self.__validate_value(value)
-					data_clean[key] = value
+					with open(path_to_file, 'r', encoding='UTF-8') as f:
+						lines = f.read().splitlines()
+						f.close()
 				except:
 					continue
+				for line in lines:
+					try:
+						key, expires = json.loads(line)
+					except:
+						continue
+					if expires <= now:
+						candidates[key] = expires
+					else:
+						remaining[path_to_file].append(line)
+
+			# only delete keys, whose ttl did not get changed meanwhile
+			ttls_by_file = {}
+			ops          = []
+			for key, expires in candidates.items():
+				file = self.__get_file_by_key(key)
+				if not file in ttls_by_file:
+					ttls_by_file[file] = self.__read_bucket_file(
+						self.__get_ttl_file(file)
+					)
+				if ttls_by_file[file].get(key) == expires:
+					ops.append(['delete', key])
 
-			data_written = self.__save_dict_to_json_file(f, data_clean)
-			if not data_written:
+			# syncing the write-ahead log waits for other writers, which
+			# need the lock
+			if self.__commit_batch(ops, sync=False) != 1:
 				return -1
+			seq = self.__wal_seq
 
-			self.__entries += len(data_clean)
+			for path_to_file, lines in remaining.items():
+				if lines == []:
+					if os.path.exists(path_to_file):
+						os.remove(path_to_file)
+					continue
+				with open(path_to_file, 'w', encoding='UTF-8') as f:
+					f.write('\n'.join(lines) + '\n')
+					f.close()
 
-		self.__create_meta_file()
+		if self.__wal is not None and ops != []:
+			self.__sync_wal(seq)
 
-		return 1
+		return len(ops)
 
-	def read(self, key):
+	def export_kvs(self, file=''):
 		"""
-		Returns the entry with the key 'key' from the kvs or 'None', if no entry
-		exists
+		Exports whole kvs data as importable .fshtbkvs file
 		"""
 
-		self.__validate_key(key)
+		with self.__lock:
+			self.__load_roots()
+			if file == '':
+				file = os.path.join(
+					os.path.dirname(self.__root_dir),
+					self.__kvs_name + '.fshtbkvs'
+				)
 
-		key  = self.__process_key(key)
-		file = self.__get_file_by_key(key)
+			self.__checkpoint_wal()
+
+			# write all key value pairs to export file
+			try:
+				with open(file, 'w') as f_export:
+					for _, data in self.__load_all_buckets():
+						for key, value in data.items():
+							f_export.write(
+								json.dumps(
+									{key: value},
+									ensure_ascii=False
+								)
+								+ '\n'
+							)
+					f_export.close()
+			except:
+				raise OSError(
+					"Not able to write kvs export to file: "
+					+ str(file)
+				)
 
-		data = self.__load_dict_from_json_file(file)
+			return 1
 
-		if not key in data:
-			return None
+	def find(self, field, value):
+		"""
+		Returns the (processed) keys of all entries, whose field 'field' equals
+		'value', by using the secondary index on 'field'
+		"""
 
-		value = data[key]
-		self.__validate_value(value)
+		with self.__lock:
+			self.__foreground_ops += 1
 
-		return value
+			self.__load_index_definitions()
+			if not field in self.__indexes:
+				raise ValueError("no index on field '" + str(field) + "'")
 
-	def wipe_kvs(self):
+			value_encoded = _encode_index_value(value)
+			index_bucket  = self.__read_json_file(
+				self.__get_index_file(field, value_encoded)
+			)
+
+			return sorted(index_bucket.get(value_encoded, []))
+
+	def get_cache_stats(self):
+		"""
+		Returns the number of entries, the size in bytes, hits and misses of the
+		read-through cache
+		"""
+
+		return {
+			'entries': len(self.__cache) if self.__cache is not None else 0,
+			'bytes':   self.__cache_size,
+			'hits':    self.__cache_hits,
+			'misses':  self.__cache_misses
+		}
+
+	def get_indexes(self):
+		"""
+		Returns all fields with a secondary index
+		"""
+
+		with self.__lock:
+			self.__load_index_definitions()
+
+			return sorted(self.__indexes)
+
+	def get_change_seq(self):
+		"""
+		Returns the sequence number of the last recorded change
+		"""
+
+		with self.__mutation_lock():
+			if os.path.exists(self.__changes_dir):
+				self.__load_changes_state()
+
+			return self.__changes_seq
+
+	def get_entries(self):
+		return self.__entries
+
+	def get_roots(self):
+		"""
+		Returns the directory of every top-level hex character
+		"""
+
+		with self.__lock:
+			self.__load_roots()
+
+			return dict(self.__roots)
+
+	def get_kvs_name(self):
+		return self.__kvs_name
+
+	def get_max_depth(self):
+		return self.__max_depth
+
+	def get_schema(self):
+		return self.__schema
+
+	def get_scheduler_status(self):
+		"""
+		Returns the status of the background maintenance scheduler
+		"""
+
+		return dict(self.__scheduler_status)
+
+	def get_size_of_kvs(self):
+		"""
+		Returns the size of all json files used for storing data in megabytes
+		"""
+
+		with self.__lock:
+			self.__load_roots()
+			self.__checkpoint_wal()
+
+			kvs_size_in_megabytes = 0.0
+
+			if self.__all_file_paths == []:
+				self.__build_all_file_paths()
+
+			for f in self.__all_file_paths:
+				if not self.__backend.exists(f):
+					if self.__read_only:
+						raise OSError("json file is missing: " + str(f))
+					self.maintain_kvs()
+				kvs_size_in_megabytes += (
+					self.__backend.size(f) / 1000 / 1000
+				)
+
+			return round(kvs_size_in_megabytes, 6)
+
+	def import_kvs(self, file=''):
+		"""
+		Imports .fshtbkvs file into the kvs
+		"""
+
+		self.__check_writable()
+
+		if file == '':
+			raise ValueError("file must not be empty")
+		if not os.path.exists(file):
+			raise ValueError("file does not exist")
+
+		# get all key value pairs line by line and add it to the kvs
+		with open(file, 'r') as f:
+			while True:
+				line = f.readline()
+				if not line:
+					break
+				if line.strip() == '':
+					continue
+				try:
+					for key, value in json.loads(line.strip()).items():
+						self.write(key, value)
+				except:
+					continue
+
+		return 1
+
+	def incr(self, key, delta=1):
+		"""
+		Increments the number stored under the key 'key' by 'delta' (a missing
+		entry counts as 0) and returns the new number
+		"""
+
+		if isinstance(delta, bool) or not isinstance(delta, (int, float)):
+			raise ValueError(
+				"delta must be of type <class 'int'> or <class 'float'>"
+			)
+
+		def mutation(key_existed, value):
+			if key_existed and (
+				isinstance(value, bool) or not isinstance(value, (int, float))
+			):
+				raise ValueError(
+					"value of key is not of type <class 'int'> or"
+					+ " <class 'float'>"
+				)
+			return True, (value if key_existed else 0) + delta, None
+
+		return self.__mutate(key, mutation)
+
+	def maintain_kvs(self, incremental=False, chunk_size=None, workers=None):
+		"""
+		Rebuilds broken .json files and, creates missing files and folders
+		and creates an updated meta file.
+
+		If 'incremental' is True, only the .json files recorded in the dirty
+		journal since the last maintenance get processed. If 'chunk_size' is
+		set, a full maintenance processes at most 'chunk_size' files per call
+		and continues at the stored checkpoint with the next call. Returns 1
+		when the maintenance is complete, 0 when chunks are left and -1 on
+		failure.
+		"""
+
+		self.__check_writable()
+
+		with self.__mutation_lock():
+			self.__checkpoint_wal()
+
+			if incremental:
+				return self.__maintain_kvs_incremental(workers)
+
+			# continue at the checkpoint of a chunked maintenance
+			if self.__all_file_paths == []:
+				self.__build_all_file_paths()
+			checkpoint = self.__read_json_file(self.__checkpoint_file)
+			cursor     = checkpoint.get('cursor', 0)
+			if not isinstance(cursor, int):
+				cursor = 0
+			if chunk_size is None or cursor >= len(self.__all_file_paths):
+				cursor = 0
+			cursor_start = cursor
+
+			# build all paths
+			if cursor == 0:
+				self.__build_all_paths()
+
+			# cleanup all json files
+			cursor_end = len(self.__all_file_paths)
+			if chunk_size is not None:
+				cursor_end = min(cursor + max(1, chunk_size), cursor_end)
+
+			counts = self.__maintain_files(
+				self.__all_file_paths[cursor:cursor_end],
+				workers
+			)
+			if counts is None:
+				return -1
+
+			if cursor_end < len(self.__all_file_paths):
+				self.__save_dict_to_json_file(
+					self.__checkpoint_file,
+					{'cursor': cursor_end}
+				)
+				return 0
+
+			if os.path.exists(self.__checkpoint_file):
+				os.remove(self.__checkpoint_file)
+
+			# writes between the chunks of a pass are only counted by the
+			# checksum files of the json files
+			entries = counts[0]
+			if cursor_start > 0:
+				entries = 0
+				for f in self.__all_file_paths:
+					entries += self.__read_bucket_file(
+						self.__get_checksum_file(f)
+					).get('entries', 0)
+
+			self.__entries = entries
+			self.__create_meta_file()
+
+			return 1
+
+	def rebalance_kvs(self, roots):
+		"""
+		Moves top-level subtrees between root directories. 'roots' is either a
+		list of root directories (striped round robin) or a dict, which maps
+		top-level hex characters to root directories.
+		"""
+
+		self.__check_writable()
+
+		if isinstance(self.__backend, FSHTBKVSPackedBackend):
+			raise ValueError("roots can not be used with the packed backend")
+
+		with self.__mutation_lock():
+			self.__checkpoint_wal()
+
+			if isinstance(roots, dict):
+				roots_new = dict(self.__roots)
+				for c, root in roots.items():
+					if not c in roots_new:
+						raise ValueError(
+							"'" + str(c) + "' is no top-level hex character"
+						)
+					if not os.path.exists(root):
+						raise ValueError(
+							"root '" + str(root) + "' does not exist"
+						)
+					roots_new[c] = os.path.join(
+						os.path.normpath(root),
+						self.__kvs_name
+					)
+			else:
+				roots_new = self.__build_roots(roots)
+
+			for c in '0123456789abcdef':
+				root_old = self.__roots[c]
+				root_new = roots_new[c]
+				if root_old == root_new:
+					continue
+				os.makedirs(root_new, exist_ok=True)
+				# the subtree folder or, for max_depth 1, its files
+				if os.path.exists(root_old):
+					for name in sorted(os.listdir(root_old)):
+						if name == c or name.startswith(c + '.'):
+							shutil.move(
+								os.path.join(root_old, name),
+								os.path.join(root_new, name)
+							)
+				self.__roots[c] = root_new
+				if not self.__create_meta_file():
+					return -1
+
+			self.__all_file_paths   = []
+			self.__all_folder_paths = []
+			self.clear_cache()
+			self.__build_all_paths()
+
+		return 1
+
+	def read(self, key):
+		"""
+		Returns the entry with the key 'key' from the kvs or 'None', if no entry
+		exists
+		"""
+
+		with self.__lock:
+			self.__foreground_ops += 1
+			self.__load_roots()
+
+			_validate_key(key)
+
+			key  = self.__process_key(key)
+			file = self.__get_file_by_key(key)
+
+			# expired entries stay hidden until they get swept
+			if self.__has_expiries() and self.__is_expired(file, key):
+				return None
+
+			if key in self.__wal_pending.get(file, {}):
+				value = self.__wal_pending[file][key]
+				return None if value is _DELETED else value
+
+			# serve from the cache, if the json file did not change since
+			stamp = None
+			if self.__cache is not None:
+				stamp  = self.__get_file_stamp(file)
+				cached = self.__cache.get(key)
+				if cached is not None and cached[0] == stamp:
+					self.__cache.move_to_end(key)
+					self.__cache_hits += 1
+					return None if cached[1] is None else json.loads(cached[1])
+				self.__cache_misses += 1
+
+			# decode only the value, if the key index is up to date
+			entry = None
+			if self.__key_index:
+				entry = self.__read_by_key_index(file, key)
+			if entry is None:
+				data  = self.__load_dict_from_json_file(file)
+				entry = (key in data, data.get(key))
+
+			if not entry[0]:
+				if stamp is not None and self.__cache_negative:
+					self.__put_into_cache(key, file, stamp, None)
+				return None
+
+			# values written under a schema got validated already
+			value = entry[1]
+			if self.__schema_validator is None:
+				_validate_value(value)
+
+			if stamp is not None:
+				self.__put_into_cache(
+					key,
+					file,
+					stamp,
+					json.dumps(value, ensure_ascii=False)
+				)
+
+			return value
+
+	def rebuild_index(self, field=None, workers=None):
+		"""
+		Rebuilds the secondary index on the field 'field' (or all secondary
+		indexes) from all entries, split across 'workers' processes
+		"""
+
+		self.__check_writable()
+
+		with self.__mutation_lock():
+			self.__checkpoint_wal()
+			self.__load_index_definitions()
+
+			fields = list(self.__indexes) if field is None else [field]
+			for f in fields:
+				if not f in self.__indexes:
+					raise ValueError("no index on field '" + str(f) + "'")
+			if fields == []:
+				return 1
+
+			if self.__all_file_paths == []:
+				self.__build_all_file_paths()
+			files = self.__all_file_paths
+
+			# collect the index entries in parallel (the packed backend is
+			# read by this process only)
+			workers = workers if workers else 1
+			chunk_size = max(1, -(-len(files) // (workers * 4)))
+			chunks = [
+				files[i:i + chunk_size]
+				for i in range(0, len(files), chunk_size)
+			]
+			if workers > 1 and len(chunks) > 1 and isinstance(
+				self.__backend,
+				FSHTBKVSDirectoryBackend
+			):
+				with ProcessPoolExecutor(max_workers=workers) as executor:
+					results = list(executor.map(
+						_collect_index,
+						chunks,
+						[fields] * len(chunks)
+					))
+			else:
+				results = [
+					_collect_index(chunk, fields, self.__backend)
+					for chunk in chunks
+				]
+
+			# distribute the index entries into the index files
+			for f in fields:
+				index_files = {}
+				for result in results:
+					for value_encoded, keys in result[f].items():
+						index_file = self.__get_index_file(f, value_encoded)
+						if not index_file in index_files:
+							index_files[index_file] = {}
+						index_bucket = index_files[index_file]
+						if not value_encoded in index_bucket:
+							index_bucket[value_encoded] = []
+						index_bucket[value_encoded].extend(keys)
+
+				index_dir = os.path.join(self.__index_dir, self.__indexes[f])
+				shutil.rmtree(index_dir, ignore_errors=True)
+				for index_file, index_bucket in index_files.items():
+					os.makedirs(os.path.dirname(index_file), exist_ok=True)
+					if not self.__save_dict_to_json_file(
+						index_file,
+						index_bucket
+					):
+						return -1
+
+		return 1
+
+	def scan(
+		self,
+		predicate=None,
+		map=None,
+		reduce=None,
+		prefix=None,
+		workers=None
+	):
+		"""
+		Scans all entries (with processed keys starting with 'prefix') across
+		'workers' processes. Entries, for which predicate(key, value) is
+		True, get mapped by map(key, value) (default: (key, value)). Returns
+		the list of results or, if 'reduce' is set, the results folded by
+		reduce(a, b) (None without results). Functions passed to worker
+		processes must be picklable (e.g. module level functions).
+		"""
+
+		if prefix is not None:
+			if not isinstance(prefix, str):
+				raise ValueError("prefix must be of type <class 'str'>")
+			for c in prefix:
+				if c not in '0123456789abcdef':
+					raise ValueError("prefix must consist of hex characters")
+
+		with self.__lock:
+			self.__load_roots()
+			self.__checkpoint_wal()
+			# pending records of read-only instances get applied locally
+			overlays = {
+				f: dict(ops) for f, ops in self.__wal_pending.items()
+			}
+
+		if self.__all_file_paths == []:
+			self.__build_all_file_paths()
+
+		# only the subtree of the prefix has to be scanned
+		files = self.__all_file_paths
+		if prefix:
+			bucket_prefix = prefix[:self.__max_depth]
+			files = [
+				f for f in files
+				if self.__get_bucket_id(f).replace('/', '')[:-5].startswith(
+					bucket_prefix
+				)
+			]
+
+		# split the files into chunks and scan them in parallel (the packed
+		# backend is read by this process only)
+		workers = workers if workers else 1
+		files_local = [f for f in files if f in overlays]
+		files       = [f for f in files if not f in overlays]
+		chunk_size  = max(1, -(-len(files) // (workers * 4)))
+		chunks = [
+			files[i:i + chunk_size] for i in range(0, len(files), chunk_size)
+		]
+		if workers > 1 and len(chunks) > 1 and isinstance(
+			self.__backend,
+			FSHTBKVSDirectoryBackend
+		):
+			with ProcessPoolExecutor(max_workers=workers) as executor:
+				results = list(executor.map(
+					_scan_buckets,
+					chunks,
+					[predicate] * len(chunks),
+					[map] * len(chunks),
+					[reduce] * len(chunks),
+					[prefix] * len(chunks)
+				))
+		else:
+			results = [
+				_scan_buckets(
+					chunk,
+					predicate,
+					map,
+					reduce,
+					prefix,
+					self.__backend
+				)
+				for chunk in chunks
+			]
+		if files_local != []:
+			results.append(_scan_buckets(
+				files_local,
+				predicate,
+				map,
+				reduce,
+				prefix,
+				self.__backend,
+				overlays
+			))
+
+		if reduce is None:
+			return [result for chunk in results for result in chunk]
+
+		# merge the partial aggregates
+		found     = False
+		aggregate = None
+		for chunk_found, chunk_aggregate in results:
+			if not chunk_found:
+				continue
+			if found:
+				aggregate = reduce(aggregate, chunk_aggregate)
+			else:
+				found, aggregate = True, chunk_aggregate
+
+		return aggregate
+
+	def set_schema(self, schema):
+		"""
+		Sets the value schema 'schema' (see _compile_schema()), which all
+		written values have to match, or removes it, if None. Entries already
+		stored are not checked.
+		"""
+
+		self.__check_writable()
+
+		with self.__mutation_lock():
+			self.__set_schema(schema)
+			return self.__create_meta_file()
+
+	def setdefault(self, key, value):
+		"""
+		Adds an entry with the key 'key' and the value 'value', if the key does
+		not exist yet, and returns the stored value
+		"""
+
+		def mutation(key_existed, value_stored):
+			if key_existed:
+				return False, None, value_stored
+			return True, value, None
+
+		return self.__mutate(key, mutation)
+
+	def snapshot(self, file=''):
+		"""
+		Writes all entries into the immutable snapshot file 'file', which can
+		be memory-mapped by FSHTBKVSSnapshot, and returns the number of entries
+		"""
+
+		with self.__lock:
+			self.__load_roots()
+			if file == '':
+				file = os.path.join(
+					os.path.dirname(self.__root_dir),
+					self.__kvs_name + '.snapshot'
+				)
+
+			# pending write-ahead log records get applied on the fly
+			def items():
+				for f, data in self.__load_all_buckets():
+					for key, value in self.__wal_pending.get(f, {}).items():
+						if value is _DELETED:
+							data.pop(key, None)
+						else:
+							data[key] = value
+					yield from data.items()
+
+			return _write_snapshot(file, self.__max_depth, items())
+
+	def start_scheduler(
+		self,
+		tasks=('compact', 'maintain', 'verify', 'reconcile', 'expire'),
+		buckets_per_second=256,
+		bytes_per_second=None,
+		max_foreground_ops=None,
+		slice_size=16
+	):
+		"""
+		Starts the background maintenance scheduler. It works through all .json
+		files in slices of 'slice_size' files on a daemon thread, paced by
+		'buckets_per_second' and 'bytes_per_second', and pauses while more than
+		'max_foreground_ops' reads/writes/deletes per second happen.
+
+		Tasks:
+		compact:   maintains the .json files recorded in the dirty journal
+		maintain:  removes invalid entries and rebuilds broken .json files
+		verify:    checks the .json files against their checksums
+		reconcile: recounts the entries and corrects the meta file
+		expire:    deletes the entries, whose ttl ran out
+		"""
+
+		for task in tasks:
+			if task not in (
+				'compact',
+				'maintain',
+				'verify',
+				'reconcile',
+				'expire'
+			):
+				raise ValueError("unknown scheduler task '" + str(task) + "'")
+			if task != 'verify':
+				self.__check_writable()
+		if not buckets_per_second or buckets_per_second <= 0:
+			raise ValueError("buckets_per_second must be greater than 0")
+		if bytes_per_second is not None and bytes_per_second <= 0:
+			raise ValueError("bytes_per_second must be greater than 0")
+		if not isinstance(slice_size, int) or slice_size < 1:
+			raise ValueError("slice_size must be an int greater than 0")
+
+		if self.__scheduler is not None and self.__scheduler.is_alive():
+			return 1
+
+		self.__scheduler_stop.clear()
+		self.__scheduler_status = {
+			'running':            True,
+			'paused':             False,
+			'tasks':              list(tasks),
+			'cursor':             0,
+			'cycles':             0,
+			'buckets_processed':  0,
+			'bytes_processed':    0,
+			'corrupt':            [],
+			'missing':            [],
+			'last_error':         None
+		}
+		self.__scheduler = threading.Thread(
+			target=self.__run_scheduler,
+			args=(
+				tuple(tasks),
+				buckets_per_second,
+				bytes_per_second,
+				max_foreground_ops,
+				slice_size
+			),
+			name='fshtbkvs-scheduler-' + self.__kvs_name,
+			daemon=True
+		)
+		self.__scheduler.start()
+
+		return 1
+
+	def stop_scheduler(self, timeout=None):
+		"""
+		Stops the background maintenance scheduler after its current slice
+		"""
+
+		if self.__scheduler is None:
+			return 1
+
+		self.__scheduler_stop.set()
+		self.__scheduler.join(timeout)
+		if self.__scheduler.is_alive():
+			return -1
+
+		self.__scheduler = None
+		self.__scheduler_status['running'] = False
+		self.__scheduler_status['paused']  = False
+
+		return 1
+
+	def truncate_changes(self, before):
+		"""
+		Deletes all change segments, which only contain changes with a
+		sequence number lower than 'before'
+		"""
+
+		self.__check_writable()
+
+		with self.__mutation_lock():
+			if not os.path.exists(self.__changes_dir):
+				return 1
+			segments = self.__get_change_segments()
+			for i, start in enumerate(segments[:-1]):
+				if segments[i + 1] > before:
+					break
+				os.remove(self.__get_change_segment_file(start))
+
+		return 1
+
+	def update(self, key, partial_dict):
+		"""
+		Updates the dict stored under the key 'key' with 'partial_dict' (a
+		missing entry counts as empty dict) and returns the new dict
+		"""
+
+		if not isinstance(partial_dict, dict):
+			raise ValueError("partial_dict must be of type <class 'dict'>")
+
+		def mutation(key_existed, value):
+			if key_existed and not isinstance(value, dict):
+				raise ValueError("value of key is not of type <class 'dict'>")
+			value_new = dict(value) if key_existed else {}
+			value_new.update(partial_dict)
+			return True, value_new, None
+
+		return self.__mutate(key, mutation)
+
+	def verify_kvs(self, incremental=False, workers=None):
+		"""
+		Checks all json files against their checksums without modifying them
+		and returns a report of corrupt and missing files. If 'incremental' is
+		True, only files modified since the last verification get checked.
+		"""
+
+		with self.__lock:
+			self.__load_roots()
+			self.__checkpoint_wal()
+
+		verify_started = time.time()
+
+		if self.__all_file_paths == []:
+			self.__build_all_file_paths()
+
+		files = self.__all_file_paths
+		if incremental:
+			last_verify = self.__read_json_file(
+				self.__verify_file
+			).get('last_verify', 0)
+			files = []
+			for f in self.__all_file_paths:
+				try:
+					modified = max(
+						self.__backend.modified(f),
+						self.__backend.modified(self.__get_checksum_file(f))
+					)
+				except OSError:
+					modified = verify_started
+				if modified >= last_verify:
+					files.append(f)
+
+		# split the files into chunks and verify them in parallel (the packed
+		# backend is read by this process only)
+		workers = workers if workers else (os.cpu_count() or 1)
+		chunk_size = max(1, -(-len(files) // (workers * 4)))
+		chunks = [
+			files[i:i + chunk_size] for i in range(0, len(files), chunk_size)
+		]
+		if workers > 1 and len(chunks) > 1 and isinstance(
+			self.__backend,
+			FSHTBKVSDirectoryBackend
+		):
+			with ProcessPoolExecutor(max_workers=workers) as executor:
+				results = list(executor.map(_verify_buckets, chunks))
+		else:
+			results = [
+				_verify_buckets(chunk, self.__backend) for chunk in chunks
+			]
+
+		report = {
+			'checked':    len(files),
+			'corrupt':    [],
+			'missing':    [],
+			'unverified': []
+		}
+		for chunk_results in results:
+			for f, state in chunk_results:
+				if state in report:
+					report[state].append(f)
+
+		if not self.__read_only:
+			self.__save_dict_to_json_file(
+				self.__verify_file,
+				{'last_verify': verify_started}
+			)
+
+		return report
+
+	def wipe_kvs(self):
 		"""
 		Deletes every entry from the kvs and creates an updated meta file
 		"""
 
-		# delete meta file for auto maintainance, if wiping fails
-		os.remove(self.__meta_file)
+		self.__check_writable()
+
+		with self.__mutation_lock():
+			self.clear_cache()
+
+			# empty all secondary indexes (including the ones created by
+			# other instances)
+			self.__load_index_definitions()
+			for field in self.__indexes:
+				shutil.rmtree(
+					os.path.join(self.__index_dir, self.__indexes[field]),
+					ignore_errors=True
+				)
+
+			# drop all pending write-ahead log records
+			self.__wal_pending     = {}
+			self.__wal_pending_ops = 0
+			self.__truncate_wal()
+
+			# delete meta file for auto maintainance, if wiping fails
+			os.remove(self.__meta_file)
+
+			# make sure, all files and folders exist
+			self.__build_all_paths()
+
+			# wipe all json files
+			for f in self.__all_file_paths:
+				self.__save_bucket(f, {}, journal=False)
+
+			# drop all expiries
+			if self.__has_expiries():
+				for f in self.__all_file_paths:
+					if self.__backend.exists(self.__get_ttl_file(f)):
+						self.__backend.delete(self.__get_ttl_file(f))
+				shutil.rmtree(self.__expiry_dir, ignore_errors=True)
+				self.__ttl = False
+
+			if os.path.exists(self.__journal_file):
+				os.remove(self.__journal_file)
+
+			self.__entries = 0
+
+			self.__change_feed = os.path.exists(self.__changes_dir)
+			if self.__change_feed:
+				self.__append_changes([['wipe', None]])
+
+			return self.__create_meta_file()
+
+	def write(self, key, value, ttl=None):
+		"""
+		Adds (or updates) an entry with the key 'key' and the value 'value'. If
+		'ttl' is set, the entry expires after 'ttl' seconds.
+		"""
+
+		self.__check_writable()
+
+		expires = self.__get_expiry_time(ttl)
+
+		with self.__mutation_lock():
+			self.__foreground_ops += 1
+
+			_validate_key(key)
+			self.__validate_written_value(value)
+
+			key  		= self.__process_key(key)
+			file 		= self.__get_file_by_key(key)
+			key_existed = False
+
+			if self.__wal is not None:
+				value_old = self.__lookup(file, key)
+				if value_old is _MISSING:
+					self.__entries   += 1
+					self.__mutations += 1
+				seq = self.__append_to_wal([['put', key, value]])
+				self.__record_mutations([(key, value_old, value)])
+				self.__set_expiries({key: expires})
+			else:
+				data = self.__load_dict_from_json_file(file)
+				if key in data:
+					key_existed = True
+				value_old = data.get(key, _MISSING)
+
+				data[key] 		= value
+				data_written 	= self.__save_bucket(file, data)
+				if not data_written:
+					return -1
+
+				if not key_existed:
+					self.__entries   += 1
+					self.__mutations += 1
+					self.__create_meta_file()
+				self.__record_mutations([(key, value_old, value)])
+				self.__set_expiries({key: expires})
+
+				return 1
+
+		self.__sync_wal(seq)
+
+		return 1
+
+	def write_many(self, items, ttl=None):
+		"""
+		Adds (or updates) all entries of 'items' (a dict or (key, value) pairs)
+		all-or-nothing. If 'ttl' is set, the entries expire after 'ttl'
+		seconds.
+		"""
+
+		self.__check_writable()
+
+		expires = self.__get_expiry_time(ttl)
+		if isinstance(items, dict):
+			items = items.items()
+
+		batch = FSHTBKVSBatch(
+			self.__stage_batch_op,
+			lambda ops: self.__commit_batch(ops, expires)
+		)
+		with batch:
+			for key, value in items:
+				batch.write(key, value)
+
+		return 1
+
+	def __append_to_wal(self, ops):
+		"""
+		Appends one record with the operations 'ops' (['put', key, value] or
+		['delete', key]) to the write-ahead log and stages them in the overlay.
+		Returns the sequence number of the record.
+		"""
+
+		self.__wal_seq += 1
+		record = json.dumps(
+			{'seq': self.__wal_seq, 'ops': ops},
+			ensure_ascii=False
+		)
+		self.__wal.write(record.encode('UTF-8') + b'\n')
+		self.__wal.flush()
+
+		self.__stage_wal_ops(ops)
+
+		seq = self.__wal_seq
+		if self.__wal_pending_ops >= self.__wal_checkpoint_ops:
+			self.__checkpoint_wal()
+
+		return seq
+
+	def __apply_batch(self, buckets, entries, data_by_file=None):
+		"""
+		Applies the staged operations 'buckets' (grouped by json file) of a
+		committed batch and removes its commit record
+		"""
+
+		datas = {}
+		for file, ops in buckets.items():
+			if data_by_file is not None and file in data_by_file:
+				data = data_by_file[file]
+			else:
+				data = self.__load_dict_from_json_file(file)
+			for key, op in ops.items():
+				if op[0] == 'put':
+					data[key] = op[2]
+				elif key in data:
+					del data[key]
+			datas[file] = data
+			if self.__cache is not None:
+				self.__invalidate_cache(file)
+
+		# write the json files of every root in parallel
+		written = self.__run_per_root(
+			list(datas),
+			lambda f: self.__save_bucket(f, datas[f], durable=True)
+		)
+		if False in written:
+			return -1
+
+		self.__entries = entries
+		self.__create_meta_file()
+
+		try:
+			os.remove(self.__batch_file)
+		except FileNotFoundError:
+			pass
+
+		return 1
+
+	def __apply_wal_pending(self, replay):
+		"""
+		Writes the write-ahead log overlay to the .json files and truncates the
+		write-ahead log while holding the mutation lock
+		"""
+
+		for file, ops in self.__wal_pending.items():
+			data = self.__load_dict_from_json_file(file)
+			for key, value in ops.items():
+				if value is _DELETED:
+					if key in data:
+						del data[key]
+						if replay:
+							self.__entries -= 1
+					continue
+				if replay and not key in data:
+					self.__entries += 1
+				data[key] = value
+			if not self.__save_bucket(file, data, durable=True):
+				return -1
+
+		self.__wal_pending     = {}
+		self.__wal_pending_ops = 0
+		self.__create_meta_file()
+
+		return self.__truncate_wal()
+
+	def __build_roots(self, roots):
+		"""
+		Maps every top-level hex character to one of the root directories
+		'roots' (round robin) or to the kvs root directory
+		"""
+
+		if not roots:
+			return {c: self.__root_dir for c in '0123456789abcdef'}
+
+		for root in roots:
+			if not os.path.exists(root):
+				raise ValueError("root '" + str(root) + "' does not exist")
+
+		return {
+			c: os.path.join(
+				os.path.normpath(roots[i % len(roots)]),
+				self.__kvs_name
+			)
+			for i, c in enumerate('0123456789abcdef')
+		}
+
+	def __build_all_paths(self):
+		"""
+		Gathers all file/folder paths and creates those when missing
+		"""
+
+		# build all file paths
+		if self.__all_file_paths == []:
+			self.__build_all_file_paths()
+		# build all folder paths
+		if self.__all_folder_paths == []:
+			self.__build_all_folder_paths()
+		# create all roots and folders
+		for root in set(self.__roots.values()):
+			os.makedirs(root, exist_ok=True)
+		if isinstance(self.__backend, FSHTBKVSDirectoryBackend):
+			for f in self.__all_folder_paths:
+				os.makedirs(f, exist_ok=True)
+		# create all files
+		for f in self.__all_file_paths:
+			if not self.__backend.exists(f):
+				self.__save_bucket(f, {}, journal=False)
+
+	def __build_all_file_paths(self):
+		"""
+		Calculates all json file paths
+		"""
+
+        # build all file paths
+		def build_all_file_paths(r_root_dir, r_current_depth=1):
+			# build all file paths recursivly
+			r_chars = [c for c in '0123456789abcdef']
+			r_paths = []
+			# base case: return with list of files
+			if r_current_depth == self.__max_depth:
+				return [
+					(os.path.join(r_root_dir, c + '.json')) for c in r_chars
+				]
+			# recursion: go one step further in the filesystem
+			for c in r_chars:
+				for p in build_all_file_paths(
+					os.path.join(r_root_dir, c),
+					r_current_depth + 1
+				):
+					r_paths.append(p)
+			return r_paths
+
+		# every top-level character might be located in another root
+		if self.__max_depth == 1:
+			self.__all_file_paths = [
+				os.path.join(self.__roots[c], c + '.json')
+				for c in '0123456789abcdef'
+			]
+			return
+		self.__all_file_paths = []
+		for c in '0123456789abcdef':
+			self.__all_file_paths.extend(
+				build_all_file_paths(os.path.join(self.__roots[c], c), 2)
+			)
+
+	def __build_all_folder_paths(self):
+		"""
+		Calculates all folder paths
+		"""
+
+		roots = set(self.__roots.values())
+
+		# iterate over all files an extract their folders
+		for f in self.__all_file_paths:
+			path_tmp = os.path.split(f)[0]
+			while not path_tmp in roots:
+				if not path_tmp in self.__all_folder_paths:
+					self.__all_folder_paths.append(path_tmp)
+				path_tmp = os.path.dirname(path_tmp)
+
+		self.__all_folder_paths = sorted(self.__all_folder_paths)
+
+	def __check_writable(self):
+		"""
+		Raises an OSError, if the kvs is opened read-only
+		"""
+
+		if self.__read_only:
+			raise OSError(
+				"kvs '" + self.__kvs_name + "' is opened read-only"
+			)
+
+	def __checkpoint_wal(self, replay=False):
+		"""
+		Writes the write-ahead log overlay to the .json files and truncates the
+		write-ahead log. If 'replay' is True, the entries get counted as well.
+		"""
+
+		# read-only instances keep the overlay in memory
+		if self.__wal_pending == {} or self.__read_only:
+			return 1
+
+		with self.__mutation_lock():
+			return self.__apply_wal_pending(replay)
+
+	def __commit_batch(self, ops, expires=None, sync=True):
+		"""
+		Commits the staged operations 'ops' of a batch with a single commit
+		record (or a single write-ahead log record). Written entries expire at
+		'expires', if set. If 'sync' is False, the caller syncs the write-ahead
+		log after releasing the mutation lock.
+		"""
+
+		if ops == []:
+			return 1
+
+		with self.__mutation_lock():
+			self.__foreground_ops += 1
+
+			# group by json file, the last operation on a key wins
+			buckets = {}
+			for op in ops:
+				file = self.__get_file_by_key(op[1])
+				if not file in buckets:
+					buckets[file] = {}
+				buckets[file][op[1]] = op
+
+			# count the entries after the batch got applied
+			entries      = self.__entries
+			data_by_file = {}
+			values_old   = {}
+			for file, bucket_ops in buckets.items():
+				if self.__wal is None:
+					data_by_file[file] = self.__load_dict_from_json_file(file)
+				for key, op in bucket_ops.items():
+					if self.__wal is None:
+						values_old[key] = data_by_file[file].get(key, _MISSING)
+					else:
+						values_old[key] = self.__lookup(file, key)
+					key_existed = values_old[key] is not _MISSING
+					if op[0] == 'put' and not key_existed:
+						entries += 1
+					if op[0] == 'delete' and key_existed:
+						entries -= 1
+			self.__mutations += 1
+
+			ops = [op for b in buckets.values() for op in b.values()]
+
+			expiries = {
+				op[1]: expires if op[0] == 'put' else None for op in ops
+			}
+
+			if self.__wal is not None:
+				self.__entries = entries
+				seq = self.__append_to_wal(ops)
+				self.__record_mutations([
+					(
+						op[1],
+						values_old[op[1]],
+						op[2] if op[0] == 'put' else _MISSING
+					)
+					for op in ops
+				])
+				self.__set_expiries(expiries)
+			else:
+				# write the commit record before touching any json file
+				record = json.dumps(
+					{'entries': entries, 'ops': ops},
+					ensure_ascii=False
+				).encode('UTF-8')
+				try:
+					with open(self.__batch_file + '.tmp', 'wb') as f:
+						f.write(record)
+						f.flush()
+						if self.__durability != 'none':
+							os.fsync(f.fileno())
+						f.close()
+					os.replace(self.__batch_file + '.tmp', self.__batch_file)
+				except:
+					return -1
+
+				if self.__apply_batch(buckets, entries, data_by_file) != 1:
+					return -1
+				self.__record_mutations([
+					(
+						op[1],
+						values_old[op[1]],
+						op[2] if op[0] == 'put' else _MISSING
+					)
+					for op in ops
+				])
+				self.__set_expiries(expiries)
+
+				return 1
+
+		if sync:
+			self.__sync_wal(seq)
+
+		return 1
+
+	def __create_meta_file(self):
+		"""
+		Creates the kvs meta file
+		"""
+
+		meta = {
+			'kvs_name':  self.__kvs_name,
+			'max_depth': self.__max_depth,
+			'entries':   self.__entries
+		}
+		if set(self.__roots.values()) != {self.__root_dir}:
+			meta['roots'] = self.__roots
+		if self.__key_index:
+			meta['key_index'] = True
+		if self.__schema is not None:
+			meta['schema'] = self.__schema
+		if not self.__save_dict_to_json_file(self.__meta_file, meta):
+			return False
+		self.__meta_stamp = self.__get_meta_file_stamp()
+
+		return True
+
+	def __append_changes(self, changes):
+		"""
+		Appends the changes 'changes' ([op, key]) to the change feed
+		"""
+
+		# pick up changes recorded by other processes
+		size = -1
+		if self.__changes_segment is not None:
+			segment_file = self.__get_change_segment_file(
+				self.__changes_segment
+			)
+			if os.path.exists(segment_file):
+				size = os.path.getsize(segment_file)
+		if size != self.__changes_size:
+			self.__load_changes_state()
+			# cut off a torn line of a crashed writer
+			if self.__changes_segment is not None:
+				segment_file = self.__get_change_segment_file(
+					self.__changes_segment
+				)
+				if os.path.getsize(segment_file) != self.__changes_size:
+					os.truncate(segment_file, self.__changes_size)
+
+		lines = b''
+		for op, key in changes:
+			if (
+				self.__changes_segment is None
+				or self.__changes_segment_size >= self.__change_segment_size
+			):
+				if lines != b'':
+					self.__write_changes(lines)
+					lines = b''
+				self.__changes_segment      = self.__changes_seq + 1
+				self.__changes_segment_size = 0
+				self.__changes_size         = 0
+				self.__apply_change_retention()
+			self.__changes_seq += 1
+			self.__changes_segment_size += 1
+			lines += json.dumps(
+				{'seq': self.__changes_seq, 'op': op, 'key': key},
+				ensure_ascii=False
+			).encode('UTF-8') + b'\n'
+		self.__write_changes(lines)
+
+		with self.__changes_cond:
+			self.__changes_cond.notify_all()
+
+	def __apply_change_retention(self):
+		"""
+		Deletes the oldest change segments beyond the change retention
+		"""
+
+		if self.__change_retention is None:
+			return
+
+		segments = self.__get_change_segments()
+		for i, start in enumerate(segments[:-1]):
+			if self.__changes_seq - segments[i + 1] + 1 < self.__change_retention:
+				break
+			os.remove(self.__get_change_segment_file(start))
+
+	def __get_change_segment_file(self, segment):
+		"""
+		Returns the path of the change segment starting at 'segment'
+		"""
+
+		return os.path.join(self.__changes_dir, '%020d.log' % segment)
+
+	def __get_change_segments(self):
+		"""
+		Returns the first sequence numbers of all change segments in order
+		"""
+
+		try:
+			names = os.listdir(self.__changes_dir)
+		except OSError:
+			return []
+
+		return sorted([
+			int(name[:-4]) for name in names
+			if name.endswith('.log') and name[:-4].isdigit()
+		])
+
+	def __get_checksum_file(self, file):
+		"""
+		Returns the path of the checksum file belonging to the json file 'file'
+		"""
+
+		return file[:-5] + '.sum'
+
+	def __get_key_index_file(self, file):
+		"""
+		Returns the path of the key index file belonging to the json file
+		'file'
+		"""
+
+		return file[:-5] + '.idx'
+
+	def __get_ttl_file(self, file):
+		"""
+		Returns the path of the ttl file belonging to the json file 'file'
+		"""
+
+		return file[:-5] + '.ttl'
+
+	def __get_expiry_time(self, ttl):
+		"""
+		Returns the time an entry with the ttl 'ttl' expires at or None, if
+		'ttl' is None
+		"""
+
+		if ttl is None:
+			return None
+		if isinstance(ttl, bool) or not isinstance(ttl, (int, float)):
+			raise ValueError(
+				"ttl must be of type <class 'int'> or <class 'float'>"
+			)
+		if ttl <= 0:
+			raise ValueError("ttl must be greater than 0")
+
+		return time.time() + ttl
+
+	def __get_file_stamp(self, file):
+		"""
+		Returns a stamp of the json file 'file', which changes whenever the
+		file gets rewritten (by any process), or None if it does not exist
+		"""
+
+		return self.__backend.stamp(file)
+
+	def __get_index_file(self, field, value_encoded):
+		"""
+		Calculates the index json file of the encoded field value
+		'value_encoded' of the index on 'field'
+		"""
+
+		value_hash = self.__str_to_sha256sum(value_encoded)
+
+		return os.path.join(
+			self.__index_dir,
+			self.__indexes[field],
+			value_hash[0],
+			value_hash[1] + '.json'
+		)
+
+	def __get_index_file_stamp(self):
+		"""
+		Returns a stamp of the index file, which changes whenever the file
+		gets rewritten, or None if it does not exist
+		"""
+
+		try:
+			stat = os.stat(self.__index_file)
+		except FileNotFoundError:
+			return None
+
+		return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+	def __get_meta_file_stamp(self):
+		"""
+		Returns a stamp of the meta file, which changes whenever the file gets
+		rewritten, or None if it does not exist
+		"""
+
+		try:
+			stat = os.stat(self.__meta_file)
+		except FileNotFoundError:
+			return None
+
+		return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+	def __get_bucket_id(self, file):
+		"""
+		Returns the path of the json file 'file' relative to its root
+		"""
+
+		return '/'.join(Path(file).parts[-self.__max_depth:])
+
+	def __get_file_by_bucket_id(self, bucket_id):
+		"""
+		Returns the path of the json file with the relative path 'bucket_id'
+		"""
+
+		return os.path.join(self.__roots[bucket_id[0]], bucket_id)
+
+	def __get_file_by_key(self, key):
+		"""
+		Calculates the corresponding json file for 'key'
+		"""
+
+		file  = self.__roots[key[0]]
+		chars = key[:(self.__max_depth - 1)]
+
+		for c in chars:
+			file = os.path.join(file, c)
+
+		file = os.path.join(
+			file,
+			key[(self.__max_depth - 1):self.__max_depth] + '.json'
+		)
+
+		return file
+
+	def __load_all_buckets(self):
+		"""
+		Yields the path and the content of every json file (the json files of
+		every root get loaded in parallel, chunk by chunk)
+		"""
+
+		# build all file paths
+		if self.__all_file_paths == []:
+			self.__build_all_file_paths()
+
+		if len(set(self.__roots.values())) < 2:
+			for f in self.__all_file_paths:
+				yield f, self.__load_dict_from_json_file(f)
+			return
+
+		chunk_size = 1024
+		for i in range(0, len(self.__all_file_paths), chunk_size):
+			files = self.__all_file_paths[i:i + chunk_size]
+			datas = self.__run_per_root(files, self.__read_bucket_file)
+			for f, data in zip(files, datas):
+				yield f, data
+
+	def __load_dict_from_json_file(self, path_to_file):
+		"""
+		Returns the content of the json file 'path_to_file' as dict or an empty
+		dict, when something went wrong. If something went wrong, maintain_kvs()
+		gets called (the meta file is an exception here). Read-only instances
+		raise an OSError instead (or return an empty dict for the meta file).
+		"""
+
+		try:
+			if path_to_file == self.__meta_file:
+				with open(path_to_file, 'r', encoding='UTF-8') as f:
+					data_as_dict = json.load(f)
+					f.close()
+			else:
+				data_as_dict = json.loads(
+					self.__backend.load(path_to_file).decode('UTF-8')
+				)
+			return data_as_dict
+		except:
+			if self.__read_only:
+				if path_to_file == self.__meta_file:
+					return {}
+				raise OSError(
+					"Not able to load json file: " + str(path_to_file)
+				)
+			if path_to_file == self.__meta_file:
+				self.__save_dict_to_json_file(path_to_file, {})
+			else:
+				self.__save_bucket(path_to_file, {})
+				self.maintain_kvs()
+
+		return {}
+
+	def __load_index_definitions(self):
+		"""
+		Loads the fields of all secondary indexes from the index file, if it
+		changed since it got loaded
+		"""
+
+		stamp = self.__get_index_file_stamp()
+		if stamp == self.__indexes_stamp:
+			return
+
+		# keep the loaded fields, while the file gets rewritten
+		definitions = self.__read_json_file(self.__index_file)
+		if stamp is not None and not 'fields' in definitions:
+			return
+
+		self.__indexes       = definitions.get('fields', {})
+		self.__indexes_stamp = stamp
+
+	def __load_meta_file(self):
+		"""
+		Reads the meta file or rebuilds it, if it is unreadable (broken/lost)
+		"""
+
+		def load_max_depth(meta):
+			if not 'max_depth' in meta:
+				return False
+			if not isinstance(meta['max_depth'], int):
+				return False
+			if not meta['max_depth'] in range(1, 7):
+				return False
+			self.__max_depth = meta['max_depth']
+			return True
+
+		def load_roots(meta):
+			if not 'roots' in meta:
+				return True
+			if not isinstance(meta['roots'], dict):
+				return False
+			for c in '0123456789abcdef':
+				if not isinstance(meta['roots'].get(c), str):
+					return False
+			self.__roots = {c: meta['roots'][c] for c in '0123456789abcdef'}
+			return True
+
+		def load_key_index(meta):
+			if meta.get('key_index') is True:
+				self.__key_index = True
+			return True
+
+		def load_schema(meta):
+			if not 'schema' in meta:
+				return True
+			try:
+				self.__set_schema(meta['schema'])
+			except ValueError:
+				return False
+			return True
+
+		def load_entries(meta):
+			if not 'entries' in meta:
+				return False
+			if not isinstance(meta['max_depth'], int):
+				return False
+			if not meta['entries'] >= 0:
+				return False
+			self.__entries = meta['entries']
+			return True
+
+		meta = self.__load_dict_from_json_file(self.__meta_file)
+
+		if meta == {}:
+			if self.__read_only:
+				return False
+			meta_file_restored = self.__restore_meta_file()
+			if not meta_file_restored:
+				return False
+			self.maintain_kvs()
+			meta = self.__load_dict_from_json_file(self.__meta_file)
+
+		if not load_max_depth(meta):
+			return False
+		if not load_roots(meta):
+			return False
+		if not load_key_index(meta):
+			return False
+		if not load_schema(meta):
+			return False
+		if not load_entries(meta):
+			return False
+
+		self.__meta_stamp = self.__get_meta_file_stamp()
+
+		return True
+
+	def __load_roots(self):
+		"""
+		Loads the root directories from the meta file, if another instance
+		rebalanced the kvs since they got loaded
+		"""
+
+		stamp = self.__get_meta_file_stamp()
+		if stamp == self.__meta_stamp:
+			return
+
+		# keep the loaded roots, while the file gets rewritten
+		meta = self.__load_dict_from_json_file(self.__meta_file)
+		if meta == {}:
+			return
+		roots = meta.get('roots', self.__build_roots(None))
+		if not isinstance(roots, dict):
+			return
+		for c in '0123456789abcdef':
+			if not isinstance(roots.get(c), str):
+				return
+
+		self.__meta_stamp = stamp
+		roots = {c: roots[c] for c in '0123456789abcdef'}
+		if roots == self.__roots:
+			return
+
+		self.__roots            = roots
+		self.__all_file_paths   = []
+		self.__all_folder_paths = []
+		self.clear_cache()
+
+	def __has_expiries(self):
+		"""
+		Returns True, if ttls are tracked (even if another instance set the
+		first ttl after this instance got opened)
+		"""
+
+		if not self.__ttl:
+			self.__ttl = os.path.exists(self.__expiry_dir)
+
+		return self.__ttl
+
+	def __invalidate_cache(self, file):
+		"""
+		Drops all cached entries of the json file 'file'
+		"""
+
+		for key in self.__cache_files.pop(file, ()):
+			cached = self.__cache.pop(key, None)
+			if cached is not None:
+				self.__cache_size -= len(key) + len(cached[1] or '')
+
+	def __is_expired(self, file, key):
+		"""
+		Returns True, if the ttl of the (processed) key 'key' ran out
+		"""
+
+		expires = self.__read_bucket_file(self.__get_ttl_file(file)).get(key)
+
+		return expires is not None and expires <= time.time()
+
+	def __is_wal_in_use(self):
+		"""
+		Returns True, if another (live) instance holds the lock of the
+		write-ahead log
+		"""
+
+		try:
+			fd = os.open(self.__wal_file, os.O_RDONLY)
+		except FileNotFoundError:
+			return False
+
+		try:
+			fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+			fcntl.flock(fd, fcntl.LOCK_UN)
+			return False
+		except OSError:
+			return True
+		finally:
+			os.close(fd)
+
+	def __journal_bucket(self, path_to_file):
+		"""
+		Records the json file 'path_to_file' in the dirty journal, unless it got
+		recorded in the current journal already
+		"""
+
+		# a rotated (or recreated) journal starts without recorded buckets
+		try:
+			stat = os.stat(self.__journal_file)
+			journal_inode, journal_size = stat.st_ino, stat.st_size
+		except FileNotFoundError:
+			journal_inode, journal_size = None, 0
+		inode, size, bucket_ids = self.__journal_state
+		if journal_inode != inode or journal_size < size:
+			bucket_ids = set()
+
+		bucket_id = self.__get_bucket_id(path_to_file)
+		if bucket_id in bucket_ids:
+			self.__journal_state = (journal_inode, journal_size, bucket_ids)
+			return True
+
+		try:
+			with open(self.__journal_file, 'a', encoding='UTF-8') as f:
+				f.write(bucket_id + '\n')
+				f.close()
+			stat = os.stat(self.__journal_file)
+		except:
+			return False
+
+		bucket_ids.add(bucket_id)
+		self.__journal_state = (stat.st_ino, stat.st_size, bucket_ids)
+
+		return True
+
+	def __load_changes_state(self):
+		"""
+		Restores the last sequence number and the current segment of the
+		change feed
+		"""
+
+		segments = self.__get_change_segments()
+		self.__changes_segment      = None
+		self.__changes_segment_size = 0
+		self.__changes_size         = 0
+		if segments == []:
+			return
+
+		self.__changes_segment = segments[-1]
+		self.__changes_seq     = max(self.__changes_seq, segments[-1] - 1)
+		segment_file = self.__get_change_segment_file(segments[-1])
+		with open(segment_file, 'rb') as f:
+			for line in f:
+				if not line.endswith(b'\n'):
+					break
+				self.__changes_size += len(line)
+				self.__changes_segment_size += 1
+				self.__changes_seq = json.loads(line.decode('UTF-8'))['seq']
+			f.close()
+
+	def __maintain_buckets(self, files):
+		"""
+		Runs _maintain_buckets() for the json files 'files' in this process
+		"""
+
+		if self.__cache is not None:
+			for f in files:
+				self.__invalidate_cache(f)
+
+		return _maintain_buckets(files, self.__key_index, self.__backend)
+
+	def __maintain_files(self, files, workers=None):
+		"""
+		Runs __maintain_buckets() for the json files 'files', split across
+		'workers' processes. Returns the summed up numbers of entries.
+		"""
+
+		if (
+			not workers
+			or workers < 2
+			or len(files) < 2
+			or not isinstance(self.__backend, FSHTBKVSDirectoryBackend)
+		):
+			return self.__maintain_buckets(files)
+
+		chunk_size = max(1, -(-len(files) // (workers * 4)))
+		chunks = [
+			files[i:i + chunk_size] for i in range(0, len(files), chunk_size)
+		]
+
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			results = list(executor.map(
+				_maintain_buckets,
+				chunks,
+				[self.__key_index] * len(chunks)
+			))
+
+		if None in results:
+			return None
+
+		return (
+			sum([r[0] for r in results]),
+			sum([r[1] for r in results])
+		)
+
+	def __maintain_kvs_incremental(self, workers=None):
+		"""
+		Maintains all json files recorded in the dirty journal
+		"""
+
+		# move the journal aside, so writes during maintenance get recorded
+		journal_processing = self.__journal_file + '.processing'
+		if not os.path.exists(journal_processing):
+			if not os.path.exists(self.__journal_file):
+				return 1
+			os.replace(self.__journal_file, journal_processing)
+
+		files = []
+		with open(journal_processing, 'r', encoding='UTF-8') as f:
+			for line in f:
+				f_bucket = self.__get_file_by_bucket_id(line.strip())
+				if line.strip() == '' or f_bucket in files:
+					continue
+				files.append(f_bucket)
+			f.close()
+
+		counts = self.__maintain_files(files, workers)
+		if counts is None:
+			return -1
+
+		os.remove(journal_processing)
+
+		self.__entries = max(0, self.__entries + counts[0] - counts[1])
+		self.__create_meta_file()
+
+		return 1
+
+	def __mutate(self, key, mutation):
+		"""
+		Applies 'mutation' to the entry with the key 'key' with a single load
+		and save of its json file while holding the mutation lock.
+
+		'mutation' gets called with (key_existed, value) and returns a tuple
+		(changed, value_new, result). 'result' is returned, or 'value_new' if
+		'result' is None.
+		"""
 
-		# make sure, all files and folders exist
-		self.__build_all_paths()
+		self.__check_writable()
+		_validate_key(key)
 
-		# wipe all json files
-		for f in self.__all_file_paths:
-			self.__save_dict_to_json_file(f, {})
+		with self.__mutation_lock():
+			self.__foreground_ops += 1
 
-		self.__entries = 0
+			key  = self.__process_key(key)
+			file = self.__get_file_by_key(key)
 
-		return self.__create_meta_file()
+			if key in self.__wal_pending.get(file, {}):
+				value       = self.__wal_pending[file][key]
+				key_existed = value is not _DELETED
+			else:
+				data        = self.__load_dict_from_json_file(file)
+				key_existed = key in data
+				value       = data[key] if key_existed else None
 
-	def write(self, key, value):
+			# an expired entry counts as missing, but keeps its ttl otherwise
+			expired = key_existed and self.__is_expired(file, key)
+			changed, value_new, result = mutation(
+				key_existed and not expired,
+				None if expired else value
+			)
+			if result is None:
+				result = value_new
+			if not changed:
+				return result
+
+			self.__validate_written_value(value_new)
+
+			if not key_existed:
+				self.__entries   += 1
+				self.__mutations += 1
+
+			if self.__wal is not None:
+				seq = self.__append_to_wal([['put', key, value_new]])
+				self.__record_mutations([(
+					key,
+					value if key_existed else _MISSING,
+					value_new
+				)])
+				if expired:
+					self.__set_expiries({key: None})
+			else:
+				data[key] = value_new
+				if not self.__save_bucket(file, data):
+					raise OSError("Not able to write json file: " + str(file))
+				if not key_existed:
+					self.__create_meta_file()
+				self.__record_mutations([(
+					key,
+					value if key_existed else _MISSING,
+					value_new
+				)])
+				if expired:
+					self.__set_expiries({key: None})
+
+				return result
+
+		self.__sync_wal(seq)
+
+		return result
+
+	@contextmanager
+	def __mutation_lock(self):
 		"""
-		Adds (or updates) an entry with the key 'key' and the value 'value'
+		Serializes mutations across threads and, where fcntl is available,
+		across processes by locking the kvs lock file
 		"""
 
-		self.__validate_key(key)
-		self.__validate_value(value)
-
-		key  		= self.__process_key(key)
-		file 		= self.__get_file_by_key(key)
-		key_existed = False
+		with self.__lock:
+			if fcntl is None or self.__read_only:
+				yield
+				return
 
-		data = self.__load_dict_from_json_file(file)
-		if key in data:
-			key_existed = True
-
-		data[key] 		= value
-		data_written 	= self.__save_dict_to_json_file(file, data)
-		if not data_written:
-			return -1
+			if self.__lock_depth == 0:
+				if self.__lock_fd is None:
+					self.__lock_fd = os.open(
+						self.__lock_file,
+						os.O_RDWR | os.O_CREAT
+					)
+				fcntl.flock(self.__lock_fd, fcntl.LOCK_EX)
+				# writes of other instances would get lost on the next
+				# checkpoint of a write-ahead logged instance
+				if (
+					self.__wal is None
+					and self.__wal_locked is None
+					and self.__is_wal_in_use()
+				):
+					fcntl.flock(self.__lock_fd, fcntl.LOCK_UN)
+					raise OSError(
+						"kvs is written by a write-ahead logged instance: "
+						+ str(self.__wal_file)
+					)
+			self.__lock_depth += 1
+			try:
+				# another instance may have moved subtrees to other roots
+				if self.__lock_depth == 1:
+					self.__load_roots()
+				# a batch is committed while holding the lock, so a commit
+				# record found here got left behind by a crashed process
+				if self.__lock_depth == 1 and os.path.exists(self.__batch_file):
+					self.__replay_batch()
+				yield
+			finally:
+				self.__lock_depth -= 1
+				if self.__lock_depth == 0:
+					fcntl.flock(self.__lock_fd, fcntl.LOCK_UN)
+
+	def __open_locked_wal(self, mode):
+		"""
+		Opens the write-ahead log with the mode 'mode' and locks it
+		exclusively. Returns None, if it does not exist (and 'mode' does not
+		create it) or if another instance holds the lock.
+		"""
 
-		if not key_existed:
-			self.__entries += 1
-			self.__create_meta_file()
+		while True:
+			try:
+				f = open(self.__wal_file, mode)
+			except FileNotFoundError:
+				return None
 
-		return 1
+			if fcntl is None:
+				return f
 
-	def __build_all_paths(self):
+			try:
+				fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+			except OSError:
+				f.close()
+				return None
+
+			# the log might have been removed by a replay before it got locked
+			try:
+				inode = os.stat(self.__wal_file).st_ino
+			except FileNotFoundError:
+				inode = None
+			if inode == os.fstat(f.fileno()).st_ino:
+				return f
+			f.close()
+
+	def __open_backend(self, backend):
 		"""
-		Gathers all file/folder paths and creates those when missing
+		Opens the storage backend 'backend' or, if None, the backend the kvs
+		was created with
 		"""
 
-		# build all file paths
-		if self.__all_file_paths == []:
-			self.__build_all_file_paths()
-		# build all folder paths
-		if self.__all_folder_paths == []:
-			self.__build_all_folder_paths()
-		# create all folders
-		for f in self.__all_folder_paths:
-			os.makedirs(f, exist_ok=True)
-		# create all files
-		for f in self.__all_file_paths:
-			if not os.path.exists(f):
-				self.__save_dict_to_json_file(f, {})
+		if backend is None:
+			backend = 'directory'
+			if os.path.exists(os.path.join(self.__root_dir, 'buckets.pack')):
+				backend = 'packed'
 
-	def __build_all_file_paths(self):
+		if backend == 'packed':
+			self.__backend = FSHTBKVSPackedBackend(
+				self.__root_dir,
+				read_only=self.__read_only
+			)
+		else:
+			self.__backend = FSHTBKVSDirectoryBackend()
+
+	def __process_key(self, key):
 		"""
-		Calculates all json file paths
+		Processes the key 'key' to match the filesystem based hash table
 		"""
 
-        # build all file paths
-		def build_all_file_paths(r_root_dir, r_current_depth=1):
-			# build all file paths recursivly
-			r_chars = [c for c in '0123456789abcdef']
-			r_paths = []
-			# base case: return with list of files
-			if r_current_depth == self.__max_depth:
-				return [
-					(os.path.join(r_root_dir, c + '.json')) for c in r_chars
-				]
-			# recursion: go one step further in the filesystem
-			for c in r_chars:
-				for p in build_all_file_paths(
-					os.path.join(r_root_dir, c),
-					r_current_depth + 1
-				):
-					r_paths.append(p)
-			return r_paths
-		self.__all_file_paths = build_all_file_paths(self.__root_dir)
+		if len(key) < self.__max_depth:
+			return self.__str_to_sha256sum(key)
 
-	def __build_all_folder_paths(self):
+		char_whitelist = [c for c in '0123456789abcdef']
+		for c in key:
+			if c not in char_whitelist:
+				return self.__str_to_sha256sum(key)
+
+		return key
+
+	def __put_into_cache(self, key, file, stamp, value_encoded):
 		"""
-		Calculates all folder paths
+		Caches the encoded value 'value_encoded' (None for missing entries) of
+		the key 'key' and evicts the least recently used entries, if the cache
+		exceeds its limits
 		"""
 
-		# iterate over all files an extract their folders
-		for f in self.__all_file_paths:
-			path_tmp = os.path.split(f)[0]
-			while path_tmp != self.__root_dir:
-				if not path_tmp in self.__all_folder_paths:
-					self.__all_folder_paths.append(path_tmp)
-				path_tmp = os.path.dirname(path_tmp)
-
-		self.__all_folder_paths = sorted(self.__all_folder_paths)
+		size = len(key) + len(value_encoded or '')
+		if size > self.__cache_bytes:
+			return
 
-	def __create_meta_file(self):
+		cached = self.__cache.pop(key, None)
+		if cached is not None:
+			self.__cache_size -= len(key) + len(cached[1] or '')
+
+		self.__cache[key]  = (stamp, value_encoded)
+		self.__cache_size += size
+		if not file in self.__cache_files:
+			self.__cache_files[file] = set()
+		self.__cache_files[file].add(key)
+
+		while (
+			len(self.__cache) > self.__cache_entries
+			or self.__cache_size > self.__cache_bytes
+		):
+			key_evicted, cached = self.__cache.popitem(last=False)
+			self.__cache_size  -= len(key_evicted) + len(cached[1] or '')
+			self.__cache_files.get(
+				self.__get_file_by_key(key_evicted),
+				set()
+			).discard(key_evicted)
+
+	def __lookup(self, file, key):
 		"""
-		Creates the kvs meta file
+		Returns the value of the key 'key' from the write-ahead log overlay or
+		the json file 'file' or _MISSING
 		"""
 
-		meta = {
-			'kvs_name':  self.__kvs_name,
-			'max_depth': self.__max_depth,
-			'entries':   self.__entries
-		}
-		return self.__save_dict_to_json_file(self.__meta_file, meta)
+		if key in self.__wal_pending.get(file, {}):
+			value = self.__wal_pending[file][key]
+			return _MISSING if value is _DELETED else value
 
-	def __get_file_by_key(self, key):
+		return self.__load_dict_from_json_file(file).get(key, _MISSING)
+
+	def __read_by_key_index(self, file, key):
 		"""
-		Calculates the corresponding json file for 'key'
+		Looks up the key 'key' in the key index of the json file 'file' and
+		decodes only its value. Returns (True, value), (False, None) for a
+		missing entry or None, if the key index is missing or outdated.
 		"""
 
-		file  = self.__root_dir
-		chars = key[:(self.__max_depth - 1)]
+		try:
+			key_index = self.__backend.load(self.__get_key_index_file(file))
+			start     = _get_key_index_start(
+				key_index,
+				self.__backend.stamp(file)
+			)
+			if start is None:
+				return None
+
+			# binary search on the sorted records
+			key_encoded = key.encode('UTF-8')
+			low  = 0
+			high = (len(key_index) - start) // _KEY_INDEX_RECORD.size
+			while low < high:
+				middle = (low + high) // 2
+				record = _KEY_INDEX_RECORD.unpack_from(
+					key_index,
+					start + middle * _KEY_INDEX_RECORD.size
+				)
+				key_middle = record[0].rstrip(b'\x00')
+				if key_middle == key_encoded:
+					break
+				if key_middle < key_encoded:
+					low = middle + 1
+				else:
+					high = middle
+			else:
+				return False, None
+
+			part   = self.__backend.load(file, record[1], record[2])
+			prefix = (json.dumps(key, ensure_ascii=False) + ': ').encode(
+				'UTF-8'
+			)
+			if not part.startswith(prefix):
+				return None
 
-		for c in chars:
-			file = os.path.join(file, c)
+			return True, json.loads(part[len(prefix):].decode('UTF-8'))
+		except:
+			return None
 
-		file = os.path.join(
-			file,
-			key[(self.__max_depth - 1):self.__max_depth] + '.json'
-		)
+	def __read_bucket_file(self, path_to_file):
+		"""
+		Returns the content of the json (or checksum) file 'path_to_file' of
+		the storage backend as dict or an empty dict, when something went
+		wrong. Nothing gets repaired here.
+		"""
 
-		return file
+		try:
+			return json.loads(
+				self.__backend.load(path_to_file).decode('UTF-8')
+			)
+		except:
+			return {}
 
-	def __load_dict_from_json_file(self, path_to_file):
+	def __read_json_file(self, path_to_file):
 		"""
 		Returns the content of the json file 'path_to_file' as dict or an empty
-		dict, when something went wrong. If something went wrong, maintain_kvs()
-		gets called (the meta file is an exception here).
+		dict, when something went wrong. Nothing gets repaired here.
 		"""
 
 		try:
@@ -362,67 +3405,104 @@ class FSHTBKVS:
 				f.close()
 			return data_as_dict
 		except:
-			self.__save_dict_to_json_file(path_to_file, {})
-			if not path_to_file == self.__meta_file:
-				self.maintain_kvs()
-
-		return {}
+			return {}
 
-	def __load_meta_file(self):
+	def __record_mutations(self, mutations):
 		"""
-		Reads the meta file or rebuilds it, if it is unreadable (broken/lost)
+		Updates the secondary indexes and the change feed for the mutations
+		'mutations' ((key, value_old, value_new), _MISSING for no entry)
 		"""
 
-		def load_max_depth(meta):
-			if not 'max_depth' in meta:
-				return False
-			if not isinstance(meta['max_depth'], int):
-				return False
-			if not meta['max_depth'] in range(1, 7):
-				return False
-			self.__max_depth = meta['max_depth']
-			return True
-
-		def load_entries(meta):
-			if not 'entries' in meta:
-				return False
-			if not isinstance(meta['max_depth'], int):
-				return False
-			if not meta['entries'] >= 0:
-				return False
-			self.__entries = meta['entries']
-			return True
-
-		meta = self.__load_dict_from_json_file(self.__meta_file)
+		# indexes might have been created or dropped by another instance
+		self.__load_index_definitions()
+		for key, value_old, value_new in mutations:
+			self.__update_indexes(key, value_old, value_new)
 
-		if meta == {}:
-			meta_file_restored = self.__restore_meta_file()
-			if not meta_file_restored:
-				return False
-			self.maintain_kvs()
-			meta = self.__load_dict_from_json_file(self.__meta_file)
+		# the change feed might have been enabled by another instance
+		self.__change_feed = os.path.exists(self.__changes_dir)
+		if self.__change_feed:
+			self.__append_changes([
+				['delete' if value_new is _MISSING else 'put', key]
+				for key, value_old, value_new in mutations
+			])
 
-		if not load_max_depth(meta):
-			return False
-		if not load_entries(meta):
-			return False
+	def __replay_batch(self):
+		"""
+		Applies the commit record of a batch, which got interrupted by a crash
+		"""
 
-		return True
+		# a batch, which is committed right now, holds the mutation lock
+		with self.__mutation_lock():
+			if not os.path.exists(self.__batch_file):
+				return
+
+			record = self.__read_json_file(self.__batch_file)
+			if not 'ops' in record or not 'entries' in record:
+				# the commit record is incomplete, so the batch never got
+				# applied
+				if not self.__read_only:
+					try:
+						os.remove(self.__batch_file)
+					except FileNotFoundError:
+						pass
+				return
+
+			# read-only instances only apply the batch in memory
+			if self.__read_only:
+				self.__stage_wal_ops(record['ops'])
+				self.__entries = record['entries']
+				return
+
+			buckets = {}
+			for op in record['ops']:
+				file = self.__get_file_by_key(op[1])
+				if not file in buckets:
+					buckets[file] = {}
+				buckets[file][op[1]] = op
+
+			if self.__apply_batch(buckets, record['entries']) != 1:
+				raise OSError(
+					"Not able to replay the batch: "
+					+ str(self.__batch_file)
+				)
 
-	def __process_key(self, key):
+	def __replay_wal(self):
 		"""
-		Processes the key 'key' to match the filesystem based hash table
+		Applies the records of a left over write-ahead log to the .json files.
+		Unless the instance is read-only, the log has to be locked.
 		"""
 
-		if len(key) < self.__max_depth:
-			return self.__str_to_sha256sum(key)
-
-		char_whitelist = [c for c in '0123456789abcdef']
-		for c in key:
-			if c not in char_whitelist:
-				return self.__str_to_sha256sum(key)
+		with open(self.__wal_file, 'rb') as f:
+			for line in f:
+				try:
+					record = json.loads(line.decode('UTF-8'))
+				except:
+					# torn write of the last record
+					break
+				self.__stage_wal_ops(record['ops'])
+			f.close()
+
+		if self.__read_only:
+			# only count the entries, the records stay in memory
+			for file, ops in self.__wal_pending.items():
+				data = self.__load_dict_from_json_file(file)
+				for key, value in ops.items():
+					if value is _DELETED and key in data:
+						self.__entries -= 1
+					if value is not _DELETED and not key in data:
+						self.__entries += 1
+			return
 
-		return key
+		with self.__mutation_lock():
+			if self.__wal_pending == {}:
+				result = self.__truncate_wal()
+			else:
+				result = self.__checkpoint_wal(replay=True)
+			if result != 1:
+				raise OSError(
+					"Not able to replay the write-ahead log: "
+					+ str(self.__wal_file)
+				)
 
 	def __restore_meta_file(self):
 		"""
@@ -438,7 +3518,7 @@ class FSHTBKVS:
 			# base case 2: json file found
 			for c in r_chars:
 				file = os.path.join(r_root_dir, c + '.json')
-				if os.path.exists(file):
+				if self.__backend.exists(file):
 					return r_current_depth
 			# recursion: go one step further in the filesystem
 			for c in r_chars:
@@ -450,7 +3530,14 @@ class FSHTBKVS:
 					return max_depth_guess
 			return -1
 
-		max_depth = get_max_depth(self.__root_dir)
+		# the roots are lost with the meta file, use the requested ones
+		self.__roots = self.__roots_requested
+
+		max_depth = -1
+		for root in sorted(set(self.__roots.values())):
+			max_depth = get_max_depth(root)
+			if max_depth > -1:
+				break
 
 		if max_depth > -1:
 			self.__max_depth = max_depth
@@ -458,6 +3545,185 @@ class FSHTBKVS:
 
 		return False
 
+	def __run_scheduler(
+		self,
+		tasks,
+		buckets_per_second,
+		bytes_per_second,
+		max_foreground_ops,
+		slice_size
+	):
+		"""
+		Main loop of the background maintenance scheduler
+		"""
+
+		status           = self.__scheduler_status
+		last_ops         = self.__foreground_ops
+		last_ops_time    = time.time()
+		cycle_entries    = 0
+		cycle_mutations  = 0
+		cycle_findings   = {'corrupt': [], 'missing': []}
+
+		if self.__all_file_paths == []:
+			self.__build_all_file_paths()
+
+		while not self.__scheduler_stop.is_set():
+			# pause while the foreground load is high
+			now           = time.time()
+			ops_per_sec   = (
+				(self.__foreground_ops - last_ops)
+				/ max(now - last_ops_time, 0.001)
+			)
+			last_ops      = self.__foreground_ops
+			last_ops_time = now
+			if max_foreground_ops is not None and (
+				ops_per_sec > max_foreground_ops
+			):
+				status['paused'] = True
+				self.__scheduler_stop.wait(slice_size / buckets_per_second)
+				continue
+			status['paused'] = False
+
+			slice_started = time.time()
+			slice_bytes   = 0
+			try:
+				with self.__mutation_lock():
+					cursor = status['cursor']
+
+					# start of a cycle
+					if cursor == 0:
+						if 'compact' in tasks:
+							self.__checkpoint_wal()
+							self.__maintain_kvs_incremental()
+						cycle_entries   = 0
+						cycle_mutations = self.__mutations
+						cycle_findings  = {'corrupt': [], 'missing': []}
+
+					files = self.__all_file_paths[cursor:cursor + slice_size]
+					for f in files:
+						if self.__backend.exists(f):
+							slice_bytes += self.__backend.size(f)
+
+					if 'maintain' in tasks:
+						self.__maintain_buckets(files)
+					if 'verify' in tasks:
+						for f, state in _verify_buckets(files, self.__backend):
+							if state in cycle_findings:
+								cycle_findings[state].append(f)
+					if 'reconcile' in tasks:
+						for f in files:
+							cycle_entries += self.__read_bucket_file(
+								self.__get_checksum_file(f)
+							).get('entries', 0)
+
+					cursor += len(files)
+
+					# end of a cycle
+					if cursor >= len(self.__all_file_paths):
+						cursor = 0
+						status['cycles'] += 1
+						if 'verify' in tasks:
+							status['corrupt'] = cycle_findings['corrupt']
+							status['missing'] = cycle_findings['missing']
+						if (
+							'reconcile' in tasks
+							and cycle_mutations == self.__mutations
+							and cycle_entries != self.__entries
+						):
+							self.__entries = cycle_entries
+							self.__create_meta_file()
+
+					status['cursor'] = cursor
+					status['buckets_processed'] += len(files)
+					status['bytes_processed']   += slice_bytes
+
+				# expire_kvs() syncs the write-ahead log outside of the lock
+				if 'expire' in tasks:
+					self.expire_kvs()
+			except Exception as e:
+				status['last_error'] = str(e)
+
+			# pace the next slice by the configured budget
+			delay = slice_size / buckets_per_second
+			if bytes_per_second is not None:
+				delay = max(delay, slice_bytes / bytes_per_second)
+			delay -= time.time() - slice_started
+			if delay > 0:
+				self.__scheduler_stop.wait(delay)
+
+		status['running'] = False
+
+	def __save_index_definitions(self):
+		"""
+		Writes the fields of all secondary indexes to the index file
+		"""
+
+		os.makedirs(self.__index_dir, exist_ok=True)
+
+		if not self.__save_dict_to_json_file(
+			self.__index_file,
+			{'fields': self.__indexes}
+		):
+			return False
+		self.__indexes_stamp = self.__get_index_file_stamp()
+
+		return True
+
+	def __run_per_root(self, files, function):
+		"""
+		Calls 'function' for every json file of 'files' with one thread per
+		root directory and returns the results in the order of 'files'
+		"""
+
+		files_by_root = {}
+		for f in files:
+			root = self.__roots[self.__get_bucket_id(f)[0]]
+			if not root in files_by_root:
+				files_by_root[root] = []
+			files_by_root[root].append(f)
+
+		if len(files_by_root) < 2:
+			return [function(f) for f in files]
+
+		def run(root_files):
+			return [(f, function(f)) for f in root_files]
+
+		results = {}
+		with ThreadPoolExecutor(max_workers=len(files_by_root)) as executor:
+			for root_results in executor.map(run, files_by_root.values()):
+				results.update(root_results)
+
+		return [results[f] for f in files]
+
+	def __save_bucket(
+		self,
+		path_to_file,
+		data_as_dict,
+		journal=True,
+		durable=False
+	):
+		"""
+		Writes the dict 'data_as_dict' to the json file 'path_to_file', updates
+		its checksum file and records it in the dirty journal. If 'durable' is
+		True, the file gets replaced atomically (and synced, if the durability
+		is not 'none').
+		"""
+
+		if self.__cache is not None:
+			self.__invalidate_cache(path_to_file)
+
+		if journal and not self.__journal_bucket(path_to_file):
+			return False
+
+		return _save_bucket_files(
+			self.__backend,
+			path_to_file,
+			data_as_dict,
+			self.__key_index,
+			durable=durable,
+			sync=durable and self.__durability != 'none'
+		)
+
 	def __save_dict_to_json_file(self, path_to_file, data_as_dict):
 		"""
 		Tries to write the dict 'data_as_dict' to the json file 'path_to_file'
@@ -476,6 +3742,119 @@ class FSHTBKVS:
 		except:
 			return False
 
+	def __set_expiries(self, expiries):
+		"""
+		Sets the expiry times of the (processed) keys of the dict 'expiries'
+		(or removes them, if None) in the ttl files and adds them to the
+		window logs of the expiry index
+		"""
+
+		# ttls might have been set by another instance, so stale entries of
+		# the ttl files get dropped
+		if not self.__has_expiries():
+			if all(expires is None for expires in expiries.values()):
+				return
+			self.__ttl = True
+
+		by_file = {}
+		for key, expires in expiries.items():
+			file = self.__get_file_by_key(key)
+			if not file in by_file:
+				by_file[file] = {}
+			by_file[file][key] = expires
+
+		windows = {}
+		for file, file_expiries in by_file.items():
+			ttl_file = self.__get_ttl_file(file)
+			ttls     = self.__read_bucket_file(ttl_file)
+			changed  = False
+			for key, expires in file_expiries.items():
+				if expires is None:
+					if key in ttls:
+						del ttls[key]
+						changed = True
+					continue
+				ttls[key] = expires
+				changed   = True
+				window    = expires // self.__ttl_window * self.__ttl_window
+				if not window in windows:
+					windows[window] = []
+				windows[window].append(json.dumps([key, expires]))
+
+			if not changed:
+				continue
+			try:
+				if ttls == {}:
+					self.__backend.delete(ttl_file)
+				else:
+					self.__backend.save(
+						ttl_file,
+						json.dumps(ttls, ensure_ascii=False).encode('UTF-8')
+					)
+			except:
+				raise OSError("Not able to write ttl file: " + str(ttl_file))
+
+		if windows != {}:
+			os.makedirs(self.__expiry_dir, exist_ok=True)
+		for window, lines in windows.items():
+			path_to_file = os.path.join(
+				self.__expiry_dir,
+				str(int(window)) + '.log'
+			)
+			try:
+				with open(path_to_file, 'a', encoding='UTF-8') as f:
+					f.write('\n'.join(lines) + '\n')
+					f.close()
+			except:
+				raise OSError(
+					"Not able to write expiry file: " + str(path_to_file)
+				)
+
+	def __set_schema(self, schema):
+		"""
+		Compiles and sets the value schema 'schema' (or removes it, if None)
+		"""
+
+		if schema is None:
+			self.__schema           = None
+			self.__schema_validator = None
+			return
+
+		self.__schema_validator = _compile_schema(
+			schema,
+			_validate_value
+		)
+		self.__schema = schema
+
+	def __stage_batch_op(self, op, key, value=None):
+		"""
+		Validates a write or delete of a batch and returns it as operation
+		"""
+
+		_validate_key(key)
+		key = self.__process_key(key)
+
+		if op == 'delete':
+			return ['delete', key]
+
+		self.__validate_written_value(value)
+		return ['put', key, value]
+
+	def __stage_wal_ops(self, ops):
+		"""
+		Stages the write-ahead log operations 'ops' in the overlay
+		"""
+
+		for op in ops:
+			file = self.__get_file_by_key(op[1])
+			if not file in self.__wal_pending:
+				self.__wal_pending[file] = {}
+			if op[0] == 'put':
+				self.__wal_pending[file][op[1]] = op[2]
+			else:
+				self.__wal_pending[file][op[1]] = _DELETED
+			self.__wal_pending_ops += 1
+
 	def __str_to_sha256sum(self, s):
 		"""
 		Returns a hexdigit sha256sum as string for the sring 's'
@@ -483,37 +3862,169 @@ class FSHTBKVS:
 
 		return hashlib.sha256(bytes(s, 'utf-8')).hexdigest()
 
-	def __validate_key(self, key):
+	def __sync_wal(self, seq):
 		"""
-		Validates, if the key 'key' can be used for the kvs
+		Makes the write-ahead log durable up to the record 'seq' according to
+		the configured durability. Concurrent writers get group-committed by a
+		single fsync of whichever writer gets there first.
 		"""
 
-		if not isinstance(key, str):
-			raise ValueError("key must be of type <class 'str'>")
-		if key == '':
-			raise ValueError("key must not be empty")
-		if len(key) > 64:
-			raise ValueError("key max length is 64 characters")
+		if self.__durability == 'none':
+			return
+		if self.__durability == 'batched' and (
+			seq - self.__wal_synced < self.__wal_batch_size
+		):
+			return
 
-	def __validate_value(self, value):
+		with self.__wal_sync_cond:
+			while self.__wal_synced < seq:
+				if self.__wal_syncing:
+					self.__wal_sync_cond.wait()
+					continue
+				self.__wal_syncing = True
+				self.__wal_sync_cond.release()
+				try:
+					with self.__lock:
+						target = self.__wal_seq
+						fd     = None
+						if self.__wal is not None:
+							self.__wal.flush()
+							fd = os.dup(self.__wal.fileno())
+					if fd is not None:
+						try:
+							os.fsync(fd)
+						finally:
+							os.close(fd)
+				finally:
+					self.__wal_sync_cond.acquire()
+					self.__wal_syncing = False
+				self.__wal_synced = max(self.__wal_synced, target)
+				self.__wal_sync_cond.notify_all()
+
+	def __truncate_wal(self):
 		"""
-		Validates, if the value 'value' can be used for the kvs
+		Empties the write-ahead log after its records got checkpointed
 		"""
 
-		if isinstance(value, list):
-			for v in value:
-				self.__validate_value(v)
-			return
+		try:
+			if self.__wal is not None:
+				self.__wal.flush()
+				os.ftruncate(self.__wal.fileno(), 0)
+				if self.__durability != 'none':
+					os.fsync(self.__wal.fileno())
+			elif os.path.exists(self.__wal_file):
+				os.remove(self.__wal_file)
+		except:
+			return -1
 
-		if isinstance(value, dict):
-			for k, v in value.items():
-				self.__validate_key(k)
-				self.__validate_value(v)
-			return
+		with self.__wal_sync_cond:
+			self.__wal_synced = self.__wal_seq
+			self.__wal_sync_cond.notify_all()
 
-		if not isinstance(value, (str, int, float, bool)):
-			raise ValueError(
-				"value must be of type"
-				+ " <class 'str'>, <class 'int'>, <class 'float'>"
-				+ " or <class 'bool'>"
-			)
+		return 1
+
+	def __update_indexes(self, key, value_old, value_new):
+		"""
+		Moves the key 'key' within all secondary indexes from the field values
+		of 'value_old' to the ones of 'value_new' (_MISSING for no entry)
+		"""
+
+		for field in self.__indexes:
+			field_old = _get_field(value_old, field)
+			field_new = _get_field(value_new, field)
+			if field_old is not _MISSING:
+				field_old = _encode_index_value(field_old)
+			if field_new is not _MISSING:
+				field_new = _encode_index_value(field_new)
+			if field_old == field_new:
+				continue
+
+			if field_old is not _MISSING:
+				index_file   = self.__get_index_file(field, field_old)
+				index_bucket = self.__read_json_file(index_file)
+				if key in index_bucket.get(field_old, []):
+					index_bucket[field_old].remove(key)
+					if index_bucket[field_old] == []:
+						del index_bucket[field_old]
+					self.__save_dict_to_json_file(index_file, index_bucket)
+
+			if field_new is not _MISSING:
+				index_file   = self.__get_index_file(field, field_new)
+				index_bucket = self.__read_json_file(index_file)
+				if not field_new in index_bucket:
+					index_bucket[field_new] = []
+				if not key in index_bucket[field_new]:
+					index_bucket[field_new].append(key)
+					os.makedirs(os.path.dirname(index_file), exist_ok=True)
+					self.__save_dict_to_json_file(index_file, index_bucket)
+
+	def __validate_written_value(self, value):
+		"""
+		Validates the value 'value' of a write against the schema or, if there
+		is none, validates, if it can be used for the kvs
+		"""
+
+		if self.__schema_validator is None:
+			_validate_value(value)
+		else:
+			self.__schema_validator(value)
+
+	def __write_changes(self, lines):
+		"""
+		Appends the encoded changes 'lines' to the current change segment
+		"""
+
+		with open(
+			self.__get_change_segment_file(self.__changes_segment),
+			'ab'
+		) as f:
+			f.write(lines)
+			f.flush()
+			if self.__durability == 'per-op':
+				os.fsync(f.fileno())
+			f.close()
+		self.__changes_size += len(lines)
+
+class FSHTBKVSBatch:
+	"""
+	Stages writes and deletes for FSHTBKVS.batch() and commits them at once,
+	when the with block is left without an exception
+	"""
+	def __init__(self, stage, commit):
+		self.__stage  = stage
+		self.__commit = commit
+		self.__ops    = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		ops        = self.__ops
+		self.__ops = []
+
+		if exc_type is not None:
+			return False
+
+		if self.__commit(ops) != 1:
+			raise OSError("Not able to commit the batch")
+
+		return False
+
+	def delete(self, key):
+		"""
+		Stages the deletion of the entry with the key 'key'
+		"""
+
+		self.__ops.append(self.__stage('delete', key))
+
+		return 1
+
+	def write(self, key, value):
+		"""
+		Stages adding (or updating) an entry with the key 'key' and the value
+		'value'
+		"""
+
+		self.__ops.append(self.__stage('put', key, value))
+
+		return 1
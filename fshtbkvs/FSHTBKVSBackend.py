@@ -0,0 +1,488 @@
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+	import fcntl
+except ImportError:
+	# no cross-process locking on platforms without fcntl (e.g. Windows)
+	fcntl = None
+
+# extents are allocated in pages of this size (in bytes)
+_PAGE   = 64
+# length of the data, generation (time of the write in nanoseconds)
+_EXTENT = struct.Struct('<IQ')
+
+class FSHTBKVSBackend:
+	"""
+	Interface of the storage backends. A backend stores the data of bucket
+	files (the json files and their checksum files), which are addressed by
+	their path.
+	"""
+
+	def close(self):
+		"""
+		Releases all resources held by the backend
+		"""
+
+		pass
+
+	def delete(self, file):
+		"""
+		Deletes the file 'file', if it exists
+		"""
+
+		raise NotImplementedError
+
+	def exists(self, file):
+		"""
+		Returns True, if the file 'file' exists
+		"""
+
+		raise NotImplementedError
+
+	def list(self, folder):
+		"""
+		Yields the paths of all files stored below the folder 'folder'
+		"""
+
+		raise NotImplementedError
+
+	def load(self, file, offset=0, length=None):
+		"""
+		Returns the data of the file 'file' (or only 'length' bytes of it,
+		starting at 'offset') as bytes or raises an OSError
+		"""
+
+		raise NotImplementedError
+
+	def modified(self, file):
+		"""
+		Returns the time of the last write of the file 'file' in seconds or
+		raises an OSError
+		"""
+
+		raise NotImplementedError
+
+	def save(self, file, data, durable=False, sync=False):
+		"""
+		Writes the bytes 'data' to the file 'file' or raises an OSError. If
+		'durable' is True, the old data gets replaced atomically and, if 'sync'
+		is True as well, synced to disk.
+		"""
+
+		raise NotImplementedError
+
+	def size(self, file):
+		"""
+		Returns the size of the file 'file' in bytes or raises an OSError
+		"""
+
+		raise NotImplementedError
+
+	def stamp(self, file):
+		"""
+		Returns a stamp of the file 'file', which changes whenever the file
+		gets rewritten (by any process), or None if it does not exist
+		"""
+
+		raise NotImplementedError
+
+class FSHTBKVSDirectoryBackend(FSHTBKVSBackend):
+	"""
+	Stores every file as a file of its own in the directory tree
+	"""
+
+	def delete(self, file):
+		if os.path.exists(file):
+			os.remove(file)
+
+	def exists(self, file):
+		return os.path.exists(file)
+
+	def list(self, folder):
+		for path, folders, files in os.walk(folder):
+			folders.sort()
+			for name in sorted(files):
+				yield os.path.join(path, name)
+
+	def load(self, file, offset=0, length=None):
+		with open(file, 'rb') as f:
+			f.seek(offset)
+			data = f.read() if length is None else f.read(length)
+			f.close()
+		if length is not None and len(data) != length:
+			raise OSError("file is truncated: " + str(file))
+		return data
+
+	def modified(self, file):
+		return os.path.getmtime(file)
+
+	def save(self, file, data, durable=False, sync=False):
+		if not durable:
+			with open(file, 'wb') as f:
+				f.write(data)
+				f.close()
+			return
+
+		with open(file + '.tmp', 'wb') as f:
+			f.write(data)
+			f.flush()
+			if sync:
+				os.fsync(f.fileno())
+			f.close()
+		os.replace(file + '.tmp', file)
+
+	def size(self, file):
+		return os.path.getsize(file)
+
+	def stamp(self, file):
+		try:
+			stat = os.stat(file)
+		except OSError:
+			return None
+
+		return (stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+
+class FSHTBKVSPackedBackend(FSHTBKVSBackend):
+	"""
+	Stores all files as extents of the single pack file 'buckets.pack'. The
+	extent table 'buckets.table' is an append-only log of
+	'<file> <offset> <pages>' lines (0 pages for a deleted file), which gets
+	compacted once it mostly consists of outdated lines.
+
+	Extents are sized in powers of two pages, so freed extents can be reused
+	by later writes of the same size class. Small writes overwrite their
+	extent in place, durable writes always go to a fresh extent, which gets
+	referenced by the extent table only after the data was written. An
+	exclusive lock on the pack file serializes writers of all processes and
+	every access picks up the extent table lines appended by other processes.
+	"""
+
+	def __init__(self, root_dir, read_only=False):
+		self.__root_dir   = root_dir
+		self.__pack_file  = os.path.join(root_dir, 'buckets.pack')
+		self.__table_file = os.path.join(root_dir, 'buckets.table')
+		self.__read_only  = read_only
+		self.__lock       = threading.RLock()
+		self.__pack       = None
+		self.__table      = None
+		self.__extents    = {}
+		self.__free       = {}
+		self.__free_dirty = False
+		self.__end        = 0
+		self.__table_ino  = None
+		self.__table_size = 0
+		self.__table_lines = 0
+
+		with self.__lock:
+			self.__open()
+
+	def close(self):
+		with self.__lock:
+			if self.__pack is not None:
+				self.__pack.close()
+				self.__pack = None
+			if self.__table is not None:
+				self.__table.close()
+				self.__table = None
+
+	def delete(self, file):
+		if self.__read_only:
+			raise OSError("pack file is opened read-only")
+
+		with self.__lock, self.__flock(True):
+			self.__refresh(True)
+			file_id = self.__get_id(file)
+			if not file_id in self.__extents:
+				return
+			self.__append_to_table(file_id, 0, 0, False)
+			self.__free_extent(self.__extents.pop(file_id))
+
+	def exists(self, file):
+		with self.__lock, self.__flock(False):
+			self.__refresh(False)
+			return self.__get_id(file) in self.__extents
+
+	def list(self, folder):
+		with self.__lock, self.__flock(False):
+			self.__refresh(False)
+			files = [
+				os.path.join(self.__root_dir, file_id)
+				for file_id in sorted(self.__extents)
+			]
+
+		prefix = os.path.join(os.path.normpath(folder), '')
+		for file in files:
+			if file.startswith(prefix):
+				yield file
+
+	def load(self, file, offset=0, length=None):
+		with self.__lock, self.__flock(False):
+			extent_offset, extent_length, _ = self.__read_extent_header(file)
+			if length is None:
+				length = max(0, extent_length - offset)
+			if offset + length > extent_length:
+				raise OSError("range exceeds the file: " + str(file))
+			if offset > 0:
+				self.__pack.seek(extent_offset + _EXTENT.size + offset)
+			data = self.__pack.read(length)
+		if len(data) != length:
+			raise OSError("extent of file is truncated: " + str(file))
+		return data
+
+	def modified(self, file):
+		with self.__lock, self.__flock(False):
+			return self.__read_extent_header(file)[2] / 1000 / 1000 / 1000
+
+	def save(self, file, data, durable=False, sync=False):
+		if self.__read_only:
+			raise OSError("pack file is opened read-only")
+
+		with self.__lock, self.__flock(True):
+			self.__refresh(True)
+
+			file_id = self.__get_id(file)
+			extent  = self.__extents.get(file_id)
+			pages   = -(-(_EXTENT.size + len(data)) // _PAGE)
+			record  = _EXTENT.pack(len(data), time.time_ns()) + data
+
+			# overwrite the extent in place, if the data still fits
+			if extent is not None and not durable and extent[1] >= pages:
+				self.__write_extent(extent[0], record, sync)
+				return
+
+			pages_class = 1
+			while pages_class < pages:
+				pages_class *= 2
+
+			offset = self.__allocate(pages_class)
+			self.__write_extent(offset, record, sync)
+			self.__append_to_table(file_id, offset, pages_class, sync)
+			if extent is not None:
+				self.__free_extent(extent)
+			self.__extents[file_id] = (offset, pages_class)
+
+			if self.__table_lines > 2 * len(self.__extents) + 1024:
+				self.__compact_table()
+
+	def size(self, file):
+		with self.__lock, self.__flock(False):
+			return self.__read_extent_header(file)[1]
+
+	def stamp(self, file):
+		try:
+			with self.__lock, self.__flock(False):
+				offset, _, generation = self.__read_extent_header(file)
+		except OSError:
+			return None
+
+		return (offset, generation)
+
+	def __allocate(self, pages):
+		"""
+		Returns the offset of a free extent of 'pages' pages
+		"""
+
+		if self.__free_dirty:
+			self.__rebuild_free()
+
+		if self.__free.get(pages):
+			return self.__free[pages].pop()
+
+		offset     = self.__end
+		self.__end += pages * _PAGE
+		return offset
+
+	def __append_to_table(self, file_id, offset, pages, sync):
+		"""
+		Appends a line to the extent table
+		"""
+
+		line = (file_id + ' ' + str(offset) + ' ' + str(pages) + '\n').encode(
+			'UTF-8'
+		)
+		self.__table.write(line)
+		self.__table.flush()
+		if sync:
+			os.fsync(self.__table.fileno())
+
+		self.__table_size  += len(line)
+		self.__table_lines += 1
+
+	def __compact_table(self):
+		"""
+		Rewrites the extent table with one line per file
+		"""
+
+		with open(self.__table_file + '.tmp', 'wb') as f:
+			for file_id, (offset, pages) in sorted(self.__extents.items()):
+				f.write(
+					(
+						file_id + ' ' + str(offset) + ' ' + str(pages) + '\n'
+					).encode('UTF-8')
+				)
+			f.flush()
+			os.fsync(f.fileno())
+			f.close()
+		os.replace(self.__table_file + '.tmp', self.__table_file)
+
+		self.__table.close()
+		self.__table       = open(self.__table_file, 'ab')
+		stat               = os.fstat(self.__table.fileno())
+		self.__table_ino   = stat.st_ino
+		self.__table_size  = stat.st_size
+		self.__table_lines = len(self.__extents)
+
+	@contextmanager
+	def __flock(self, exclusive):
+		"""
+		Locks the pack file across processes (shared for reading)
+		"""
+
+		self.__open()
+		if fcntl is None:
+			yield
+			return
+
+		fcntl.flock(
+			self.__pack.fileno(),
+			fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+		)
+		try:
+			yield
+		finally:
+			fcntl.flock(self.__pack.fileno(), fcntl.LOCK_UN)
+
+	def __free_extent(self, extent):
+		"""
+		Marks the extent 'extent' ((offset, pages)) as free
+		"""
+
+		offset, pages = extent
+		if not pages in self.__free:
+			self.__free[pages] = []
+		self.__free[pages].append(offset)
+
+	def __get_id(self, file):
+		"""
+		Returns the path of the file 'file' relative to the kvs root directory
+		"""
+
+		return os.path.relpath(file, self.__root_dir)
+
+	def __open(self):
+		"""
+		Opens the pack file and the extent table (and creates them, if missing)
+		"""
+
+		if self.__pack is not None:
+			return
+
+		# unbuffered, so data written by other processes never gets missed
+		if self.__read_only:
+			self.__pack = open(self.__pack_file, 'rb', buffering=0)
+			return
+
+		if not os.path.exists(self.__pack_file):
+			open(self.__pack_file, 'ab').close()
+		self.__pack  = open(self.__pack_file, 'r+b', buffering=0)
+		self.__table = open(self.__table_file, 'ab')
+
+	def __read_extent_header(self, file):
+		"""
+		Returns the offset, the length of the data and the generation of the
+		extent of the file 'file' and positions the pack file at its data
+		"""
+
+		self.__refresh(False)
+
+		extent = self.__extents.get(self.__get_id(file))
+		if extent is None:
+			raise OSError("file does not exist: " + str(file))
+
+		self.__pack.seek(extent[0])
+		header = self.__pack.read(_EXTENT.size)
+		if len(header) != _EXTENT.size:
+			raise OSError("extent of file is truncated: " + str(file))
+
+		length, generation = _EXTENT.unpack(header)
+		return extent[0], length, generation
+
+	def __rebuild_free(self):
+		"""
+		Collects the gaps between all extents as free extents
+		"""
+
+		self.__free = {}
+		offset = 0
+		for extent_offset, pages in sorted(self.__extents.values()):
+			gap = (extent_offset - offset) // _PAGE
+			while gap > 0:
+				pages_class = 1
+				while pages_class * 2 <= gap:
+					pages_class *= 2
+				self.__free_extent((offset, pages_class))
+				offset += pages_class * _PAGE
+				gap    -= pages_class
+			offset = max(offset, extent_offset + pages * _PAGE)
+
+		self.__end        = offset
+		self.__free_dirty = False
+
+	def __refresh(self, exclusive):
+		"""
+		Applies the lines appended to the extent table by other processes. A
+		torn last line gets cut off, if the pack file is locked exclusively.
+		"""
+
+		try:
+			stat = os.stat(self.__table_file)
+		except OSError:
+			return
+
+		if stat.st_ino != self.__table_ino or stat.st_size < self.__table_size:
+			# the extent table got compacted (or replaced), reload it
+			self.__extents     = {}
+			self.__table_ino   = stat.st_ino
+			self.__table_size  = 0
+			self.__table_lines = 0
+			self.__free_dirty  = True
+
+		if stat.st_size > self.__table_size:
+			with open(self.__table_file, 'rb') as f:
+				f.seek(self.__table_size)
+				lines = f.read().split(b'\n')
+				f.close()
+			for line in lines[:-1]:
+				self.__table_size  += len(line) + 1
+				self.__table_lines += 1
+				try:
+					file_id, offset, pages = line.decode('UTF-8').rsplit(' ', 2)
+					offset, pages = int(offset), int(pages)
+				except:
+					continue
+				if pages == 0:
+					self.__extents.pop(file_id, None)
+				else:
+					self.__extents[file_id] = (offset, pages)
+				self.__free_dirty = True
+
+			if exclusive and lines[-1] != b'':
+				with open(self.__table_file, 'r+b') as f:
+					f.truncate(self.__table_size)
+					f.close()
+
+	def __write_extent(self, offset, record, sync):
+		"""
+		Writes the record 'record' (header and data) to the pack file
+		"""
+
+		self.__pack.seek(offset)
+		record = memoryview(record)
+		while len(record) > 0:
+			record = record[self.__pack.write(record):]
+		if sync:
+			os.fsync(self.__pack.fileno())
@@ -0,0 +1,544 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+
+# length of the json encoded request/response, which follows
+_FRAME         = struct.Struct('>I')
+_MAX_FRAME     = 256 * 1000 * 1000
+_FRAME_ERROR   = "frame exceeds the maximum frame size"
+# hosts a tcp server may be bound to (there is no authentication)
+_LOCAL_HOSTS   = ('127.0.0.1', '::1', 'localhost')
+# methods of FSHTBKVS (and the server) a client may call
+_METHODS       = (
+	'append',
+	'compare_and_swap',
+	'delete',
+	'delete_many',
+	'expire_kvs',
+	'get_entries',
+	'get_kvs_name',
+	'get_max_depth',
+	'incr',
+	'read',
+	'read_many',
+	'scan',
+	'setdefault',
+	'update',
+	'write',
+	'write_many'
+)
+
+def _get_result(response):
+	"""
+	Returns the result of the response 'response' or raises its error
+	"""
+
+	if response[0] == 1:
+		return response[1]
+	if response[1] == 'ValueError':
+		raise ValueError(response[2])
+
+	raise OSError(response[2])
+
+def _remove_stale_socket(path):
+	"""
+	Removes the socket file 'path', if it got left behind by a crashed
+	server. Raises an OSError, if something else is at 'path' or a server
+	still listens on it.
+	"""
+
+	try:
+		mode = os.stat(path).st_mode
+	except FileNotFoundError:
+		return
+
+	if not stat.S_ISSOCK(mode):
+		raise OSError("Not a socket file: " + str(path))
+
+	probe = socket.socket(socket.AF_UNIX)
+	try:
+		probe.connect(path)
+	except ConnectionRefusedError:
+		os.remove(path)
+		return
+	finally:
+		probe.close()
+
+	raise OSError("Address already in use: " + str(path))
+
+def _receive_frame(f):
+	"""
+	Reads a frame from the binary file 'f' and returns its decoded payload or
+	None, if the connection got closed
+	"""
+
+	header = f.read(_FRAME.size)
+	if len(header) < _FRAME.size:
+		return None
+
+	(length,) = _FRAME.unpack(header)
+	if length > _MAX_FRAME:
+		raise OSError(_FRAME_ERROR)
+
+	payload = f.read(length)
+	if len(payload) < length:
+		return None
+
+	return json.loads(payload.decode('UTF-8'))
+
+def _encode_frame(payload):
+	"""
+	Returns the payload 'payload' encoded as frame. Raises an OSError, if it
+	exceeds the maximum frame size, before anything gets sent.
+	"""
+
+	data = json.dumps(
+		payload,
+		ensure_ascii=False,
+		separators=(',', ':')
+	).encode('UTF-8')
+	if len(data) > _MAX_FRAME:
+		raise OSError(_FRAME_ERROR)
+
+	return _FRAME.pack(len(data)) + data
+
+class _FSHTBKVSRequestHandler(socketserver.StreamRequestHandler):
+	"""
+	Answers the requests of a single connection in the order they arrive, so
+	clients can pipeline them
+	"""
+
+	def handle(self):
+		while True:
+			try:
+				request = _receive_frame(self.rfile)
+			except:
+				return
+			if request is None:
+				return
+
+			# a response exceeding the maximum frame size becomes an error,
+			# so the connection stays in sync
+			try:
+				frame = _encode_frame(self.server.call(request))
+			except OSError as e:
+				frame = _encode_frame([-1, 'OSError', str(e)])
+
+			try:
+				self.wfile.write(frame)
+			except OSError:
+				return
+
+class _FSHTBKVSTCPServer(socketserver.ThreadingTCPServer):
+	allow_reuse_address = True
+	daemon_threads      = True
+
+if hasattr(socket, 'AF_UNIX'):
+	class _FSHTBKVSUnixServer(socketserver.ThreadingUnixStreamServer):
+		daemon_threads = True
+else:
+	# no unix domain sockets on this platform (e.g. older Windows)
+	_FSHTBKVSUnixServer = None
+
+class FSHTBKVSServer:
+	"""
+	Serves a single FSHTBKVS instance to FSHTBKVSClient connections over a unix
+	domain socket (if 'address' is a path) or a localhost tcp socket (if
+	'address' is a (host, port) tuple). All clients share the meta data, the
+	cache and the write path of that instance.
+	"""
+
+	def __init__(self, kvs, address):
+		self.__kvs          = kvs
+		self.__thread       = None
+		self.__socket_inode = None
+
+		if isinstance(address, str):
+			if _FSHTBKVSUnixServer is None:
+				raise ValueError("unix domain sockets are not supported")
+			_remove_stale_socket(address)
+			server_class = _FSHTBKVSUnixServer
+		elif isinstance(address, tuple) and len(address) == 2:
+			if address[0] not in _LOCAL_HOSTS:
+				raise ValueError("host must be one of " + str(_LOCAL_HOSTS))
+			server_class = _FSHTBKVSTCPServer
+			if ':' in address[0]:
+				server_class = type(
+					'_FSHTBKVSTCP6Server',
+					(_FSHTBKVSTCPServer,),
+					{'address_family': socket.AF_INET6}
+				)
+		else:
+			raise ValueError("address must be a path or a (host, port) tuple")
+
+		try:
+			self.__server = server_class(address, _FSHTBKVSRequestHandler)
+		except OSError:
+			raise OSError("Not able to bind to address: " + str(address))
+		self.__server.call = self.__call
+
+		# only the own socket file gets removed on close
+		if isinstance(address, str):
+			self.__socket_inode = os.stat(address).st_ino
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def close(self):
+		"""
+		Stops serving and closes the socket (the kvs stays open)
+		"""
+
+		if self.__thread is not None:
+			self.__server.shutdown()
+			self.__thread.join()
+			self.__thread = None
+		self.__server.server_close()
+
+		address = self.__server.server_address
+		if self.__socket_inode is not None:
+			try:
+				if os.stat(address).st_ino == self.__socket_inode:
+					os.remove(address)
+			except FileNotFoundError:
+				pass
+			self.__socket_inode = None
+
+		return 1
+
+	def get_address(self):
+		return self.__server.server_address
+
+	def serve_forever(self):
+		"""
+		Serves requests until close() gets called from another thread
+		"""
+
+		self.__server.serve_forever()
+
+	def start(self):
+		"""
+		Serves requests on a daemon thread
+		"""
+
+		if self.__thread is not None:
+			return 1
+
+		self.__thread = threading.Thread(
+			target=self.__server.serve_forever,
+			name='fshtbkvs-server-' + self.__kvs.get_kvs_name(),
+			daemon=True
+		)
+		self.__thread.start()
+
+		return 1
+
+	def __call(self, request):
+		"""
+		Runs the request 'request' ([method, args, kwargs]) against the kvs and
+		returns the response ([1, result] or [-1, error type, message])
+		"""
+
+		try:
+			method, args, kwargs = request
+			if method not in _METHODS:
+				raise ValueError("unknown method '" + str(method) + "'")
+			if method == 'scan' and set(kwargs) - {'prefix'}:
+				raise ValueError("scan only supports 'prefix' over a socket")
+
+			if method == 'read_many':
+				result = [self.__kvs.read(key) for key in args[0]]
+			elif method == 'delete_many':
+				with self.__kvs.batch() as batch:
+					for key in args[0]:
+						batch.delete(key)
+				result = 1
+			else:
+				result = getattr(self.__kvs, method)(*args, **kwargs)
+		except ValueError as e:
+			return [-1, 'ValueError', str(e)]
+		except Exception as e:
+			return [-1, 'OSError', str(e)]
+
+		return [1, result]
+
+class FSHTBKVSClient:
+	"""
+	Connects to a FSHTBKVSServer at 'address' and mirrors the FSHTBKVS API.
+	Errors of the server get raised as ValueError or OSError.
+	"""
+
+	def __init__(self, address, timeout=None):
+		try:
+			if isinstance(address, str):
+				self.__socket = socket.socket(socket.AF_UNIX)
+				self.__socket.settimeout(timeout)
+				self.__socket.connect(address)
+			else:
+				self.__socket = socket.create_connection(address, timeout)
+				# pipelined requests should not wait for each other
+				self.__socket.setsockopt(
+					socket.IPPROTO_TCP,
+					socket.TCP_NODELAY,
+					1
+				)
+		except OSError:
+			raise OSError("Not able to connect to address: " + str(address))
+
+		self.__file = self.__socket.makefile('rb')
+		self.__lock = threading.Lock()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def append(self, key, items):
+		return self.__request('append', key, items)
+
+	def close(self):
+		"""
+		Closes the connection
+		"""
+
+		self.__file.close()
+		self.__socket.close()
+
+		return 1
+
+	def compare_and_swap(self, key, expected, new):
+		return self.__request('compare_and_swap', key, expected, new)
+
+	def delete(self, key):
+		return self.__request('delete', key)
+
+	def delete_many(self, keys):
+		"""
+		Deletes the entries with the keys 'keys' all-or-nothing
+		"""
+
+		return self.__request('delete_many', list(keys))
+
+	def expire_kvs(self, now=None):
+		return self.__request('expire_kvs', now=now)
+
+	def get_entries(self):
+		return self.__request('get_entries')
+
+	def get_kvs_name(self):
+		return self.__request('get_kvs_name')
+
+	def get_max_depth(self):
+		return self.__request('get_max_depth')
+
+	def incr(self, key, delta=1):
+		return self.__request('incr', key, delta)
+
+	def iter(self, prefix=''):
+		"""
+		Yields all (processed) key value pairs, whose key starts with
+		'prefix'. Only one of the 16 subtrees below 'prefix' gets transferred
+		at a time, a subtree exceeding the maximum frame size gets split into
+		its 16 subtrees again.
+		"""
+
+		max_depth = None
+		for c in '0123456789abcdef':
+			try:
+				items = self.scan(prefix=prefix + c)
+			except OSError as e:
+				if str(e) != _FRAME_ERROR:
+					raise
+				items = None
+
+			if items is not None:
+				for key, value in items:
+					yield key, value
+				continue
+
+			# a key equal to the prefix is in none of the longer prefixes
+			# (shorter keys than max_depth get hashed)
+			if max_depth is None:
+				max_depth = self.get_max_depth()
+			if len(prefix + c) >= max_depth:
+				value = self.read(prefix + c)
+				if value is not None:
+					yield prefix + c, value
+			for key, value in self.iter(prefix + c):
+				yield key, value
+
+	def pipeline(self):
+		"""
+		Returns a pipeline, which sends all queued requests at once and reads
+		their responses afterwards
+		"""
+
+		return FSHTBKVSPipeline(self.__execute)
+
+	def read(self, key):
+		return self.__request('read', key)
+
+	def read_many(self, keys):
+		"""
+		Returns the values of the keys 'keys' as list (None for every key
+		without entry)
+		"""
+
+		return self.__request('read_many', list(keys))
+
+	def scan(self, prefix=None):
+		"""
+		Returns all (processed) key value pairs, whose key starts with
+		'prefix'. Predicates and functions can not be sent over a socket.
+		"""
+
+		return [tuple(item) for item in self.__request('scan', prefix=prefix)]
+
+	def setdefault(self, key, value):
+		return self.__request('setdefault', key, value)
+
+	def update(self, key, partial_dict):
+		return self.__request('update', key, partial_dict)
+
+	def write(self, key, value, ttl=None):
+		return self.__request('write', key, value, ttl=ttl)
+
+	def write_many(self, items, ttl=None):
+		"""
+		Adds (or updates) all entries of 'items' (a dict or (key, value)
+		pairs) all-or-nothing
+		"""
+
+		if isinstance(items, dict):
+			items = items.items()
+
+		return self.__request(
+			'write_many',
+			[list(item) for item in items],
+			ttl=ttl
+		)
+
+	def __execute(self, requests):
+		"""
+		Sends the requests 'requests' at once and returns their responses in
+		the same order. A failed exchange closes the connection, since it
+		would be out of sync afterwards.
+		"""
+
+		data = b''.join(_encode_frame(request) for request in requests)
+
+		with self.__lock:
+			if self.__socket.fileno() == -1:
+				raise OSError("Connection to the server is closed")
+
+			# the server answers while the requests still get sent, so a
+			# large pipeline has to be sent and read at the same time
+			sender = None
+			try:
+				if len(requests) == 1:
+					self.__socket.sendall(data)
+				else:
+					sender = threading.Thread(
+						target=self.__send,
+						args=(data,),
+						daemon=True
+					)
+					sender.start()
+				responses = [_receive_frame(self.__file) for _ in requests]
+			except OSError:
+				responses = [None]
+
+			if sender is not None:
+				if None in responses:
+					# unblock the sender
+					try:
+						self.__socket.shutdown(socket.SHUT_RDWR)
+					except OSError:
+						pass
+				sender.join()
+
+			if None in responses:
+				self.close()
+				raise OSError("Connection to the server failed")
+
+		return responses
+
+	def __send(self, data):
+		"""
+		Sends 'data' to the server (the receiving side notices failures)
+		"""
+
+		try:
+			self.__socket.sendall(data)
+		except OSError:
+			pass
+
+	def __request(self, method, *args, **kwargs):
+		"""
+		Runs the method 'method' on the server and returns its result
+		"""
+
+		return _get_result(self.__execute([[method, args, kwargs]])[0])
+
+class FSHTBKVSPipeline:
+	"""
+	Queues requests for FSHTBKVSClient.pipeline() and sends them at once, when
+	execute() gets called or the with block is left without an exception
+	"""
+
+	def __init__(self, execute):
+		self.__execute  = execute
+		self.__requests = []
+		self.__results  = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		if exc_type is None and self.__requests != []:
+			self.execute()
+
+		return False
+
+	def __getattr__(self, method):
+		if method not in _METHODS:
+			raise AttributeError(method)
+
+		def queue(*args, **kwargs):
+			self.__requests.append([method, args, kwargs])
+			return self
+
+		return queue
+
+	def execute(self):
+		"""
+		Sends all queued requests and returns their results in order. The
+		first error gets raised after all responses got read.
+		"""
+
+		requests        = self.__requests
+		self.__requests = []
+
+		self.__results = []
+		errors         = []
+		for response in self.__execute(requests):
+			try:
+				self.__results.append(_get_result(response))
+			except (ValueError, OSError) as e:
+				self.__results.append(None)
+				errors.append(e)
+		if errors != []:
+			raise errors[0]
+
+		return self.__results
+
+	def get_results(self):
+		return self.__results
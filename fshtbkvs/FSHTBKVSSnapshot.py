@@ -0,0 +1,236 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+# magic, version, max_depth, entries, slots, offset of the hash directory
+_HEADER        = struct.Struct('<8sIIQQQ')
+# key hash, offset of the record (0 marks an empty slot)
+_SLOT          = struct.Struct('<QQ')
+# length of the key, length of the value
+_RECORD        = struct.Struct('<HI')
+_MAGIC         = b'FSHTBKVS'
+_VERSION       = 1
+
+def _hash_key(key_encoded):
+	"""
+	Returns the 64 bit hash of the encoded (processed) key 'key_encoded'
+	"""
+
+	return int.from_bytes(
+		hashlib.blake2b(key_encoded, digest_size=8).digest(),
+		'little'
+	)
+
+def _process_key(key, max_depth):
+	"""
+	Processes the key 'key' the same way FSHTBKVS does for a kvs with the
+	depth 'max_depth'
+	"""
+
+	if len(key) < max_depth:
+		return hashlib.sha256(bytes(key, 'utf-8')).hexdigest()
+
+	for c in key:
+		if c not in '0123456789abcdef':
+			return hashlib.sha256(bytes(key, 'utf-8')).hexdigest()
+
+	return key
+
+def _write_snapshot(path, max_depth, items):
+	"""
+	Writes the (processed) key value pairs 'items' as snapshot file 'path'.
+	The file gets replaced atomically and returns the number of entries.
+	"""
+
+	path_tmp = path + '.tmp'
+	slots    = []
+
+	try:
+		with open(path_tmp, 'wb') as f:
+			f.write(_HEADER.pack(_MAGIC, _VERSION, max_depth, 0, 0, 0))
+			offset = _HEADER.size
+			for key, value in items:
+				key_encoded   = key.encode('utf-8')
+				value_encoded = json.dumps(
+					value,
+					ensure_ascii=False,
+					separators=(',', ':')
+				).encode('utf-8')
+				slots.append((_hash_key(key_encoded), offset))
+				f.write(_RECORD.pack(len(key_encoded), len(value_encoded)))
+				f.write(key_encoded)
+				f.write(value_encoded)
+				offset += _RECORD.size + len(key_encoded) + len(value_encoded)
+
+			# open addressing with linear probing (load factor <= 0.5)
+			n_slots = 1
+			while n_slots < 2 * len(slots):
+				n_slots *= 2
+			directory = [(0, 0)] * n_slots
+			for key_hash, record_offset in slots:
+				i = key_hash & (n_slots - 1)
+				while directory[i][1] != 0:
+					i = (i + 1) & (n_slots - 1)
+				directory[i] = (key_hash, record_offset)
+			for slot in directory:
+				f.write(_SLOT.pack(*slot))
+
+			f.seek(0)
+			f.write(
+				_HEADER.pack(
+					_MAGIC,
+					_VERSION,
+					max_depth,
+					len(slots),
+					n_slots,
+					offset
+				)
+			)
+			f.flush()
+			os.fsync(f.fileno())
+			f.close()
+		os.replace(path_tmp, path)
+	except:
+		if os.path.exists(path_tmp):
+			os.remove(path_tmp)
+		raise OSError("Not able to write snapshot to file: " + str(path))
+
+	return len(slots)
+
+class FSHTBKVSSnapshot:
+	"""
+	Read-only view of an immutable snapshot file written by
+	FSHTBKVS.snapshot(). The file gets memory-mapped, so opening it is a single
+	mmap call, a lookup only decodes the requested record and the pages are
+	shared with every other process reading the same snapshot.
+	"""
+
+	def __init__(self, path):
+		try:
+			with open(path, 'rb') as f:
+				self.__mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+				f.close()
+		except:
+			raise OSError("Not able to open snapshot file: " + str(path))
+
+		if len(self.__mm) < _HEADER.size:
+			self.__mm.close()
+			raise OSError("Not a snapshot file: " + str(path))
+
+		(
+			magic,
+			version,
+			self.__max_depth,
+			self.__entries,
+			self.__slots,
+			self.__directory
+		) = _HEADER.unpack_from(self.__mm, 0)
+
+		if magic != _MAGIC or version != _VERSION:
+			self.__mm.close()
+			raise OSError("Not a snapshot file: " + str(path))
+
+		self.__path = path
+
+	def __contains__(self, key):
+		return self.__lookup(key) is not None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def __iter__(self):
+		"""
+		Yields all (processed) key value pairs in the order of the kvs
+		"""
+
+		offset = _HEADER.size
+		while offset < self.__directory:
+			key_length, value_length = _RECORD.unpack_from(self.__mm, offset)
+			offset += _RECORD.size
+			key     = self.__mm[offset:offset + key_length].decode('utf-8')
+			offset += key_length
+			value   = json.loads(self.__mm[offset:offset + value_length])
+			offset += value_length
+			yield key, value
+
+	def __len__(self):
+		return self.__entries
+
+	def close(self):
+		"""
+		Unmaps the snapshot file
+		"""
+
+		self.__mm.close()
+
+	def get_entries(self):
+		return self.__entries
+
+	def get_max_depth(self):
+		return self.__max_depth
+
+	def get_path(self):
+		return self.__path
+
+	def read(self, key):
+		"""
+		Returns the value of the key 'key' or None, if there is no entry
+		"""
+
+		position = self.__lookup(key)
+		if position is None:
+			return None
+
+		offset, value_length = position
+		return json.loads(self.__mm[offset:offset + value_length])
+
+	def read_many(self, keys):
+		"""
+		Returns the values of the keys 'keys' as list (None for every key
+		without entry)
+		"""
+
+		return [self.read(key) for key in keys]
+
+	def __lookup(self, key):
+		"""
+		Returns the offset and the length of the value of the key 'key' or
+		None, if there is no entry
+		"""
+
+		if not isinstance(key, str):
+			raise ValueError("key must be of type <class 'str'>")
+		if key == '':
+			raise ValueError("key must not be empty")
+		if len(key) > 64:
+			raise ValueError("key max length is 64 characters")
+
+		if self.__slots == 0:
+			return None
+
+		key_encoded = _process_key(key, self.__max_depth).encode('utf-8')
+		key_hash    = _hash_key(key_encoded)
+		mask        = self.__slots - 1
+
+		i = key_hash & mask
+		while True:
+			slot_hash, offset = _SLOT.unpack_from(
+				self.__mm,
+				self.__directory + i * _SLOT.size
+			)
+			if offset == 0:
+				return None
+			if slot_hash == key_hash:
+				key_length, value_length = _RECORD.unpack_from(
+					self.__mm,
+					offset
+				)
+				offset += _RECORD.size
+				if self.__mm[offset:offset + key_length] == key_encoded:
+					return offset + key_length, value_length
+			i = (i + 1) & mask
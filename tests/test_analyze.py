@@ -0,0 +1,70 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSAnalyze(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_analyze'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_analyze_kvs(self):
+		"""
+		Test if the occupancy report reflects skewed passed through keys
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		with kvs.batch() as batch:
+			for i in range(64):
+				batch.write('key ' + str(i), i)
+			for i in range(32):
+				batch.write('ff' + format(i, '04x'), i)
+
+		report = kvs.analyze_kvs(workers=2)
+		self.assertEqual(report['buckets'], 256)
+		self.assertEqual(report['analyzed'], 256)
+		self.assertEqual(report['entries'], 96)
+		self.assertEqual(sum(report['entries_histogram'].values()), 256)
+		self.assertEqual(report['keys']['hashed'], 64)
+		self.assertEqual(report['keys']['pass_through'], 32)
+		self.assertEqual(report['hot_buckets'][0]['bucket'], 'f/f.json')
+		self.assertGreaterEqual(report['hot_buckets'][0]['entries'], 32)
+
+		self.assertEqual(sorted(report['depths']), [1, 2, 3, 4, 5, 6])
+		self.assertEqual(report['depths'][2]['files'], 256)
+		self.assertGreaterEqual(report['depths'][2]['entries_max'], 32)
+		# the passed through keys share the bucket 'ff00' up to depth 4
+		self.assertGreaterEqual(report['depths'][4]['entries_max'], 32)
+		self.assertEqual(report['depths'][6]['entries_max'], 1)
+		self.assertEqual(report['recommended_max_depth'], 1)
+
+	def test_001_analyze_kvs_sampled(self):
+		"""
+		Test if a sampled analysis extrapolates the numbers
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		report = kvs.analyze_kvs(sample=16, target_bucket_bytes=0)
+		self.assertEqual(report['buckets'], 256)
+		self.assertEqual(report['analyzed'], 16)
+		self.assertEqual(report['entries'], 0)
+		self.assertEqual(report['entries_histogram'], {0: 16})
+		self.assertEqual(report['hot_buckets'], [])
+		self.assertEqual(report['recommended_max_depth'], 1)
+
+if __name__ == '__main__':
+	unittest.main()
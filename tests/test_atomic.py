@@ -0,0 +1,129 @@
+import os
+import shutil
+import threading
+import unittest
+from multiprocessing import Process
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+def incr_in_process(kvs_root, kvs_name, n):
+	kvs = FSHTBKVS(kvs_root, kvs_name)
+	for i in range(n):
+		kvs.incr('counter')
+
+class TestFSHTBKVSAtomic(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_atomic'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_incr(self):
+		"""
+		Test if numbers can be incremented
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.incr('counter'), 1)
+		self.assertEqual(kvs.incr('counter', 41), 42)
+		self.assertEqual(kvs.incr('counter', -0.5), 41.5)
+		self.assertEqual(kvs.read('counter'), 41.5)
+		self.assertEqual(kvs.get_entries(), 1)
+
+		kvs.write('FSHTBKVS', 'is awesome!')
+		with self.assertRaises(ValueError):
+			kvs.incr('FSHTBKVS')
+		with self.assertRaises(ValueError):
+			kvs.incr('counter', True)
+
+	def test_001_update_and_append(self):
+		"""
+		Test if dicts can be updated and lists can be appended
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.update('car', {'brand': 'Ford'}), {'brand': 'Ford'})
+		self.assertEqual(
+			kvs.update('car', {'model': 'Mustang', 'year': 1964}),
+			{'brand': 'Ford', 'model': 'Mustang', 'year': 1964}
+		)
+		with self.assertRaises(ValueError):
+			kvs.update('car', {0: 0})
+
+		self.assertEqual(kvs.append('frameworks', ['Django']), ['Django'])
+		self.assertEqual(
+			kvs.append('frameworks', ['Bottle', 'Flask']),
+			['Django', 'Bottle', 'Flask']
+		)
+		with self.assertRaises(ValueError):
+			kvs.append('car', ['Rimac'])
+
+		self.assertEqual(kvs.get_entries(), 2)
+
+	def test_002_setdefault_and_compare_and_swap(self):
+		"""
+		Test if values can be set by default and swapped conditionally
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.setdefault('FSHTBKVS', 'is awesome!'), 'is awesome!')
+		self.assertEqual(kvs.setdefault('FSHTBKVS', 'is boring!'), 'is awesome!')
+
+		self.assertEqual(
+			kvs.compare_and_swap('FSHTBKVS', 'is boring!', 'is slow!'),
+			False
+		)
+		self.assertEqual(
+			kvs.compare_and_swap('FSHTBKVS', 'is awesome!', 'is fast!'),
+			True
+		)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is fast!')
+		self.assertEqual(kvs.compare_and_swap('ffffff', None, 1337), True)
+		self.assertEqual(kvs.read('ffffff'), 1337)
+		self.assertEqual(kvs.get_entries(), 2)
+
+	def test_003_concurrent_incr(self):
+		"""
+		Test if concurrent increments of threads and processes are not lost
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		processes = [
+			Process(
+				target=incr_in_process,
+				args=(self.kvs_root, self.kvs_name, 50)
+			) for n in range(2)
+		]
+		threads = [
+			threading.Thread(
+				target=lambda: [kvs.incr('counter') for i in range(50)]
+			) for n in range(2)
+		]
+		for t in processes + threads:
+			t.start()
+		for t in processes + threads:
+			t.join()
+
+		self.assertEqual(kvs.read('counter'), 200)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,135 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+from fshtbkvs.FSHTBKVSBackend import FSHTBKVSPackedBackend
+
+class TestFSHTBKVSBackend(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_backend'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_packed_kvs_created(self):
+		"""
+		Test if a packed kvs consists of a handful of files only
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			backend='packed'
+		)
+
+		self.assertEqual(
+			sorted(os.listdir(self.kvs_path)),
+			['buckets.pack', 'buckets.table', 'meta.json']
+		)
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs.delete('ffffff'), 1)
+		self.assertEqual(kvs.read('ffffff'), None)
+		self.assertEqual(kvs.verify_kvs(workers=2)['corrupt'], [])
+
+		# the backend gets detected when reopening the kvs
+		kvs = FSHTBKVS(self.kvs_root, self.kvs_name)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs.get_entries(), 1)
+		self.assertFalse(os.path.exists(os.path.join(self.kvs_path, '6')))
+
+	def test_001_packed_kvs_shared(self):
+		"""
+		Test if writes of one instance are visible to another one
+		"""
+		kvs_0 = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			backend='packed',
+			cache_entries=16
+		)
+		kvs_1 = FSHTBKVS(self.kvs_root, self.kvs_name)
+
+		self.assertEqual(kvs_0.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs_1.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs_0.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs_1.write('FSHTBKVS', 'is really awesome!'), 1)
+		self.assertEqual(kvs_0.read('FSHTBKVS'), 'is really awesome!')
+		self.assertEqual(kvs_1.write('FSHTBKVS', 'x' * 1000), 1)
+		self.assertEqual(kvs_0.read('FSHTBKVS'), 'x' * 1000)
+		self.assertEqual(kvs_0.write('ffffff', 1337), 1)
+		self.assertEqual(kvs_1.read('ffffff'), 1337)
+
+	def test_002_packed_kvs_maintained(self):
+		"""
+		Test if a packed kvs restores its meta file and wipes all entries
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			backend='packed'
+		)
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		os.remove(os.path.join(self.kvs_path, 'meta.json'))
+		kvs = FSHTBKVS(self.kvs_root, self.kvs_name)
+		self.assertEqual(kvs.get_max_depth(), 2)
+		self.assertEqual(kvs.get_entries(), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+
+		self.assertEqual(kvs.wipe_kvs(), True)
+		self.assertEqual(kvs.read('FSHTBKVS'), None)
+		self.assertEqual(kvs.get_entries(), 0)
+
+	def test_003_packed_backend_reuses_extents(self):
+		"""
+		Test if the packed backend reuses freed extents and compacts its
+		extent table
+		"""
+		os.makedirs(self.kvs_path)
+		backend  = FSHTBKVSPackedBackend(self.kvs_path)
+		file_0   = os.path.join(self.kvs_path, '0.json')
+		file_1   = os.path.join(self.kvs_path, '1.json')
+
+		backend.save(file_0, b'{}')
+		backend.save(file_0, b'x' * 100)
+		self.assertEqual(backend.load(file_0), b'x' * 100)
+		# the first extent is free now
+		backend.save(file_1, b'{}')
+		self.assertEqual(backend.stamp(file_1)[0], 0)
+		self.assertEqual(
+			list(backend.list(self.kvs_path)),
+			[file_0, file_1]
+		)
+
+		# durable writes always get a new extent
+		for i in range(3000):
+			backend.save(file_1, b'{}', durable=True)
+		self.assertEqual(backend.load(file_1), b'{}')
+		self.assertLess(
+			os.path.getsize(os.path.join(self.kvs_path, 'buckets.pack')),
+			1024
+		)
+		with open(os.path.join(self.kvs_path, 'buckets.table'), 'rb') as f:
+			self.assertLess(len(f.read().split(b'\n')), 2000)
+			f.close()
+
+		backend.delete(file_0)
+		self.assertFalse(backend.exists(file_0))
+		with self.assertRaises(OSError):
+			backend.load(file_0)
+		backend.close()
+
+		backend = FSHTBKVSPackedBackend(self.kvs_path)
+		self.assertEqual(list(backend.list(self.kvs_path)), [file_1])
+		backend.close()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,195 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSBatch(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_batch'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_batch_commit(self):
+		"""
+		Test if the staged operations of a batch get applied at once
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('ffff00', 4711), 1)
+
+		with kvs.batch() as batch:
+			self.assertEqual(batch.write('FSHTBKVS', 'is awesome!'), 1)
+			self.assertEqual(batch.write('ffffff', 1337), 1)
+			self.assertEqual(batch.delete('ffff00'), 1)
+			self.assertEqual(kvs.read('ffffff'), None)
+
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs.read('ffffff'), 1337)
+		self.assertEqual(kvs.read('ffff00'), None)
+		self.assertEqual(kvs.get_entries(), 2)
+		self.assertFalse(
+			os.path.exists(os.path.join(self.kvs_path, 'batch.json'))
+		)
+
+	def test_001_batch_rollback(self):
+		"""
+		Test if nothing gets applied when the with block raises an exception
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		with self.assertRaises(ValueError):
+			with kvs.batch() as batch:
+				batch.write('ffffff', 1337)
+				batch.write('the_first_dict', {0: 0})
+
+		self.assertEqual(kvs.read('ffffff'), None)
+		self.assertEqual(kvs.get_entries(), 0)
+
+	def test_002_batch_replay(self):
+		"""
+		Test if a batch interrupted by a crash gets completed on opening
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('ffff00', 4711), 1)
+
+		# crash after the commit record and the first json file got written
+		path_to_file = os.path.join(self.kvs_path, 'batch.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write(json.dumps({
+				'entries': 2,
+				'ops': [
+					['put', 'ffffff', 1337],
+					['delete', 'ffff00'],
+					['put', '60bf', 'is awesome!']
+				]
+			}))
+			f.close()
+		path_to_file = os.path.join(self.kvs_path, 'f/f.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write('{"ffffff": 1337}')
+			f.close()
+
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs.read('ffffff'), 1337)
+		self.assertEqual(kvs.read('ffff00'), None)
+		self.assertEqual(kvs.read('60bf'), 'is awesome!')
+		self.assertEqual(kvs.get_entries(), 2)
+
+	def test_003_batch_wal(self):
+		"""
+		Test if a batch gets committed as a single write-ahead log record
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True
+		)
+
+		with kvs.batch() as batch:
+			batch.write('FSHTBKVS', 'is awesome!')
+			batch.write('ffffff', 1337)
+
+		with open(os.path.join(self.kvs_path, 'wal.log'), 'r') as f:
+			lines = f.readlines()
+			f.close()
+		self.assertEqual(len(lines), 1)
+
+		self.assertEqual(kvs.read('ffffff'), 1337)
+		self.assertEqual(kvs.get_entries(), 2)
+		self.assertEqual(kvs.close(), 1)
+
+	def test_004_batch_replay_waits_for_commit(self):
+		"""
+		Test if a batch, which is committed right now, does not get replayed
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		# another process holds the lock while committing
+		fd = os.open(os.path.join(self.kvs_path, 'kvs.lock'), os.O_RDWR)
+		fcntl.flock(fd, fcntl.LOCK_EX)
+		path_to_file = os.path.join(self.kvs_path, 'batch.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write(json.dumps({'entries': 1, 'ops': [['delete', 'ffffff']]}))
+			f.close()
+
+		opened = []
+		thread = threading.Thread(
+			target=lambda: opened.append(
+				FSHTBKVS(self.kvs_root, self.kvs_name)
+			)
+		)
+		thread.start()
+		time.sleep(0.2)
+		self.assertEqual(opened, [])
+
+		# the commit finishes and the record gets removed
+		os.remove(path_to_file)
+		fcntl.flock(fd, fcntl.LOCK_UN)
+		os.close(fd)
+		thread.join()
+
+		self.assertEqual(opened[0].read('ffffff'), 1337)
+
+	def test_005_batch_replay_before_write(self):
+		"""
+		Test if open instances apply a crashed batch before they write
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('ffff00', 4711), 1)
+
+		# another process crashed after writing the commit record
+		path_to_file = os.path.join(self.kvs_path, 'batch.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write(json.dumps({'entries': 2, 'ops': [['put', 'ffaa', 2]]}))
+			f.close()
+
+		self.assertEqual(kvs.write('ffaa', 3), 1)
+		self.assertFalse(os.path.exists(path_to_file))
+
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.read('ffaa'), 3)
+		self.assertEqual(kvs.get_entries(), 2)
+
+if __name__ == '__main__':
+	unittest.main()
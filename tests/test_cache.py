@@ -0,0 +1,99 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSCache(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_cache'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_cache_hits(self):
+		"""
+		Test if repeated reads are served from the cache
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			cache_entries=16
+		)
+
+		the_first_list = ['Django', 'Bottle', 'Flask']
+		self.assertEqual(kvs.write('the_first_list', the_first_list), 1)
+
+		self.assertEqual(kvs.read('the_first_list'), the_first_list)
+		value = kvs.read('the_first_list')
+		self.assertEqual(value, the_first_list)
+		self.assertEqual(kvs.read('1337'), None)
+		self.assertEqual(kvs.read('1337'), None)
+
+		stats = kvs.get_cache_stats()
+		self.assertEqual(stats['hits'], 2)
+		self.assertEqual(stats['misses'], 2)
+		self.assertEqual(stats['entries'], 2)
+
+		# cached values can not be modified by the caller
+		value.append('Pyramid')
+		self.assertEqual(kvs.read('the_first_list'), the_first_list)
+
+	def test_001_cache_invalidation(self):
+		"""
+		Test if writes of this and other instances invalidate the cache
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			cache_entries=16
+		)
+		kvs_other = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs.read('FSHTBKVS'), None)
+		self.assertEqual(kvs_other.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is fast!'), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is fast!')
+
+		self.assertEqual(kvs_other.delete('FSHTBKVS'), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), None)
+
+	def test_002_cache_limits(self):
+		"""
+		Test if the cache evicts entries beyond its limits
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			cache_entries=4,
+			cache_bytes=100,
+			cache_negative=False
+		)
+
+		for i in range(8):
+			kvs.write(str(i) + 'fff', i)
+			kvs.read(str(i) + 'fff')
+		kvs.read('1337')
+		self.assertEqual(kvs.get_cache_stats()['entries'], 4)
+
+		kvs.write('the_first_string', 'x' * 200)
+		kvs.read('the_first_string')
+		self.assertEqual(kvs.get_cache_stats()['entries'], 4)
+		self.assertTrue(kvs.get_cache_stats()['bytes'] <= 100)
+
+		self.assertEqual(kvs.clear_cache(), 1)
+		self.assertEqual(kvs.get_cache_stats()['entries'], 0)
+
+if __name__ == '__main__':
+	unittest.main()
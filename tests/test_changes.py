@@ -0,0 +1,149 @@
+import os
+import shutil
+import threading
+import time
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSChanges(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_changes'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_changes(self):
+		"""
+		Test if puts and deletes get recorded in order
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			change_feed=True,
+			change_segment_size=2
+		)
+
+		kvs.write('ffffff', 1337)
+		kvs.incr('ffff00')
+		kvs.delete('ffffff')
+		kvs.delete('ffffff')
+		with kvs.batch() as batch:
+			batch.write('0000', 0)
+			batch.write('0001', 1)
+
+		self.assertEqual(
+			list(kvs.changes()),
+			[
+				{'seq': 1, 'op': 'put', 'key': 'ffffff'},
+				{'seq': 2, 'op': 'put', 'key': 'ffff00'},
+				{'seq': 3, 'op': 'delete', 'key': 'ffffff'},
+				{'seq': 4, 'op': 'put', 'key': '0000'},
+				{'seq': 5, 'op': 'put', 'key': '0001'}
+			]
+		)
+		self.assertEqual(
+			[c['seq'] for c in kvs.changes(since=3)],
+			[4, 5]
+		)
+
+		# other instances continue the sequence
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.get_change_seq(), 5)
+		kvs.write('0002', 2)
+		self.assertEqual(
+			list(kvs.changes(since=5)),
+			[{'seq': 6, 'op': 'put', 'key': '0002'}]
+		)
+
+	def test_001_truncate_changes(self):
+		"""
+		Test if old change segments can be truncated and retained
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			change_feed=True,
+			change_segment_size=2
+		)
+
+		for i in range(6):
+			kvs.write('000' + str(i), i)
+
+		self.assertEqual(kvs.truncate_changes(before=4), 1)
+		self.assertEqual([c['seq'] for c in kvs.changes()], [3, 4, 5, 6])
+
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			change_segment_size=2,
+			change_retention=3
+		)
+		for i in range(3):
+			kvs.write('001' + str(i), i)
+		self.assertEqual([c['seq'] for c in kvs.changes()], [5, 6, 7, 8, 9])
+
+	def test_002_wait_for_changes(self):
+		"""
+		Test if subscribers can block and wait for new changes
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			change_feed=True
+		)
+
+		received = []
+		def subscriber():
+			for change in kvs.changes(wait=True, timeout=2):
+				received.append(change['key'])
+				if len(received) == 2:
+					break
+
+		t = threading.Thread(target=subscriber)
+		t.start()
+		time.sleep(0.1)
+		kvs.write('ffffff', 1337)
+		kvs.delete('ffffff')
+		t.join(5)
+
+		self.assertFalse(t.is_alive())
+		self.assertEqual(received, ['ffffff', 'ffffff'])
+
+	def test_003_enabled_by_other_instance(self):
+		"""
+		Test if open instances record changes, once another one enabled them
+		"""
+		kvs_a = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+		kvs_b = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			change_feed=True
+		)
+
+		kvs_a.write('ffffff', 1337)
+		kvs_b.write('ffff00', 4711)
+
+		self.assertEqual(
+			list(kvs_b.changes()),
+			[
+				{'seq': 1, 'op': 'put', 'key': 'ffffff'},
+				{'seq': 2, 'op': 'put', 'key': 'ffff00'}
+			]
+		)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSIndex(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_index'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_create_index(self):
+		"""
+		Test if an index gets built from existing entries and persisted
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		kvs.write('0001', {'status': 'active', 'user': {'id': 1}})
+		kvs.write('0002', {'status': 'banned', 'user': {'id': 2}})
+		kvs.write('0003', {'status': 'active', 'user': {'id': 3}})
+		kvs.write('0004', 'no dict at all')
+
+		self.assertEqual(kvs.create_index('status', workers=2), 1)
+		self.assertEqual(kvs.create_index('user.id'), 1)
+		self.assertEqual(kvs.get_indexes(), ['status', 'user.id'])
+
+		self.assertEqual(kvs.find('status', 'active'), ['0001', '0003'])
+		self.assertEqual(kvs.find('user.id', 2), ['0002'])
+		self.assertEqual(kvs.find('status', 'deleted'), [])
+		with self.assertRaises(ValueError):
+			kvs.find('brand', 'Ford')
+
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.get_indexes(), ['status', 'user.id'])
+		self.assertEqual(kvs.find('status', 'banned'), ['0002'])
+
+	def test_001_maintain_index(self):
+		"""
+		Test if writes, deletes and batches keep the index up to date
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.create_index('status'), 1)
+
+		kvs.write('0001', {'status': 'active'})
+		kvs.write('0002', {'status': 'active'})
+		self.assertEqual(kvs.find('status', 'active'), ['0001', '0002'])
+
+		kvs.write('0002', {'status': 'banned'})
+		kvs.update('0003', {'status': 'banned'})
+		self.assertEqual(kvs.find('status', 'active'), ['0001'])
+		self.assertEqual(kvs.find('status', 'banned'), ['0002', '0003'])
+
+		kvs.delete('0003')
+		with kvs.batch() as batch:
+			batch.delete('0001')
+			batch.write('0004', {'status': 'banned'})
+		self.assertEqual(kvs.find('status', 'active'), [])
+		self.assertEqual(kvs.find('status', 'banned'), ['0002', '0004'])
+
+		self.assertEqual(kvs.drop_index('status'), 1)
+		self.assertEqual(kvs.get_indexes(), [])
+
+	def test_002_index_created_by_other_instance(self):
+		"""
+		Test if an index created by another instance gets maintained
+		"""
+		kvs_a = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+		kvs_b = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs_b.create_index('status'), 1)
+		self.assertEqual(kvs_a.write('ticket 1', {'status': 'open'}), 1)
+		self.assertEqual(kvs_a.get_indexes(), ['status'])
+		self.assertEqual(
+			kvs_b.find('status', 'open'),
+			[kvs_a.scan()[0][0]]
+		)
+
+		self.assertEqual(kvs_b.drop_index('status'), 1)
+		self.assertEqual(kvs_a.get_indexes(), [])
+
+	def test_003_wipe_index_created_by_other_instance(self):
+		"""
+		Test if a wipe empties indexes created by another instance
+		"""
+		kvs_x = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+		kvs_y = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs_y.create_index('s'), 1)
+		self.assertEqual(kvs_y.write('ffdd', {'s': 'a'}), 1)
+		self.assertEqual(kvs_x.wipe_kvs(), 1)
+
+		self.assertEqual(kvs_y.find('s', 'a'), [])
+		self.assertEqual(kvs_y.read('ffdd'), None)
+
+if __name__ == '__main__':
+	unittest.main()
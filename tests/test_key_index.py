@@ -0,0 +1,119 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSKeyIndex(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_key_index'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_key_index_written(self):
+		"""
+		Test if a key index file gets written next to every json file and
+		the json files stay unchanged
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			key_index=True
+		)
+
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.write('ffff00', {'name': 'Ünïcode'}), 1)
+		self.assertTrue(
+			os.path.exists(os.path.join(self.kvs_path, 'f/f.idx'))
+		)
+		with open(
+			os.path.join(self.kvs_path, 'f/f.json'),
+			'r',
+			encoding='UTF-8'
+		) as f:
+			data = f.read()
+			f.close()
+		self.assertEqual(
+			data,
+			'{"ffffff": 1337, "ffff00": {"name": "Ünïcode"}}'
+		)
+
+		self.assertEqual(kvs.read('ffff00'), {'name': 'Ünïcode'})
+		self.assertEqual(kvs.read('ffffff'), 1337)
+		self.assertEqual(kvs.read('ffff11'), None)
+		self.assertEqual(kvs.delete('ffffff'), 1)
+		self.assertEqual(kvs.read('ffffff'), None)
+		self.assertEqual(kvs.read('ffff00'), {'name': 'Ünïcode'})
+
+		# the key index stays enabled for the kvs
+		kvs = FSHTBKVS(self.kvs_root, self.kvs_name)
+		self.assertEqual(kvs.write('ffffff', 4711), 1)
+		self.assertEqual(kvs.read('ffffff'), 4711)
+
+	def test_001_key_index_outdated(self):
+		"""
+		Test if an outdated or lost key index falls back to decoding the whole
+		json file and gets rebuilt by maintain_kvs()
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			key_index=True
+		)
+
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		path_to_file = os.path.join(self.kvs_path, 'f/f.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write('{"ffffff": 4711, "ffff00": 42}')
+			f.close()
+		self.assertEqual(kvs.read('ffffff'), 4711)
+		self.assertEqual(kvs.read('ffff00'), 42)
+
+		os.remove(os.path.join(self.kvs_path, 'f/f.idx'))
+		self.assertEqual(kvs.read('ffff00'), 42)
+
+		self.assertEqual(kvs.maintain_kvs(), 1)
+		self.assertTrue(
+			os.path.exists(os.path.join(self.kvs_path, 'f/f.idx'))
+		)
+		self.assertEqual(kvs.read('ffff00'), 42)
+
+	def test_002_key_index_of_other_instance_outdated(self):
+		"""
+		Test if maintain_kvs() rebuilds a key index, which got outdated by an
+		instance opened before the key index got enabled
+		"""
+		kvs_a = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+		kvs_b = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			key_index=True
+		)
+
+		self.assertEqual(kvs_b.write('ffffff', 1337), 1)
+		self.assertEqual(kvs_a.write('ffff00', 42), 1)
+
+		path_to_file = os.path.join(self.kvs_path, 'f/f.idx')
+		with open(path_to_file, 'rb') as f:
+			self.assertNotIn(b'ffff00', f.read())
+			f.close()
+
+		self.assertEqual(kvs_b.maintain_kvs(), 1)
+		with open(path_to_file, 'rb') as f:
+			self.assertIn(b'ffff00', f.read())
+			f.close()
+		self.assertEqual(kvs_b.read('ffff00'), 42)
+
+if __name__ == '__main__':
+	unittest.main()
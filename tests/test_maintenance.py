@@ -0,0 +1,183 @@
+import os
+import shutil
+import time
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSMaintenance(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_maintenance'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_dirty_journal(self):
+		"""
+		Test if written json files get recorded in the dirty journal
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		path_to_file = os.path.join(self.kvs_path, 'dirty.journal')
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			lines = f.read().split()
+			f.close()
+		self.assertEqual(lines, ['6/0.json', 'f/f.json'])
+
+	def test_001_dirty_journal_deduplicated(self):
+		"""
+		Test if a json file only gets recorded once per dirty journal
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		for i in range(10):
+			self.assertEqual(kvs.write('ffffff', i), 1)
+		self.assertEqual(kvs.write('ffff00', 4711), 1)
+
+		path_to_file = os.path.join(self.kvs_path, 'dirty.journal')
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			lines = f.read().split()
+			f.close()
+		self.assertEqual(lines, ['f/f.json'])
+
+		# a new journal records the json file again
+		self.assertEqual(kvs.maintain_kvs(incremental=True), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			lines = f.read().split()
+			f.close()
+		self.assertEqual(lines, ['f/f.json'])
+
+	def test_002_maintain_kvs_incremental(self):
+		"""
+		Test if an incremental maintenance only repairs journaled json files
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.write('ffff00', 4711), 1)
+		self.assertEqual(kvs.get_entries(), 3)
+
+		path_to_file = os.path.join(self.kvs_path, 'f/f.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write('{"ffffff": 1337')
+			f.close()
+
+		self.assertEqual(kvs.maintain_kvs(incremental=True), 1)
+		self.assertEqual(kvs.get_entries(), 1)
+		self.assertFalse(
+			os.path.exists(os.path.join(self.kvs_path, 'dirty.journal'))
+		)
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			data = f.read()
+			f.close()
+		self.assertEqual(data, '{}')
+
+		# nothing left to do
+		self.assertEqual(kvs.maintain_kvs(incremental=True), 1)
+		self.assertEqual(kvs.get_entries(), 1)
+
+	def test_003_maintain_kvs_chunked(self):
+		"""
+		Test if a full maintenance can be split into resumable chunks
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		self.assertEqual(kvs.maintain_kvs(chunk_size=100), 0)
+		self.assertEqual(kvs.maintain_kvs(chunk_size=100), 0)
+
+		# a new instance resumes at the checkpoint
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.maintain_kvs(chunk_size=100), 1)
+		self.assertEqual(kvs.get_entries(), 2)
+		self.assertFalse(
+			os.path.exists(os.path.join(self.kvs_path, 'maintenance.json'))
+		)
+
+	def test_004_maintain_kvs_chunked_writes(self):
+		"""
+		Test if writes between the chunks of a maintenance get counted
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('00aa', 1), 1)
+		self.assertEqual(kvs.maintain_kvs(chunk_size=16), 0)
+		self.assertEqual(kvs.write('00bb', 2), 1)
+		while kvs.maintain_kvs(chunk_size=16) == 0:
+			pass
+		self.assertEqual(kvs.get_entries(), 2)
+
+	def test_005_maintain_kvs_workers(self):
+		"""
+		Test if a full maintenance can run across a worker pool
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.write('ffff00', 4711), 1)
+
+		self.assertEqual(kvs.maintain_kvs(workers=2), 1)
+		self.assertEqual(kvs.get_entries(), 3)
+		self.assertEqual(kvs.read('ffff00'), 4711)
+
+	def test_006_maintain_kvs_untouched(self):
+		"""
+		Test if a full maintenance does not rewrite intact json files
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		path_to_file = os.path.join(self.kvs_path, '6/0.json')
+		mtime        = os.stat(path_to_file).st_mtime_ns
+		time.sleep(0.01)
+
+		self.assertEqual(kvs.maintain_kvs(), 1)
+		self.assertEqual(kvs.get_entries(), 2)
+		self.assertEqual(os.stat(path_to_file).st_mtime_ns, mtime)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSReadOnly(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_read_only'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_read_only_missing_kvs(self):
+		"""
+		Test if a read-only instance does not create a kvs
+		"""
+		with self.assertRaises(ValueError):
+			FSHTBKVS(self.kvs_root, self.kvs_name, read_only=True)
+		self.assertFalse(os.path.exists(self.kvs_path))
+
+	def test_001_read_only_rejects_mutations(self):
+		"""
+		Test if a read-only instance reads entries but rejects mutations
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		os.remove(os.path.join(self.kvs_path, 'kvs.lock'))
+
+		kvs = FSHTBKVS(self.kvs_root, self.kvs_name, read_only=True)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs.get_entries(), 1)
+
+		with self.assertRaises(OSError):
+			kvs.write('ffffff', 1337)
+		with self.assertRaises(OSError):
+			kvs.delete('FSHTBKVS')
+		with self.assertRaises(OSError):
+			kvs.incr('counter')
+		with self.assertRaises(OSError):
+			kvs.maintain_kvs()
+		with self.assertRaises(OSError):
+			kvs.wipe_kvs()
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertFalse(
+			os.path.exists(os.path.join(self.kvs_path, 'kvs.lock'))
+		)
+
+	def test_002_read_only_does_not_repair(self):
+		"""
+		Test if a read-only instance reports broken json files untouched
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		path_to_file = os.path.join(self.kvs_path, '6/0.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write('{"60bffff92d": 1337')
+			f.close()
+
+		kvs = FSHTBKVS(self.kvs_root, self.kvs_name, read_only=True)
+		with self.assertRaises(OSError):
+			kvs.read('FSHTBKVS')
+		self.assertEqual(kvs.verify_kvs()['corrupt'], [path_to_file])
+
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			data = f.read()
+			f.close()
+		self.assertEqual(data, '{"60bffff92d": 1337')
+
+	def test_003_read_only_wal(self):
+		"""
+		Test if a read-only instance sees pending wal records without
+		applying them
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True,
+			durability='per-op'
+		)
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		with self.assertRaises(ValueError):
+			FSHTBKVS(self.kvs_root, self.kvs_name, wal=True, read_only=True)
+
+		reader = FSHTBKVS(self.kvs_root, self.kvs_name, read_only=True)
+		self.assertEqual(reader.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(reader.get_entries(), 1)
+		self.assertTrue(
+			os.path.exists(os.path.join(self.kvs_path, 'wal.log'))
+		)
+		kvs.close()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,156 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSRoots(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_roots'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		self.disks 		= [
+			os.path.join(self.kvs_root, 'test_fshtbkvs_disk' + str(i))
+			for i in range(3)
+		]
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+		for disk in self.disks:
+			shutil.rmtree(disk, ignore_errors=True)
+			os.makedirs(disk)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+		for disk in self.disks:
+			shutil.rmtree(disk, ignore_errors=True)
+
+	def test_000_striped_kvs(self):
+		"""
+		Test if the top-level subtrees get striped across the roots
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			roots=self.disks[:2]
+		)
+
+		self.assertEqual(kvs.write('0fff', 'disk 0'), 1)
+		self.assertEqual(kvs.write('1fff', 'disk 1'), 1)
+		self.assertTrue(os.path.exists(
+			os.path.join(self.disks[0], self.kvs_name, '0/f.json')
+		))
+		self.assertTrue(os.path.exists(
+			os.path.join(self.disks[1], self.kvs_name, '1/f.json')
+		))
+		self.assertFalse(os.path.exists(
+			os.path.join(self.disks[0], self.kvs_name, '1/f.json')
+		))
+
+		# the mapping is stored in the meta file
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.read('0fff'), 'disk 0')
+		self.assertEqual(kvs.read('1fff'), 'disk 1')
+		self.assertEqual(
+			kvs.get_roots()['1'],
+			os.path.join(self.disks[1], self.kvs_name)
+		)
+
+		self.assertEqual(kvs.maintain_kvs(workers=2), 1)
+		self.assertEqual(kvs.get_entries(), 2)
+		self.assertEqual(kvs.verify_kvs()['checked'], 256)
+
+	def test_001_rebalance_kvs(self):
+		"""
+		Test if top-level subtrees can be moved between roots
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			roots=self.disks[:2]
+		)
+
+		self.assertEqual(kvs.write('0fff', 'disk 0'), 1)
+		self.assertEqual(kvs.write('1fff', 'disk 1'), 1)
+
+		self.assertEqual(kvs.rebalance_kvs({'1': self.disks[2]}), 1)
+		self.assertTrue(os.path.exists(
+			os.path.join(self.disks[2], self.kvs_name, '1/f.json')
+		))
+		self.assertFalse(os.path.exists(
+			os.path.join(self.disks[1], self.kvs_name, '1')
+		))
+		self.assertEqual(kvs.read('1fff'), 'disk 1')
+
+		self.assertEqual(kvs.rebalance_kvs([self.kvs_root]), 1)
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.read('0fff'), 'disk 0')
+		self.assertEqual(kvs.read('1fff'), 'disk 1')
+		self.assertTrue(os.path.exists(os.path.join(self.kvs_path, '1/f.json')))
+
+	def test_002_export_and_batch(self):
+		"""
+		Test if exports and batches work across roots
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			roots=self.disks
+		)
+
+		with kvs.batch() as batch:
+			for i in range(16):
+				batch.write('%xfff' % i, i)
+
+		path_to_file = os.path.join(self.kvs_path, 'export.fshtbkvs')
+		self.assertEqual(kvs.export_kvs(path_to_file), 1)
+		with open(path_to_file, 'r') as f:
+			lines = f.readlines()
+			f.close()
+		self.assertEqual(
+			[line.strip() for line in lines],
+			['{"%xfff": %d}' % (i, i) for i in range(16)]
+		)
+
+	def test_003_rebalance_seen_by_other_instance(self):
+		"""
+		Test if an open instance follows a rebalance of another instance
+		"""
+		kvs_a = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			roots=self.disks[:2]
+		)
+		kvs_b = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs_a.write('1fff', 'disk 1'), 1)
+		self.assertEqual(kvs_b.read('1fff'), 'disk 1')
+
+		self.assertEqual(kvs_a.rebalance_kvs({'1': self.disks[2]}), 1)
+		self.assertEqual(kvs_b.read('1fff'), 'disk 1')
+		self.assertEqual(kvs_b.write('1aaa', 'disk 2'), 1)
+		self.assertEqual(kvs_a.read('1aaa'), 'disk 2')
+		self.assertTrue(os.path.exists(
+			os.path.join(self.disks[2], self.kvs_name, '1/a.json')
+		))
+		self.assertFalse(os.path.exists(
+			os.path.join(self.disks[1], self.kvs_name, '1')
+		))
+		self.assertEqual(
+			kvs_b.get_roots()['1'],
+			os.path.join(self.disks[2], self.kvs_name)
+		)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+def is_even(key, value):
+	return value % 2 == 0
+
+def get_value(key, value):
+	return value
+
+def add(a, b):
+	return a + b
+
+class TestFSHTBKVSScan(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_scan'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_scan(self):
+		"""
+		Test if a scan filters, maps and aggregates across worker processes
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		with kvs.batch() as batch:
+			for i in range(100):
+				batch.write('key ' + str(i), i)
+
+		self.assertEqual(len(kvs.scan()), 100)
+		self.assertEqual(
+			sorted(kvs.scan(predicate=is_even, map=get_value, workers=4)),
+			list(range(0, 100, 2))
+		)
+		self.assertEqual(
+			kvs.scan(map=get_value, reduce=add, workers=4),
+			sum(range(100))
+		)
+		self.assertEqual(
+			kvs.scan(predicate=lambda key, value: False, reduce=add),
+			None
+		)
+
+	def test_001_scan_prefix(self):
+		"""
+		Test if a scan only returns entries with processed keys starting with
+		the prefix
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.write('ffff00', 4711), 1)
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		self.assertEqual(
+			sorted(kvs.scan(prefix='fffff')),
+			[('ffffff', 1337)]
+		)
+		self.assertEqual(
+			sorted(kvs.scan(prefix='f', map=get_value, workers=2)),
+			[1337, 4711]
+		)
+		with self.assertRaises(ValueError):
+			kvs.scan(prefix='FF')
+
+	def test_002_scan_wal(self):
+		"""
+		Test if a read-only scan sees pending write-ahead log records
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True,
+			durability='per-op'
+		)
+
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		reader = FSHTBKVS(self.kvs_root, self.kvs_name, read_only=True)
+		self.assertEqual(reader.scan(map=get_value), [1337])
+		kvs.close()
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import time
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSScheduler(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_scheduler'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def wait_for_cycles(self, kvs, cycles, timeout=10):
+		deadline = time.time() + timeout
+		while time.time() < deadline:
+			if kvs.get_scheduler_status()['cycles'] >= cycles:
+				return True
+			time.sleep(0.01)
+		return False
+
+	def test_000_start_and_stop_scheduler(self):
+		"""
+		Test if the scheduler can get started and stopped
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.get_scheduler_status()['running'], False)
+		self.assertEqual(kvs.start_scheduler(buckets_per_second=100000), 1)
+		self.assertEqual(kvs.get_scheduler_status()['running'], True)
+		self.assertTrue(self.wait_for_cycles(kvs, 1))
+		self.assertEqual(kvs.stop_scheduler(), 1)
+		self.assertEqual(kvs.get_scheduler_status()['running'], False)
+
+		with self.assertRaises(ValueError):
+			kvs.start_scheduler(tasks=('defragment',))
+
+	def test_001_scheduler_verifies_and_reconciles(self):
+		"""
+		Test if the scheduler reports corrupt files and recounts the entries
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		corrupt_file = os.path.join(self.kvs_path, '6/0.json')
+		with open(corrupt_file, 'w', encoding='UTF-8') as f:
+			f.write('{"60bffff92d": 1337}')
+			f.close()
+
+		# another instance with an outdated entry count
+		path_to_file = os.path.join(self.kvs_path, 'meta.json')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write(
+				'{"kvs_name": "test_fshtbkvs_scheduler", "max_depth": 2, '
+				+ '"entries": 5}'
+			)
+			f.close()
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.get_entries(), 5)
+
+		kvs.start_scheduler(
+			tasks=('verify', 'reconcile'),
+			buckets_per_second=100000
+		)
+		self.assertTrue(self.wait_for_cycles(kvs, 1))
+		kvs.stop_scheduler()
+
+		self.assertEqual(kvs.get_scheduler_status()['corrupt'], [corrupt_file])
+		self.assertEqual(kvs.get_entries(), 2)
+
+	def test_002_scheduler_pauses_on_foreground_load(self):
+		"""
+		Test if the scheduler pauses while the foreground load is high
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		kvs.start_scheduler(buckets_per_second=160, max_foreground_ops=0)
+		deadline = time.time() + 5
+		paused   = False
+		while time.time() < deadline and not paused:
+			kvs.read('FSHTBKVS')
+			paused = kvs.get_scheduler_status()['paused']
+		kvs.stop_scheduler()
+
+		self.assertTrue(paused)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSSchema(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_schema'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		self.schema 	= {
+			'type':   'dict',
+			'fields': {
+				'name': 'str',
+				'year': 'int',
+				'tags': {'type': 'list', 'items': 'str'},
+				'meta': 'any'
+			},
+			'required': ['name']
+		}
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_schema_validates_writes(self):
+		"""
+		Test if writes get validated against the schema with precise errors
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			schema=self.schema
+		)
+
+		value = {'name': 'FSHTBKVS', 'year': 2021, 'tags': ['kvs']}
+		self.assertEqual(kvs.write('FSHTBKVS', value), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), value)
+		self.assertEqual(
+			kvs.update('FSHTBKVS', {'meta': {'a': [1, 2.5]}})['meta'],
+			{'a': [1, 2.5]}
+		)
+
+		with self.assertRaisesRegex(ValueError, "value.year must be of type"):
+			kvs.write('FSHTBKVS', {'name': 'FSHTBKVS', 'year': '2021'})
+		with self.assertRaisesRegex(ValueError, r"value.tags\[\] must be"):
+			kvs.write('FSHTBKVS', {'name': 'FSHTBKVS', 'tags': ['kvs', 1]})
+		with self.assertRaisesRegex(ValueError, "missing the field 'name'"):
+			kvs.write('FSHTBKVS', {'year': 2021})
+		with self.assertRaisesRegex(ValueError, "unknown field 'color'"):
+			kvs.write('FSHTBKVS', {'name': 'FSHTBKVS', 'color': 'red'})
+		with self.assertRaisesRegex(ValueError, "value.year must be of type"):
+			kvs.write('FSHTBKVS', {'name': 'FSHTBKVS', 'year': True})
+		with self.assertRaises(ValueError):
+			with kvs.batch() as batch:
+				batch.write('ffffff', 1337)
+		self.assertEqual(kvs.read('FSHTBKVS')['year'], 2021)
+
+	def test_001_schema_persisted(self):
+		"""
+		Test if the schema gets persisted in the meta file and can be removed
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			schema=self.schema
+		)
+
+		with open(
+			os.path.join(self.kvs_path, 'meta.json'),
+			'r',
+			encoding='UTF-8'
+		) as f:
+			meta = json.load(f)
+			f.close()
+		self.assertEqual(meta['schema'], self.schema)
+
+		kvs = FSHTBKVS(self.kvs_root, self.kvs_name)
+		self.assertEqual(kvs.get_schema(), self.schema)
+		with self.assertRaises(ValueError):
+			kvs.write('ffffff', 1337)
+
+		self.assertEqual(kvs.set_schema(None), True)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		kvs = FSHTBKVS(self.kvs_root, self.kvs_name)
+		self.assertEqual(kvs.get_schema(), None)
+
+		with self.assertRaises(ValueError):
+			kvs.set_schema({'type': 'set'})
+
+if __name__ == '__main__':
+	unittest.main()
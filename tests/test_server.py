@@ -0,0 +1,191 @@
+import os
+import shutil
+import socket
+import threading
+import unittest
+from unittest import mock
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+from fshtbkvs.FSHTBKVSServer import FSHTBKVSClient, FSHTBKVSServer
+
+class TestFSHTBKVSServer(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_server'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+		self.kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			cache_entries=1024
+		)
+		self.socket_path = os.path.join(self.kvs_path, 'kvs.sock')
+		self.server      = FSHTBKVSServer(self.kvs, self.socket_path)
+		self.server.start()
+
+	def tearDown(self):
+		self.server.close()
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_read_write_delete(self):
+		"""
+		Test if a client reads, writes and deletes entries of the served kvs
+		"""
+		with FSHTBKVSClient(self.socket_path) as client:
+			self.assertEqual(client.write('FSHTBKVS', 'is awesome!'), 1)
+			self.assertEqual(client.read('FSHTBKVS'), 'is awesome!')
+			self.assertEqual(self.kvs.read('FSHTBKVS'), 'is awesome!')
+			self.assertEqual(client.incr('counter', 2), 2)
+			self.assertEqual(client.get_entries(), 2)
+			self.assertEqual(client.delete('FSHTBKVS'), 1)
+			self.assertEqual(client.read('FSHTBKVS'), None)
+
+			with self.assertRaises(ValueError):
+				client.write('', 'is awesome!')
+			# the connection is still usable after an error
+			self.assertEqual(client.read('counter'), 2)
+
+	def test_001_pipeline(self):
+		"""
+		Test if pipelined requests get answered in order
+		"""
+		with FSHTBKVSClient(self.socket_path) as client:
+			with client.pipeline() as pipe:
+				for i in range(100):
+					pipe.write('key ' + str(i), i)
+				pipe.read('key 42')
+				pipe.get_entries()
+			results = pipe.get_results()
+			self.assertEqual(results[:100], [1] * 100)
+			self.assertEqual(results[100:], [42, 100])
+
+			pipe = client.pipeline()
+			pipe.read('key 1').write('', 1).read('key 2')
+			with self.assertRaises(ValueError):
+				pipe.execute()
+			self.assertEqual(pipe.get_results(), [1, None, 2])
+
+	def test_002_large_pipeline(self):
+		"""
+		Test if a pipeline exceeding the socket buffers does not block
+		"""
+		with FSHTBKVSClient(self.socket_path, timeout=20) as client:
+			self.assertEqual(client.write('FSHTBKVS', 'x' * 20000), 1)
+
+			pipe = client.pipeline()
+			for _ in range(2000):
+				pipe.read('FSHTBKVS')
+			results = pipe.execute()
+			self.assertEqual(len(results), 2000)
+			self.assertEqual(results[-1], 'x' * 20000)
+
+			# the connection is still in sync
+			self.assertEqual(client.get_entries(), 1)
+
+	def test_003_batches_and_iteration(self):
+		"""
+		Test if batched requests and iteration work over a socket
+		"""
+		with FSHTBKVSClient(self.socket_path) as client:
+			self.assertEqual(
+				client.write_many({'FSHTBKVS': 'is awesome!', 'ffffff': 1337}),
+				1
+			)
+			self.assertEqual(
+				client.read_many(['FSHTBKVS', 'ffffff', 'missing']),
+				['is awesome!', 1337, None]
+			)
+			self.assertEqual(
+				sorted(client.iter()),
+				sorted(self.kvs.scan())
+			)
+			self.assertEqual(client.iter('ff').__next__(), ('ffffff', 1337))
+			self.assertEqual(client.delete_many(['FSHTBKVS', 'ffffff']), 1)
+			self.assertEqual(client.get_entries(), 0)
+
+	def test_004_shared_writer(self):
+		"""
+		Test if concurrent clients share a single write path
+		"""
+		def worker():
+			with FSHTBKVSClient(self.socket_path) as client:
+				for _ in range(50):
+					client.incr('counter')
+
+		threads = [threading.Thread(target=worker) for _ in range(4)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+
+		self.assertEqual(self.kvs.read('counter'), 200)
+
+	def test_005_tcp(self):
+		"""
+		Test if the kvs can be served on localhost only
+		"""
+		with self.assertRaises(ValueError):
+			FSHTBKVSServer(self.kvs, ('0.0.0.0', 0))
+
+		with FSHTBKVSServer(self.kvs, ('127.0.0.1', 0)) as server:
+			server.start()
+			with FSHTBKVSClient(server.get_address()) as client:
+				self.assertEqual(client.write('FSHTBKVS', 'is awesome!'), 1)
+				self.assertEqual(client.get_kvs_name(), self.kvs_name)
+		self.assertEqual(self.kvs.read('FSHTBKVS'), 'is awesome!')
+
+	def test_006_socket_path(self):
+		"""
+		Test if only stale socket files get replaced
+		"""
+		# a live server keeps its path
+		with self.assertRaises(OSError):
+			FSHTBKVSServer(self.kvs, self.socket_path)
+		with FSHTBKVSClient(self.socket_path) as client:
+			self.assertEqual(client.get_entries(), 0)
+
+		# a regular file is never removed
+		path_to_file = os.path.join(self.kvs_path, 'file.sock')
+		with open(path_to_file, 'w', encoding='UTF-8') as f:
+			f.write('FSHTBKVS')
+			f.close()
+		with self.assertRaises(OSError):
+			FSHTBKVSServer(self.kvs, path_to_file)
+		self.assertTrue(os.path.isfile(path_to_file))
+
+		# the socket file of a crashed server gets replaced
+		path_to_file = os.path.join(self.kvs_path, 'stale.sock')
+		stale = socket.socket(socket.AF_UNIX)
+		stale.bind(path_to_file)
+		stale.close()
+		with FSHTBKVSServer(self.kvs, path_to_file) as server:
+			server.start()
+			with FSHTBKVSClient(path_to_file) as client:
+				self.assertEqual(client.get_entries(), 0)
+		self.assertFalse(os.path.exists(path_to_file))
+
+	def test_007_iteration_exceeding_frames(self):
+		"""
+		Test if iteration splits subtrees exceeding the maximum frame size
+		"""
+		with FSHTBKVSClient(self.socket_path) as client:
+			items = {'00aa%04x' % i: 'x' * 100 for i in range(200)}
+			items['00aa'] = 'is awesome!'
+			items['ffffff'] = 1337
+			self.assertEqual(client.write_many(items), 1)
+
+			with mock.patch('fshtbkvs.FSHTBKVSServer._MAX_FRAME', 4000):
+				with self.assertRaises(OSError):
+					client.scan(prefix='0')
+				self.assertEqual(
+					sorted(client.iter()),
+					sorted(items.items())
+				)
+
+			# the connection is still in sync
+			self.assertEqual(client.get_entries(), 202)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+from fshtbkvs.FSHTBKVSSnapshot import FSHTBKVSSnapshot
+
+class TestFSHTBKVSSnapshot(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_snapshot'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		self.snapshot 	= self.kvs_path + '.snapshot'
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+		if os.path.exists(self.snapshot):
+			os.remove(self.snapshot)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+		if os.path.exists(self.snapshot):
+			os.remove(self.snapshot)
+
+	def test_000_snapshot_read(self):
+		"""
+		Test if a snapshot serves the same entries as the kvs
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.write('a', {'nested': [1, 2.5, True]}), 1)
+		self.assertEqual(kvs.snapshot(), 3)
+
+		with FSHTBKVSSnapshot(self.snapshot) as snapshot:
+			self.assertEqual(len(snapshot), 3)
+			self.assertEqual(snapshot.get_max_depth(), 2)
+			self.assertEqual(snapshot.read('FSHTBKVS'), 'is awesome!')
+			self.assertEqual(snapshot.read('ffffff'), 1337)
+			self.assertEqual(snapshot.read('a'), {'nested': [1, 2.5, True]})
+			self.assertEqual(snapshot.read('missing'), None)
+			self.assertTrue('ffffff' in snapshot)
+			self.assertFalse('ffff00' in snapshot)
+			self.assertEqual(
+				snapshot.read_many(['ffffff', 'missing']),
+				[1337, None]
+			)
+			self.assertEqual(
+				sorted(value for _, value in snapshot if value == 1337),
+				[1337]
+			)
+			self.assertEqual(len(list(snapshot)), 3)
+
+	def test_001_snapshot_empty(self):
+		"""
+		Test if an empty kvs results in an empty snapshot
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.snapshot(), 0)
+		with FSHTBKVSSnapshot(self.snapshot) as snapshot:
+			self.assertEqual(len(snapshot), 0)
+			self.assertEqual(snapshot.read('FSHTBKVS'), None)
+			self.assertEqual(list(snapshot), [])
+
+	def test_002_snapshot_wal(self):
+		"""
+		Test if pending write-ahead log records are part of the snapshot
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.delete('ffffff'), 1)
+		self.assertEqual(kvs.snapshot(), 1)
+		kvs.close()
+
+		with FSHTBKVSSnapshot(self.snapshot) as snapshot:
+			self.assertEqual(snapshot.read('FSHTBKVS'), 'is awesome!')
+			self.assertEqual(snapshot.read('ffffff'), None)
+
+	def test_003_snapshot_invalid_file(self):
+		"""
+		Test if opening something else than a snapshot fails
+		"""
+		with open(self.snapshot, 'w', encoding='UTF-8') as f:
+			f.write('{"ffffff": 1337}')
+			f.close()
+
+		with self.assertRaises(OSError):
+			FSHTBKVSSnapshot(self.snapshot)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,194 @@
+import os
+import shutil
+import threading
+import time
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSTTL(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_ttl'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_expired_entry_hidden(self):
+		"""
+		Test if an expired entry gets hidden and deleted by a sweep
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!', ttl=0.1), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+
+		time.sleep(0.2)
+		self.assertEqual(kvs.read('FSHTBKVS'), None)
+		self.assertEqual(kvs.get_entries(), 2)
+
+		self.assertEqual(kvs.expire_kvs(), 1)
+		self.assertEqual(kvs.get_entries(), 1)
+		self.assertEqual(kvs.read('ffffff'), 1337)
+		self.assertEqual(os.listdir(os.path.join(self.kvs_path, 'expiry')), [])
+		self.assertFalse(
+			os.path.exists(os.path.join(self.kvs_path, '6/0.ttl'))
+		)
+
+	def test_001_overwrite_removes_ttl(self):
+		"""
+		Test if overwriting or deleting an entry removes its ttl
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!', ttl=10), 1)
+		self.assertEqual(kvs.write('FSHTBKVS', 'is still awesome!'), 1)
+		self.assertEqual(kvs.write('ffffff', 1337, ttl=10), 1)
+		self.assertEqual(kvs.delete('ffffff'), 1)
+		self.assertEqual(kvs.write('ffffff', 4711), 1)
+
+		self.assertEqual(kvs.expire_kvs(now=time.time() + 3600), 0)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is still awesome!')
+		self.assertEqual(kvs.read('ffffff'), 4711)
+		self.assertEqual(kvs.get_entries(), 2)
+
+	def test_002_sweep_due_windows(self):
+		"""
+		Test if a sweep only deletes the entries of due windows
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(
+			kvs.write_many({'FSHTBKVS': 'is awesome!', 'ffffff': 1337}, ttl=10),
+			1
+		)
+		self.assertEqual(kvs.write('ffff00', 4711, ttl=7200), 1)
+		self.assertEqual(kvs.get_entries(), 3)
+
+		self.assertEqual(kvs.expire_kvs(now=time.time() + 60), 2)
+		self.assertEqual(kvs.get_entries(), 1)
+		self.assertEqual(kvs.read('ffff00'), 4711)
+		self.assertEqual(
+			len(os.listdir(os.path.join(self.kvs_path, 'expiry'))),
+			1
+		)
+
+		# a new instance picks up the remaining expiries
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.expire_kvs(now=time.time() + 7260), 1)
+		self.assertEqual(kvs.get_entries(), 0)
+
+	def test_003_expired_entry_mutated(self):
+		"""
+		Test if atomic operations treat an expired entry as missing
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True
+		)
+
+		self.assertEqual(kvs.write('counter', 41, ttl=0.1), 1)
+		time.sleep(0.2)
+		self.assertEqual(kvs.incr('counter'), 1)
+		self.assertEqual(kvs.expire_kvs(), 0)
+		self.assertEqual(kvs.read('counter'), 1)
+		self.assertEqual(kvs.get_entries(), 1)
+
+	def test_004_ttl_set_by_other_instance(self):
+		"""
+		Test if an instance opened before the first ttl drops it on overwrite
+		"""
+		kvs_a = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+		kvs_b = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs_b.write('FSHTBKVS', 'is temporary!', ttl=10), 1)
+		self.assertEqual(kvs_a.write('FSHTBKVS', 'is awesome!'), 1)
+
+		self.assertEqual(kvs_b.expire_kvs(now=time.time() + 3600), 0)
+		self.assertEqual(kvs_a.read('FSHTBKVS'), 'is awesome!')
+
+		# expired entries of other instances stay hidden as well
+		self.assertEqual(kvs_b.write('ffffff', 1337, ttl=0.1), 1)
+		time.sleep(0.2)
+		self.assertEqual(kvs_a.read('ffffff'), None)
+
+	def test_005_invalid_ttl(self):
+		"""
+		Test if invalid ttls get rejected
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		for ttl in (0, -1, True, '10'):
+			with self.assertRaises(ValueError):
+				kvs.write('FSHTBKVS', 'is awesome!', ttl=ttl)
+		self.assertEqual(kvs.get_entries(), 0)
+
+	def test_006_expire_beside_logged_writers(self):
+		"""
+		Test if sweeps and writers of a write-ahead logged kvs do not
+		deadlock on syncing the write-ahead log
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True,
+			durability='per-op'
+		)
+
+		def writer(i):
+			for j in range(100):
+				kvs.write('key ' + str(i) + ' ' + str(j), j, ttl=0.01)
+
+		def sweeper():
+			for _ in range(50):
+				kvs.expire_kvs(now=time.time() + 1)
+
+		threads = [
+			threading.Thread(target=writer, args=(i,), daemon=True)
+			for i in range(4)
+		]
+		threads.append(threading.Thread(target=sweeper, daemon=True))
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join(timeout=30)
+			self.assertFalse(t.is_alive())
+
+		kvs.expire_kvs(now=time.time() + 1)
+		self.assertEqual(kvs.get_entries(), 0)
+		kvs.close()
+
+if __name__ == '__main__':
+	unittest.main()
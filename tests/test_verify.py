@@ -0,0 +1,99 @@
+import os
+import shutil
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSVerify(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_verify'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_checksum_file_written(self):
+		"""
+		Test if a checksum file gets written next to every json file
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		path_to_file = os.path.join(self.kvs_path, '6/0.sum')
+		self.assertTrue(
+			os.path.exists(path_to_file),
+			path_to_file + ' not found!'
+		)
+
+	def test_001_verify_healthy_kvs(self):
+		"""
+		Test if a healthy kvs gets verified without findings
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		report = kvs.verify_kvs(workers=2)
+		self.assertEqual(report['checked'], 256)
+		self.assertEqual(report['corrupt'], [])
+		self.assertEqual(report['missing'], [])
+
+	def test_002_verify_broken_kvs(self):
+		"""
+		Test if corrupt and missing json files get reported but not repaired
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		corrupt_file = os.path.join(self.kvs_path, '6/0.json')
+		with open(corrupt_file, 'w', encoding='UTF-8') as f:
+			f.write('{"60bffff92d": 1337}')
+			f.close()
+		missing_file = os.path.join(self.kvs_path, 'f/f.json')
+		os.remove(missing_file)
+
+		report = kvs.verify_kvs(workers=2)
+		self.assertEqual(report['corrupt'], [corrupt_file])
+		self.assertEqual(report['missing'], [missing_file])
+
+		with open(corrupt_file, 'r', encoding='UTF-8') as f:
+			data = f.read()
+			f.close()
+		self.assertEqual(data, '{"60bffff92d": 1337}')
+		self.assertFalse(os.path.exists(missing_file))
+
+	def test_003_verify_incremental(self):
+		"""
+		Test if an incremental verification only checks modified json files
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth
+		)
+
+		kvs.verify_kvs()
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+
+		report = kvs.verify_kvs(incremental=True)
+		self.assertEqual(report['checked'], 1)
+		self.assertEqual(report['corrupt'], [])
+
+if __name__ == '__main__':
+	unittest.main()
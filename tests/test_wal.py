@@ -0,0 +1,234 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import unittest
+from fshtbkvs.FSHTBKVS import FSHTBKVS
+
+class TestFSHTBKVSWal(unittest.TestCase):
+	def setUp(self):
+		self.kvs_root 	= '/tmp'
+		self.kvs_name 	= 'test_fshtbkvs_wal'
+		self.max_depth 	= 2
+		self.kvs_path 	= os.path.join(self.kvs_root, self.kvs_name)
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def tearDown(self):
+		shutil.rmtree(self.kvs_path, ignore_errors=True)
+
+	def test_000_write_to_wal(self):
+		"""
+		Test if writes go to the write-ahead log until a checkpoint happens
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs.get_entries(), 1)
+
+		path_to_file = os.path.join(self.kvs_path, '6/0.json')
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			data = f.read()
+			f.close()
+		self.assertEqual(data, '{}')
+
+		self.assertEqual(kvs.delete('FSHTBKVS'), 1)
+		self.assertEqual(kvs.read('FSHTBKVS'), None)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+		self.assertEqual(kvs.get_entries(), 1)
+
+		self.assertEqual(kvs.checkpoint(), 1)
+		path_to_file = os.path.join(self.kvs_path, 'f/f.json')
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			data = f.read()
+			f.close()
+		self.assertEqual(data, '{"ffffff": 1337}')
+		self.assertEqual(
+			os.path.getsize(os.path.join(self.kvs_path, 'wal.log')),
+			0
+		)
+
+		self.assertEqual(kvs.close(), 1)
+		self.assertFalse(os.path.exists(os.path.join(self.kvs_path, 'wal.log')))
+
+	def test_001_replay_wal(self):
+		"""
+		Test if the write-ahead log gets replayed after a crash
+		"""
+		self.run_writer(
+			"kvs.write('FSHTBKVS', 'is awesome!')\n"
+			"kvs.write('ffffff', 1337)\n"
+			"kvs.delete('ffffff')\n"
+			"kvs.write('ffff00', 4711)\n"
+		)
+
+		# crash during the last append
+		with open(os.path.join(self.kvs_path, 'wal.log'), 'a') as f:
+			f.write('{"seq": 5, "ops": [["put", "ffff01"')
+			f.close()
+
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs.read('ffffff'), None)
+		self.assertEqual(kvs.read('ffff00'), 4711)
+		self.assertEqual(kvs.read('ffff01'), None)
+		self.assertEqual(kvs.get_entries(), 2)
+		self.assertFalse(os.path.exists(os.path.join(self.kvs_path, 'wal.log')))
+
+	def test_002_group_commit(self):
+		"""
+		Test if concurrent per-op durable writers all get committed
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True,
+			durability='per-op',
+			wal_checkpoint_ops=50
+		)
+
+		def writer(n):
+			for i in range(25):
+				kvs.write('%02x%02x' % (n, i), i)
+
+		threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+
+		self.assertEqual(kvs.get_entries(), 200)
+		self.assertEqual(kvs.close(), 1)
+
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.get_entries(), 200)
+		self.assertEqual(kvs.read('0718'), 24)
+
+		with self.assertRaises(ValueError):
+			FSHTBKVS(self.kvs_root, self.kvs_name, durability='always')
+
+	def test_003_live_wal_not_replayed(self):
+		"""
+		Test if the write-ahead log of a live instance is left alone
+		"""
+		writer = self.run_writer(
+			"kvs.write('FSHTBKVS', 'is awesome!')\n"
+			"print('ready', flush=True)\n"
+			"sys.stdin.readline()\n"
+			"kvs.write('ffffff', 1337)\n",
+			wait=False
+		)
+		self.assertEqual(writer.stdout.readline().strip(), 'ready')
+
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertTrue(os.path.exists(os.path.join(self.kvs_path, 'wal.log')))
+		with self.assertRaises(OSError):
+			FSHTBKVS(self.kvs_root, self.kvs_name, wal=True)
+
+		writer.communicate('go\n', timeout=30)
+		self.assertEqual(writer.returncode, 0)
+
+		# the writer crashed, so its log gets replayed now
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+		self.assertEqual(kvs.read('FSHTBKVS'), 'is awesome!')
+		self.assertEqual(kvs.read('ffffff'), 1337)
+		self.assertEqual(kvs.get_entries(), 2)
+
+	def test_004_maintain_workers_keep_wal(self):
+		"""
+		Test if maintenance workers do not touch the write-ahead log
+		"""
+		kvs = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True,
+			durability='per-op'
+		)
+
+		self.assertEqual(kvs.write('FSHTBKVS', 'is awesome!'), 1)
+		self.assertEqual(kvs.maintain_kvs(workers=2), 1)
+		self.assertEqual(kvs.write('ffffff', 1337), 1)
+
+		path_to_file = os.path.join(self.kvs_path, 'wal.log')
+		with open(path_to_file, 'r', encoding='UTF-8') as f:
+			data = f.read()
+			f.close()
+		self.assertIn('ffffff', data)
+		self.assertEqual(kvs.close(), 1)
+
+	def test_005_writers_blocked_while_wal_in_use(self):
+		"""
+		Test if other instances can not write, while the log is in use
+		"""
+		kvs_w = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name,
+			max_depth=self.max_depth,
+			wal=True
+		)
+		kvs_o = FSHTBKVS(
+			self.kvs_root,
+			self.kvs_name
+		)
+
+		self.assertEqual(kvs_w.write('ffbb', 1), 1)
+		with self.assertRaises(OSError):
+			kvs_o.write('ffbb', 2)
+		self.assertEqual(kvs_w.checkpoint(), 1)
+		self.assertEqual(kvs_o.read('ffbb'), 1)
+
+		self.assertEqual(kvs_w.close(), 1)
+		self.assertEqual(kvs_o.write('ffbb', 2), 1)
+		self.assertEqual(kvs_o.read('ffbb'), 2)
+
+	def run_writer(self, code, wait=True):
+		"""
+		Runs 'code' against a write-ahead logged kvs in a process, which exits
+		without closing the kvs (like a crash)
+		"""
+		writer = subprocess.Popen(
+			[
+				sys.executable,
+				'-c',
+				'import os, sys\n'
+				+ 'from fshtbkvs.FSHTBKVS import FSHTBKVS\n'
+				+ 'kvs = FSHTBKVS(%r, %r, max_depth=%d, wal=True, '
+				% (self.kvs_root, self.kvs_name, self.max_depth)
+				+ "durability='per-op')\n"
+				+ code
+				+ 'os._exit(0)\n'
+			],
+			cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+			stdin=subprocess.PIPE,
+			stdout=subprocess.PIPE,
+			text=True
+		)
+		if wait:
+			writer.communicate(timeout=30)
+			self.assertEqual(writer.returncode, 0)
+
+		return writer
+
+if __name__ == '__main__':
+	unittest.main()